@@ -0,0 +1,36 @@
+"""
+Compact binary encoding for numeric arrays stored in the database.
+
+Layout (little endian):
+    magic     4 bytes   b"CVA1"
+    dtype     4 bytes   NumPy dtype string, NUL padded (e.g. b"<f8\\0")
+    ndim      1 byte
+    shape     ndim x uint64
+    data      raw C-order element bytes
+"""
+import struct
+
+import numpy as np
+
+_MAGIC = b"CVA1"
+_HEADER = struct.Struct("<4s4sB")
+_DTYPE = np.dtype("<f8")
+
+
+def pack_array(values) -> bytes:
+    """Encode an array as packed float64 with a dtype/shape header."""
+    array = np.ascontiguousarray(values, dtype=_DTYPE)
+    header = _HEADER.pack(_MAGIC, _DTYPE.str.encode(), array.ndim)
+    shape = struct.pack(f"<{array.ndim}Q", *array.shape)
+    return header + shape + array.tobytes()
+
+
+def unpack_array(blob: bytes) -> np.ndarray:
+    """Decode bytes produced by pack_array (read-only view over the buffer)."""
+    magic, dtype, ndim = _HEADER.unpack_from(blob)
+    if magic != _MAGIC:
+        raise ValueError("Not a packed array")
+    offset = _HEADER.size
+    shape = struct.unpack_from(f"<{ndim}Q", blob, offset)
+    offset += 8 * ndim
+    return np.frombuffer(blob, dtype=np.dtype(dtype.rstrip(b"\0").decode()), offset=offset).reshape(shape)
@@ -1,18 +1,57 @@
+import hashlib
+import hmac
+import math
+import secrets
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from passlib.hash import argon2, bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from app.cache import LRUCache
 from app.config import settings
-from app.database import get_db
-from app.models import User
-from app.schemas import TokenData
+from app.database import get_async_db
+from app.models import ApiKey, User
+from app.revocation import revocations
 
+# Reconfigured from settings at startup by configure_password_hashing()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_policy: dict = {}
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login")
 
+# Column snapshots of authenticated users keyed by JWT subject (username).
+# Entries are invalidated on profile/password changes in this worker; the TTL
+# bounds staleness for changes made through other workers.
+user_cache = LRUCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+# Verified JWT claims keyed by the raw token string; entries never outlive the token's exp
+token_cache = LRUCache(maxsize=settings.TOKEN_CACHE_SIZE)
+
+# API keys look like "fac_<prefix>_<secret>"; the cache maps prefix -> (key digest, user snapshot)
+API_KEY_MARKER = "fac_"
+api_key_cache = LRUCache(maxsize=settings.API_KEY_CACHE_SIZE, ttl=settings.API_KEY_CACHE_TTL_SECONDS)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Lightweight authenticated identity for handlers that only need the id."""
+    id: int
+    username: str
+
+
+def invalidate_user(*usernames: str) -> None:
+    """Drop cached principals, e.g. after the user row changed."""
+    for username in usernames:
+        user_cache.pop(username)
+    # API key entries embed user snapshots; profile changes are rare enough to drop them all
+    api_key_cache.clear()
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
@@ -24,6 +63,71 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """Whether a stored hash uses another scheme or cost than the current policy."""
+    return pwd_context.needs_update(hashed_password)
+
+
+def calibrate_bcrypt_rounds(target_seconds: float, min_rounds: int = 4, max_rounds: int = 31) -> int:
+    """
+    Pick the bcrypt cost whose hashing time is closest to target_seconds.
+
+    Each extra round doubles the work, so one timing at a cheap probe cost is
+    extrapolated instead of trying every candidate.
+    """
+    probe_rounds = 8
+    hasher = bcrypt.using(rounds=probe_rounds)
+    elapsed = float("inf")
+    for _ in range(3):
+        started_at = time.perf_counter()
+        hasher.hash("calibration")
+        elapsed = min(elapsed, time.perf_counter() - started_at)
+    rounds = probe_rounds + round(math.log2(target_seconds / max(elapsed, 1e-6)))
+    return max(min_rounds, min(max_rounds, rounds))
+
+
+def configure_password_hashing() -> dict:
+    """
+    Apply the hashing policy from settings to pwd_context and return it.
+
+    Hashes of the other scheme, or with another cost, stay verifiable but are
+    reported by needs_rehash(). Workers calibrate independently, so pin
+    BCRYPT_ROUNDS when they run on mixed hardware.
+    """
+    scheme = settings.PASSWORD_HASH_SCHEME
+    if scheme == "bcrypt":
+        rounds = settings.BCRYPT_ROUNDS or calibrate_bcrypt_rounds(
+            settings.PASSWORD_HASH_TARGET_SECONDS, settings.BCRYPT_MIN_ROUNDS, settings.BCRYPT_MAX_ROUNDS
+        )
+        options = {"bcrypt__default_rounds": rounds, "bcrypt__min_rounds": rounds, "bcrypt__max_rounds": rounds}
+        policy = {"scheme": scheme, "rounds": rounds}
+    elif scheme == "argon2":
+        if not argon2.has_backend():
+            raise RuntimeError("PASSWORD_HASH_SCHEME=argon2 requires the argon2-cffi package")
+        time_cost = settings.ARGON2_TIME_COST
+        options = {
+            "argon2__rounds": time_cost,
+            "argon2__min_rounds": time_cost,
+            "argon2__max_rounds": time_cost,
+            "argon2__memory_cost": settings.ARGON2_MEMORY_COST,
+            "argon2__parallelism": settings.ARGON2_PARALLELISM,
+        }
+        policy = {
+            "scheme": scheme,
+            "time_cost": time_cost,
+            "memory_cost": settings.ARGON2_MEMORY_COST,
+            "parallelism": settings.ARGON2_PARALLELISM,
+        }
+    else:
+        raise ValueError(f"Unsupported PASSWORD_HASH_SCHEME {scheme!r}")
+
+    other = "argon2" if scheme == "bcrypt" else "bcrypt"
+    pwd_context.load({"schemes": [scheme, other], "deprecated": [other], **options})
+    password_policy.clear()
+    password_policy.update(policy)
+    return policy
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -36,23 +140,141 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    """Get the current authenticated user from the JWT token."""
+def hash_refresh_token(token: str) -> str:
+    """SHA-256 digest of a refresh token; tokens are random, so no slow hash is needed."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def create_refresh_token() -> Tuple[str, str]:
+    """Generate an opaque refresh token; returns (token, digest to store)."""
+    token = secrets.token_urlsafe(32)
+    return token, hash_refresh_token(token)
+
+
+def hash_api_key(key: str) -> str:
+    """SHA-256 digest of an API key; keys are random, so no slow hash is needed."""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def create_api_key() -> Tuple[str, str, str]:
+    """Generate an API key; returns (key, prefix, digest to store)."""
+    prefix = secrets.token_hex(6)
+    key = f"{API_KEY_MARKER}{prefix}_{secrets.token_urlsafe(32)}"
+    return key, prefix, hash_api_key(key)
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verify a JWT and return its claims, raising JWTError if it is invalid.
+
+    Successfully verified tokens are cached until their expiry (capped at
+    TOKEN_CACHE_MAX_TTL_SECONDS), so a token that is reused for many requests
+    is only decoded and signature-checked once. Failures are never cached.
+    """
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+
+    claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    ttl = settings.TOKEN_CACHE_MAX_TTL_SECONDS
+    if "exp" in claims:
+        ttl = min(ttl, claims["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(token, claims, ttl=ttl)
+    return claims
+
+
+def _snapshot(user: User) -> dict:
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+
+async def _authenticate_api_key(key: str, db: AsyncSession, credentials_exception: HTTPException) -> dict:
+    """Resolve an API key through the prefix index, or from the cache without a query."""
+    prefix = key[len(API_KEY_MARKER):].partition("_")[0]
+    entry = api_key_cache.get(prefix)
+    if entry is None:
+        row = (await db.execute(
+            select(ApiKey.key_hash, User).join(User, User.id == ApiKey.user_id).where(ApiKey.prefix == prefix)
+        )).first()
+        if row is None:
+            raise credentials_exception
+        entry = (row.key_hash, _snapshot(row.User))
+        api_key_cache.set(prefix, entry)
+    key_hash, snapshot = entry
+    if not hmac.compare_digest(key_hash, hash_api_key(key)):
+        raise credentials_exception
+    return snapshot
+
+
+async def _authenticate(token: str, db: AsyncSession) -> dict:
+    """Resolve a bearer token (JWT or API key) to a column snapshot of its user."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    if token.startswith(API_KEY_MARKER):
+        return await _authenticate_api_key(token, db, credentials_exception)
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
+        payload = decode_access_token(token)
     except JWTError:
         raise credentials_exception
+    username = payload.get("sub")
+    if not isinstance(username, str):
+        raise credentials_exception
     
-    user = db.query(User).filter(User.username == token_data.username).first()
-    if user is None:
+    snapshot = user_cache.get(username)
+    if snapshot is None:
+        user = await db.scalar(select(User).where(User.username == username))
+        if user is None:
+            raise credentials_exception
+        snapshot = _snapshot(user)
+        user_cache.set(username, snapshot)
+    
+    # Tokens issued before the deployment of "uid"/"ver" claims count as version 0
+    await revocations.refresh(db)
+    user_id = snapshot["id"]
+    minimum_version = max(snapshot["token_version"], revocations.minimum_version(user_id))
+    if payload.get("uid", user_id) != user_id or payload.get("ver", 0) < minimum_version:
         raise credentials_exception
+    return snapshot
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> User:
+    """Get the current authenticated user from the JWT token, attached to the request session."""
+    snapshot = await _authenticate(token, db)
+    user = db.identity_map.get(db.identity_key(User, snapshot["id"]))
+    if user is not None:
+        return user
+    # Attach the cached row without a SELECT; it is persistent and can be updated
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
+
+async def get_current_user_for_update(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Get the current authenticated user reloaded from the database.
+
+    For handlers that read credentials or modify the row: the cached snapshot
+    behind get_current_user may predate a change made by another worker.
+    """
+    snapshot = await _authenticate(token, db)
+    user = await db.get(User, snapshot["id"], populate_existing=True)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
+
+
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """Get the id and username of the authenticated user without loading an ORM object."""
+    snapshot = await _authenticate(token, db)
+    return Principal(id=snapshot["id"], username=snapshot["username"])
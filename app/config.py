@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -7,6 +7,68 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-here-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 60
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_MAX_TTL_SECONDS: float = 3600
+    TOKEN_REVOCATION_REFRESH_SECONDS: float = 5
+    TOKEN_REVOCATION_LOOKBACK_SECONDS: float = 30
+    API_KEY_CACHE_SIZE: int = 10000
+    API_KEY_CACHE_TTL_SECONDS: float = 60
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
+    # Password hashing policy; stored hashes that do not match it are rehashed on login
+    PASSWORD_HASH_SCHEME: str = "bcrypt"  # "bcrypt" or "argon2" (requires argon2-cffi)
+    PASSWORD_HASH_TARGET_SECONDS: float = 0.25  # bcrypt cost is calibrated to this at startup
+    BCRYPT_ROUNDS: Optional[int] = None  # pins the bcrypt cost and skips calibration
+    BCRYPT_MIN_ROUNDS: int = 10
+    BCRYPT_MAX_ROUNDS: int = 16
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+
+    # Token-bucket limits on /users/login and /users/register: attempts per window
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "app.ratelimit.MemoryBackend"  # or app.ratelimit.RedisBackend
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    RATE_LIMIT_WINDOW_SECONDS: float = 60
+    RATE_LIMIT_MAX_KEYS: int = 100000  # per-worker bound for MemoryBackend
+    LOGIN_RATE_LIMIT_PER_USERNAME: int = 10
+    LOGIN_RATE_LIMIT_PER_CLIENT: int = 30
+    REGISTRATION_RATE_LIMIT_PER_USERNAME: int = 5
+    REGISTRATION_RATE_LIMIT_PER_CLIENT: int = 10
+
+    # Connection pool (applies to both the sync and async engines)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1  # seconds; -1 never recycles
+    # Test each connection with a round trip at checkout; enable when idle connections are dropped
+    # by the server, a proxy or a failover and DB_POOL_RECYCLE cannot be set below that timeout
+    DB_POOL_PRE_PING: bool = False
+    DB_POOL_USE_LIFO: bool = False
+
+    BATCH_MAX_ITEMS: int = 10000
+    VECTOR_MAX_LENGTH: int = 1000000
+    INGEST_CHUNK_SIZE: int = 1000
+    INGEST_MAX_LINE_BYTES: int = 65536
+    INGEST_MAX_REPORTED_ERRORS: int = 1000
+    EXPRESSION_CACHE_SIZE: int = 1024
+    EXPRESSION_MAX_INSTRUCTIONS: int = 256
+    CALCULATION_CACHE_SIZE: int = 10000
+    CALCULATION_CACHE_TTL_SECONDS: Optional[float] = 300
+    CALCULATION_CACHE_OPERATIONS: List[str] = ["power", "sqrt"]  # [] disables the cache
+    TIMESERIES_MAX_BUCKETS: int = 1000
+    TIMESERIES_CACHE_SIZE: int = 100000
+    TIMESERIES_CACHE_TTL_SECONDS: Optional[float] = 3600
+    # Relative accuracy of distribution quantiles; changing it requires `python -m app.sketches rebuild`
+    SKETCH_RELATIVE_ACCURACY: float = 0.01
+    PROCESS_POOL_WORKERS: int = 2  # 0 evaluates heavy operations in-process
+    OFFLOAD_MAX_PENDING: int = 32
+    OFFLOAD_WAIT_GRACE_SECONDS: float = 5.0
+    OFFLOAD_CPU_BUDGETS: Dict[str, float] = {}  # operations to offload, with their CPU budgets, e.g. {"power": 1.0}
     
     class Config:
         env_file = ".env"
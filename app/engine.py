@@ -0,0 +1,218 @@
+"""
+Calculation engine.
+
+Provides a scalar evaluator used by the single-row endpoints and a vectorized
+NumPy evaluator for multi-row paths (batch imports, bulk recompute). The
+vectorized evaluator never raises for bad inputs; it returns an error code per
+row instead.
+"""
+import math
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+from app.cache import LRUCache
+from app.config import settings
+
+OPERATIONS = ("add", "subtract", "multiply", "divide", "power", "modulus", "sqrt")
+
+# Operations evaluated in the process pool (see app.offload), mapped to their
+# default CPU-time budget in seconds. None of the built-in operations is heavy
+# enough to repay the round trip to another process (a float power is a single
+# C call that SIGPROF cannot interrupt anyway), so offloading is opt-in through
+# OFFLOAD_CPU_BUDGETS.
+HEAVY_OPERATIONS: dict = {}
+
+# Per-row error codes returned by evaluate_batch (0 means success)
+OK = 0
+DIVISION_BY_ZERO = 1
+MODULUS_BY_ZERO = 2
+NEGATIVE_SQRT = 3
+POWER_ERROR = 4
+INVALID_OPERATION = 5
+OVERFLOW = 6
+
+ERROR_MESSAGES = {
+    DIVISION_BY_ZERO: "Division by zero is not allowed",
+    MODULUS_BY_ZERO: "Modulus by zero is not allowed",
+    NEGATIVE_SQRT: "Square root of negative number is not allowed",
+    POWER_ERROR: "Power calculation error: result is not a finite real number",
+    INVALID_OPERATION: "Invalid operation",
+    OVERFLOW: "Result is out of range (not a finite number)",
+}
+
+
+class CalculationError(ValueError):
+    """Raised by the scalar evaluator when an operation cannot be performed."""
+
+
+def calculate(operation: str, operand1: float, operand2: float) -> float:
+    """Evaluate a single operation, raising CalculationError on invalid input."""
+    if operation == "add":
+        return _finite(operand1 + operand2)
+    elif operation == "subtract":
+        return _finite(operand1 - operand2)
+    elif operation == "multiply":
+        return _finite(operand1 * operand2)
+    elif operation == "divide":
+        if operand2 == 0:
+            raise CalculationError(ERROR_MESSAGES[DIVISION_BY_ZERO])
+        return _finite(operand1 / operand2)
+    elif operation == "power":
+        try:
+            result = operand1 ** operand2
+        except (OverflowError, ValueError) as e:
+            raise CalculationError(f"Power calculation error: {str(e)}")
+        except ZeroDivisionError:
+            raise CalculationError(ERROR_MESSAGES[POWER_ERROR])
+        # A negative base with a fractional exponent yields a complex number
+        if isinstance(result, complex):
+            raise CalculationError(ERROR_MESSAGES[POWER_ERROR])
+        return result
+    elif operation == "modulus":
+        if operand2 == 0:
+            raise CalculationError(ERROR_MESSAGES[MODULUS_BY_ZERO])
+        return operand1 % operand2
+    elif operation == "sqrt":
+        # For sqrt, we use operand1 as the value and ignore operand2
+        if operand1 < 0:
+            raise CalculationError(ERROR_MESSAGES[NEGATIVE_SQRT])
+        return math.sqrt(operand1)
+    else:
+        raise CalculationError(ERROR_MESSAGES[INVALID_OPERATION])
+
+
+def _finite(result: float) -> float:
+    """Reject results that overflowed to ±inf (they cannot be stored or serialized)."""
+    if not math.isfinite(result):
+        raise CalculationError(ERROR_MESSAGES[OVERFLOW])
+    return result
+
+
+# Memoized outcomes of calculate(): (result, None) or (None, error message)
+result_cache = LRUCache(
+    maxsize=settings.CALCULATION_CACHE_SIZE,
+    ttl=settings.CALCULATION_CACHE_TTL_SECONDS
+)
+
+
+def calculate_cached(
+    operation: str,
+    operand1: float,
+    operand2: float,
+    compute: Callable[[str, float, float], float] = calculate,
+) -> float:
+    """
+    ``compute`` (calculate() by default) behind the result cache.
+
+    Only operations listed in CALCULATION_CACHE_OPERATIONS are cached. Errors
+    are cached too, so a repeated division by zero is answered from memory.
+    """
+    if operation not in settings.CALCULATION_CACHE_OPERATIONS:
+        return compute(operation, operand1, operand2)
+
+    key = (operation, operand1, operand2)
+    outcome = result_cache.get(key)
+    if outcome is None:
+        try:
+            outcome = (compute(operation, operand1, operand2), None)
+        except CalculationError as e:
+            outcome = (None, str(e))
+        result_cache.set(key, outcome)
+
+    result, error = outcome
+    if error is not None:
+        raise CalculationError(error)
+    return result
+
+
+@dataclass
+class BatchEvaluation:
+    """Result of a vectorized evaluation: values plus a per-row error code."""
+    results: np.ndarray
+    errors: np.ndarray
+
+    @property
+    def ok(self) -> np.ndarray:
+        """Boolean mask of rows that evaluated successfully."""
+        return self.errors == OK
+
+    def error_message(self, index: int) -> Optional[str]:
+        """Human readable error for a row, or None if it succeeded."""
+        return ERROR_MESSAGES.get(int(self.errors[index]))
+
+
+def evaluate_batch(
+    operations: Sequence[str],
+    operand1: Sequence[float],
+    operand2: Sequence[float],
+) -> BatchEvaluation:
+    """
+    Evaluate a column of (operation, operand1, operand2) triples.
+
+    Rows are grouped by operation and each group is computed with a single
+    NumPy ufunc call. Rows that would fail in the scalar path (division or
+    modulus by zero, negative sqrt, non-finite power, overflow) are flagged
+    in ``errors`` and their result is NaN.
+    """
+    ops = np.asarray(operations, dtype=object)
+    a = np.asarray(operand1, dtype=np.float64)
+    b = np.asarray(operand2, dtype=np.float64)
+    if not (ops.shape == a.shape == b.shape) or ops.ndim != 1:
+        raise ValueError("operations, operand1 and operand2 must be 1-D and of equal length")
+
+    results = np.full(a.shape, np.nan, dtype=np.float64)
+    errors = np.full(a.shape, INVALID_OPERATION, dtype=np.uint8)
+
+    for operation in OPERATIONS:
+        mask = ops == operation
+        if not mask.any():
+            continue
+        results[mask], errors[mask] = _apply(operation, a[mask], b[mask])
+
+    return BatchEvaluation(results=results, errors=errors)
+
+
+def evaluate_vector(operation: str, operand1: Sequence[float], operand2: Sequence[float]) -> BatchEvaluation:
+    """Apply one operation element-wise to two equal-length arrays."""
+    a = np.asarray(operand1, dtype=np.float64)
+    b = np.asarray(operand2, dtype=np.float64)
+    if a.shape != b.shape:
+        raise ValueError("operand1 and operand2 must have the same shape")
+    if operation not in OPERATIONS:
+        return BatchEvaluation(
+            results=np.full(a.shape, np.nan, dtype=np.float64),
+            errors=np.full(a.shape, INVALID_OPERATION, dtype=np.uint8)
+        )
+    results, errors = _apply(operation, a, b)
+    return BatchEvaluation(results=results, errors=errors)
+
+
+def _apply(operation: str, x: np.ndarray, y: np.ndarray):
+    """Compute one operation with a single ufunc call; returns (values, error codes)."""
+    error = np.zeros(x.shape, dtype=np.uint8)
+    with np.errstate(all="ignore"):
+        if operation == "add":
+            value = np.add(x, y)
+        elif operation == "subtract":
+            value = np.subtract(x, y)
+        elif operation == "multiply":
+            value = np.multiply(x, y)
+        elif operation == "divide":
+            error[y == 0] = DIVISION_BY_ZERO
+            value = np.divide(x, y)
+        elif operation == "power":
+            value = np.power(x, y)
+            error[~np.isfinite(value)] = POWER_ERROR
+        elif operation == "modulus":
+            error[y == 0] = MODULUS_BY_ZERO
+            value = np.mod(x, y)
+        else:  # sqrt
+            error[x < 0] = NEGATIVE_SQRT
+            value = np.sqrt(x)
+        # Any other non-finite result overflowed (e.g. 1e308 * 10)
+        error[(error == OK) & ~np.isfinite(value)] = OVERFLOW
+
+    value[error != OK] = np.nan
+    return value, error
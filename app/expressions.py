@@ -0,0 +1,234 @@
+"""
+Infix expression compiler.
+
+Expressions such as ``(a+b)^2 / sqrt(c)`` are parsed once into a postfix
+evaluation plan made only of the calculator's existing operations. Compiled
+plans are kept in a bounded LRU keyed by the normalized expression text, so a
+repeated formula skips tokenizing and parsing entirely.
+"""
+import math
+import re
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Tuple
+
+from app import offload
+from app.cache import LRUCache
+from app.config import settings
+from app.engine import calculate_cached
+
+BINARY_OPERATORS = {
+    "+": "add",
+    "-": "subtract",
+    "*": "multiply",
+    "/": "divide",
+    "^": "power",
+    "%": "modulus",
+}
+FUNCTIONS = {"sqrt"}
+
+_TOKEN_RE = re.compile(r"\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?|[A-Za-z_]\w*|[-+*/^%()]")
+
+# Plan instructions: ("const", value), ("load", name) or ("op", operation)
+Instruction = Tuple[str, object]
+
+
+class ExpressionError(ValueError):
+    """Raised when an expression cannot be parsed or evaluated."""
+
+
+@dataclass(frozen=True)
+class CompiledExpression:
+    """A validated postfix evaluation plan for one expression."""
+    expression: str
+    instructions: Tuple[Instruction, ...]
+    variables: FrozenSet[str]
+
+    @property
+    def operations(self) -> FrozenSet[str]:
+        """The calculator operations this plan uses."""
+        return frozenset(arg for kind, arg in self.instructions if kind == "op")
+
+    def evaluate(self, variables: Dict[str, float]) -> float:
+        """
+        Run the plan; raises ExpressionError or engine.CalculationError.
+
+        Heavy operations go through the process pool (offload.calculate), so
+        this blocks and may raise offload.OffloadUnavailable when they are used.
+        """
+        missing = self.variables - variables.keys()
+        if missing:
+            raise ExpressionError(f"Missing value for variable(s): {', '.join(sorted(missing))}")
+
+        stack: List[float] = []
+        for kind, arg in self.instructions:
+            if kind == "const":
+                stack.append(arg)
+            elif kind == "load":
+                stack.append(float(variables[arg]))
+            elif arg == "sqrt":
+                stack.append(calculate_cached("sqrt", stack.pop(), 0, compute=offload.calculate))
+            else:
+                right = stack.pop()
+                left = stack.pop()
+                stack.append(calculate_cached(arg, left, right, compute=offload.calculate))
+        # A bare variable can carry inf/NaN straight through without an operation
+        if not math.isfinite(stack[0]):
+            raise ExpressionError("Result is out of range (not a finite number)")
+        return stack[0]
+
+
+def normalize_expression(text: str) -> str:
+    """Canonical form used as the cache key: tokens separated by single spaces."""
+    return " ".join(_tokenize(text))
+
+
+def _tokenize(text: str) -> List[str]:
+    tokens = []
+    position = 0
+    while position < len(text):
+        if text[position].isspace():
+            position += 1
+            continue
+        match = _TOKEN_RE.match(text, position)
+        if not match:
+            raise ExpressionError(f"Unexpected character {text[position]!r} at position {position}")
+        tokens.append(match.group())
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive-descent parser emitting postfix instructions.
+
+    Grammar (lowest to highest precedence):
+        expr   := term (('+' | '-') term)*
+        term   := unary (('*' | '/' | '%') unary)*
+        unary  := ('-' | '+') unary | power
+        power  := atom ('^' unary)?
+        atom   := number | name | 'sqrt' '(' expr ')' | '(' expr ')'
+    """
+
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self.position = 0
+        self.instructions: List[Instruction] = []
+        self.variables = set()
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def advance(self) -> str:
+        token = self.peek()
+        if token is None:
+            raise ExpressionError("Unexpected end of expression")
+        self.position += 1
+        return token
+
+    def expect(self, token: str) -> None:
+        if self.advance() != token:
+            raise ExpressionError(f"Expected {token!r}")
+
+    def parse(self) -> None:
+        if not self.tokens:
+            raise ExpressionError("Expression is empty")
+        self.expr()
+        if self.peek() is not None:
+            raise ExpressionError(f"Unexpected token {self.peek()!r}")
+
+    def expr(self) -> None:
+        self.term()
+        while self.peek() in ("+", "-"):
+            operator = self.advance()
+            self.term()
+            self.instructions.append(("op", BINARY_OPERATORS[operator]))
+
+    def term(self) -> None:
+        self.unary()
+        while self.peek() in ("*", "/", "%"):
+            operator = self.advance()
+            self.unary()
+            self.instructions.append(("op", BINARY_OPERATORS[operator]))
+
+    def unary(self) -> None:
+        if self.peek() == "-":
+            self.advance()
+            # Negation is compiled as 0 - x so plans only use existing operations
+            self.instructions.append(("const", 0.0))
+            self.unary()
+            self.instructions.append(("op", "subtract"))
+        elif self.peek() == "+":
+            self.advance()
+            self.unary()
+        else:
+            self.power()
+
+    def power(self) -> None:
+        self.atom()
+        if self.peek() == "^":
+            self.advance()
+            self.unary()  # right associative: a^b^c == a^(b^c)
+            self.instructions.append(("op", "power"))
+
+    def atom(self) -> None:
+        token = self.advance()
+        if token == "(":
+            self.expr()
+            self.expect(")")
+        elif token in FUNCTIONS:
+            self.expect("(")
+            self.expr()
+            self.expect(")")
+            self.instructions.append(("op", token))
+        elif token[0].isdigit() or token[0] == ".":
+            value = float(token)
+            if not math.isfinite(value):
+                raise ExpressionError(f"Numeric literal {token!r} is out of range")
+            self.instructions.append(("const", value))
+        elif token[0].isalpha() or token[0] == "_":
+            self.instructions.append(("load", token))
+            self.variables.add(token)
+        else:
+            raise ExpressionError(f"Unexpected token {token!r}")
+
+
+def _validate(instructions: List[Instruction]) -> None:
+    """Check the plan leaves exactly one value on the stack and never underflows."""
+    if len(instructions) > settings.EXPRESSION_MAX_INSTRUCTIONS:
+        raise ExpressionError("Expression is too complex")
+    depth = 0
+    for kind, arg in instructions:
+        if kind in ("const", "load"):
+            depth += 1
+        elif arg != "sqrt":
+            depth -= 1
+        if depth < 1:
+            raise ExpressionError("Malformed expression")
+    if depth != 1:
+        raise ExpressionError("Malformed expression")
+
+
+plan_cache = LRUCache(maxsize=settings.EXPRESSION_CACHE_SIZE)
+
+
+def compile_expression(text: str) -> CompiledExpression:
+    """Return the compiled plan for an expression, using the plan cache."""
+    tokens = _tokenize(text)
+    normalized = " ".join(tokens)
+    plan = plan_cache.get(normalized)
+    if plan is not None:
+        return plan
+
+    parser = _Parser(tokens)
+    try:
+        parser.parse()
+    except RecursionError:
+        raise ExpressionError("Expression is nested too deeply")
+    _validate(parser.instructions)
+    plan = CompiledExpression(
+        expression=normalized,
+        instructions=tuple(parser.instructions),
+        variables=frozenset(parser.variables),
+    )
+    plan_cache.set(normalized, plan)
+    return plan
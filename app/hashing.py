@@ -0,0 +1,132 @@
+"""
+Dedicated executor for password hashing.
+
+bcrypt costs hundreds of milliseconds of CPU per call. Running it on the
+shared AnyIO thread pool lets a login storm starve every other route, so
+hashing gets its own small set of threads fed by a bounded priority queue:
+logins are served before password changes, registrations and background
+rehashes, and once the queue is full new work fails fast with HasherBusy
+(mapped to 503).
+"""
+import asyncio
+import itertools
+import queue
+import threading
+import time
+from typing import Callable, List
+
+from app.auth import get_password_hash, verify_password
+from app.config import settings
+from app.metrics import Histogram
+
+# Priorities: lower values are served first
+LOGIN = 0
+PASSWORD_CHANGE = 1
+REGISTRATION = 2
+REHASH = 3
+
+
+class HasherBusy(Exception):
+    """The hashing queue is full."""
+
+
+def _resolve(future: asyncio.Future, result=None, error: BaseException = None) -> None:
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class PasswordHasher:
+    """Fixed-size pool of hashing threads with a bounded priority queue."""
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._sequence = itertools.count()  # FIFO order within a priority
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait = Histogram()
+        self.latency = Histogram()
+
+    def _ensure_started(self) -> None:
+        if self._threads:
+            return
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"password-hasher-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            _, _, enqueued_at, func, args, loop, future = self._queue.get()
+            if func is None:
+                return
+            started_at = time.perf_counter()
+            self.queue_wait.observe(started_at - enqueued_at)
+            result, error = None, None
+            try:
+                result = func(*args)
+            except Exception as e:
+                error = e
+            self.latency.observe(time.perf_counter() - started_at)
+            with self._lock:
+                self.completed += 1
+            try:
+                loop.call_soon_threadsafe(_resolve, future, result, error)
+            except RuntimeError:
+                pass  # the caller's event loop is already closed
+
+    async def run(self, func: Callable, *args, priority: int = REGISTRATION):
+        """Run func(*args) on a hashing thread, or raise HasherBusy if the queue is full."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self._queue.qsize() >= self.max_queue:
+                self.rejected += 1
+                raise HasherBusy("Authentication service is busy, please retry")
+            self._ensure_started()
+            self._queue.put((priority, next(self._sequence), time.perf_counter(), func, args, loop, future))
+        return await future
+
+    async def verify(self, plain_password: str, hashed_password: str, priority: int = LOGIN) -> bool:
+        """Verify a password on the hashing pool."""
+        return await self.run(verify_password, plain_password, hashed_password, priority=priority)
+
+    async def hash(self, password: str, priority: int = REGISTRATION) -> str:
+        """Hash a password on the hashing pool."""
+        return await self.run(get_password_hash, password, priority=priority)
+
+    def shutdown(self) -> None:
+        """Stop the hashing threads after queued work drains; they restart on next use."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+            for _ in threads:
+                # Sentinels sort after all real work
+                self._queue.put((float("inf"), next(self._sequence), 0.0, None, (), None, None))
+        for thread in threads:
+            thread.join(timeout=5)
+
+    def stats(self) -> dict:
+        """Snapshot of queue length, throughput and latency."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queue_length": self._queue.qsize(),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_wait_seconds": self.queue_wait.snapshot(),
+                "hash_latency_seconds": self.latency.snapshot(),
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
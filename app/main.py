@@ -1,13 +1,25 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from app.database import engine, Base
-from app.routers import users, calculations
+from sqlalchemy import inspect
+from app.database import engine, async_engine, Base, pool_stats
+from app.routers import users, calculations, expressions
+from app.engine import result_cache
+from app import offload
+from app.hashing import HasherBusy, password_hasher
+from app.ratelimit import RateLimitExceeded, limiter
+from app.revocation import revocations
+from app.auth import api_key_cache, configure_password_hashing, password_policy, token_cache, user_cache
+from app.expressions import plan_cache
+from app.timeseries import bucket_cache
+import math
 import os
 from pathlib import Path
 
-# Create database tables only if not in test mode
-if os.getenv("TESTING") != "true":
+# Create database tables only if not in test mode, and only for databases not
+# managed by Alembic: there new tables come from migrations, with their backfills
+if os.getenv("TESTING") != "true" and not inspect(engine).has_table("alembic_version"):
     Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
@@ -26,6 +38,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination and revalidation headers must be readable by cross-origin pages
+    expose_headers=["Link", "X-Next-Cursor", "X-Prev-Cursor", "ETag"],
 )
 
 # Mount static files
@@ -33,9 +47,48 @@ frontend_dir = Path(__file__).parent.parent / "frontend"
 if frontend_dir.exists():
     app.mount("/static", StaticFiles(directory=str(frontend_dir)), name="static")
 
+@app.on_event("startup")
+def calibrate_password_hashing():
+    """Pick the password hashing cost for this hardware before serving logins."""
+    configure_password_hashing()
+
+
+@app.on_event("shutdown")
+def shutdown_offload_pool():
+    """Stop process-pool workers used for heavy calculations."""
+    offload.pool.shutdown()
+
+
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    """Stop the password hashing threads."""
+    password_hasher.shutdown()
+
+
+@app.exception_handler(HasherBusy)
+async def hasher_busy_handler(request: Request, exc: HasherBusy):
+    """Fail fast when the password hashing queue is full."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
+    """Turn away throttled credential attempts before any hashing."""
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
 # Include routers
 app.include_router(users.router)
 app.include_router(calculations.router)
+app.include_router(expressions.router)
 
 
 @app.get("/")
@@ -52,3 +105,25 @@ def root():
 def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+@app.get("/metrics")
+def metrics():
+    """In-process cache and resource metrics for this worker."""
+    return {
+        "calculation_cache": result_cache.stats(),
+        "expression_plan_cache": plan_cache.stats(),
+        "timeseries_cache": bucket_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "api_key_cache": api_key_cache.stats(),
+        "token_revocations": revocations.stats(),
+        "offload_pool": offload.pool.stats(),
+        "password_hasher": password_hasher.stats(),
+        "password_policy": dict(password_policy),
+        "rate_limiter": limiter.stats(),
+        "database_pool": {
+            "async": pool_stats(async_engine),
+            "sync": pool_stats(engine),
+        },
+    }
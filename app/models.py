@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON, LargeBinary, Boolean, Index, SmallInteger
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -11,10 +11,19 @@ class User(Base):
     username = Column(String, unique=True, index=True, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
+    token_version = Column(Integer, default=0, nullable=False)  # stamped into JWTs as "ver"
+    tokens_revoked_at = Column(DateTime, nullable=True, index=True)  # last token_version bump
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationship to calculations
     calculations = relationship("Calculation", back_populates="user", cascade="all, delete-orphan")
+    expressions = relationship("ExpressionEvaluation", back_populates="user", cascade="all, delete-orphan")
+    vector_calculations = relationship("VectorCalculation", back_populates="user", cascade="all, delete-orphan")
+    refresh_tokens = relationship("RefreshToken", back_populates="user", cascade="all, delete-orphan")
+    api_keys = relationship("ApiKey", back_populates="user", cascade="all, delete-orphan")
+    calculation_rollups = relationship("CalculationRollup", cascade="all, delete-orphan")
+    calculation_sketch_buckets = relationship("CalculationSketchBucket", cascade="all, delete-orphan")
+    calculation_version = relationship("CalculationVersion", cascade="all, delete-orphan")
 
 
 class Calculation(Base):
@@ -30,3 +39,106 @@ class Calculation(Base):
     
     # Relationship to user
     user = relationship("User", back_populates="calculations")
+
+    # Matched to the hot queries; keep in step with migrations/versions/
+    __table_args__ = (
+        # History pages (both directions), recent rows and time buckets
+        Index("ix_calculations_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Operation filters and per-operation grouping, still in history order
+        Index("ix_calculations_user_id_operation", "user_id", "operation", "created_at", "id"),
+        # Covers count/sum/max per operation (rollup rebuild) without touching the table
+        Index("ix_calculations_user_id_operation_operands", "user_id", "operation", "operand1", "operand2", "created_at"),
+        # Result ranges and history sorted by result
+        Index("ix_calculations_user_id_result_id", "user_id", "result", "id"),
+    )
+
+
+class CalculationRollup(Base):
+    """Per-user, per-operation totals maintained alongside calculations (see app.rollup)."""
+    __tablename__ = "calculation_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    operation = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    sum_operand1 = Column(Float, nullable=False, default=0.0)
+    sum_operand2 = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class CalculationVersion(Base):
+    """Per-user change counter of calculations, bumped on every write (see app.versions)."""
+    __tablename__ = "calculation_versions"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class CalculationSketchBucket(Base):
+    """One non-empty log-histogram bucket of a user's results or operands (see app.sketches)."""
+    __tablename__ = "calculation_sketch_buckets"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    operation = Column(String, primary_key=True)
+    field = Column(SmallInteger, primary_key=True)  # 0 = result, 1 = operand1, 2 = operand2
+    sign = Column(SmallInteger, primary_key=True)  # -1, 0 (zero bucket) or 1
+    bucket = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class ExpressionEvaluation(Base):
+    __tablename__ = "expression_evaluations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    expression = Column(String, nullable=False)  # normalized infix text
+    variables = Column(JSON, nullable=False, default=dict)
+    result = Column(Float, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationship to user
+    user = relationship("User", back_populates="expressions")
+
+
+class VectorCalculation(Base):
+    __tablename__ = "vector_calculations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    operation = Column(String, nullable=False)
+    length = Column(Integer, nullable=False)
+    # Arrays are stored with app.arrays.pack_array (float64 + dtype/shape header)
+    operand1 = Column(LargeBinary, nullable=False)
+    operand2 = Column(LargeBinary, nullable=False)
+    result = Column(LargeBinary, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationship to user
+    user = relationship("User", back_populates="vector_calculations")
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)  # SHA-256 hex of the opaque token
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False)
+    revoked = Column(Boolean, default=False, nullable=False)  # set when rotated or revoked
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationship to user
+    user = relationship("User", back_populates="refresh_tokens")
+
+
+class ApiKey(Base):
+    __tablename__ = "api_keys"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    prefix = Column(String(16), unique=True, index=True, nullable=False)  # public part, used for lookup
+    key_hash = Column(String(64), nullable=False)  # SHA-256 hex of the full key
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationship to user
+    user = relationship("User", back_populates="api_keys")
@@ -0,0 +1,162 @@
+"""
+Process-pool execution tier for CPU-heavy operations.
+
+Operations listed in ``OFFLOAD_CPU_BUDGETS`` (or ``engine.HEAVY_OPERATIONS``,
+empty for the built-in operations) are evaluated in a separate process so they
+do not hold the GIL of the worker serving other requests.
+Each task runs under a CPU-time budget enforced inside the child process, and
+the number of in-flight tasks is capped: once the cap is reached new work is
+rejected immediately instead of queueing behind it.
+"""
+import multiprocessing
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Optional, Tuple
+
+from app import engine
+from app.config import settings
+
+
+class OffloadUnavailable(Exception):
+    """The process pool is saturated or did not answer in time (maps to 503)."""
+
+
+class CPUBudgetExceeded(engine.CalculationError):
+    """A heavy calculation used more CPU time than its budget allows."""
+
+
+class _BudgetSignal(BaseException):
+    """Raised inside the child process by the SIGPROF handler."""
+
+
+def _on_budget_expired(signum, frame):
+    raise _BudgetSignal()
+
+
+def _run_with_budget(func: Callable, args: Tuple, budget: float) -> Tuple[str, object]:
+    """
+    Child-process entry point.
+
+    ITIMER_PROF counts CPU time consumed by the process, so the budget is not
+    affected by time spent waiting in the pool queue.
+    """
+    previous = signal.signal(signal.SIGPROF, _on_budget_expired)
+    signal.setitimer(signal.ITIMER_PROF, budget)
+    try:
+        return "ok", func(*args)
+    except engine.CalculationError as e:
+        return "error", str(e)
+    except _BudgetSignal:
+        return "budget", None
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, previous)
+
+
+class OffloadPool:
+    """Lazily started process pool with a bounded number of pending tasks."""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.budget_exceeded = 0
+        self.timeouts = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    def submit(self, func: Callable, args: Tuple, budget: float):
+        """Submit a task or raise OffloadUnavailable if too much work is pending."""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise OffloadUnavailable("Calculation capacity exhausted, please retry")
+            self.pending += 1
+            self.submitted += 1
+            try:
+                future = self._get_executor().submit(_run_with_budget, func, args, budget)
+            except Exception:
+                self.pending -= 1
+                raise
+        future.add_done_callback(self._release)
+        return future
+
+    def unpack(self, outcome: Tuple[str, object]) -> float:
+        """Turn a child-process outcome into a result or an engine error."""
+        status, value = outcome
+        if status == "ok":
+            return value
+        if status == "budget":
+            with self._lock:
+                self.budget_exceeded += 1
+            raise CPUBudgetExceeded("Calculation exceeded its CPU time budget")
+        raise engine.CalculationError(value)
+
+    def run(self, func: Callable, args: Tuple, budget: float) -> float:
+        """Run a task in the pool and block the calling thread until it finishes."""
+        future = self.submit(func, args, budget)
+        try:
+            outcome = future.result(timeout=budget + settings.OFFLOAD_WAIT_GRACE_SECONDS)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise OffloadUnavailable("Calculation timed out waiting for capacity, please retry")
+        return self.unpack(outcome)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes; the pool restarts lazily on next use."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """Snapshot of the pool metrics."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "budget_exceeded": self.budget_exceeded,
+                "timeouts": self.timeouts,
+            }
+
+
+pool = OffloadPool(
+    workers=settings.PROCESS_POOL_WORKERS,
+    max_pending=settings.OFFLOAD_MAX_PENDING
+)
+
+
+def _budget(operation: str) -> Optional[float]:
+    return settings.OFFLOAD_CPU_BUDGETS.get(operation, engine.HEAVY_OPERATIONS.get(operation))
+
+
+def is_heavy(operation: str) -> bool:
+    """Whether calculate() would send this operation to the process pool."""
+    return pool.workers > 0 and _budget(operation) is not None
+
+
+def calculate(operation: str, operand1: float, operand2: float) -> float:
+    """engine.calculate, evaluated in the process pool for heavy operations."""
+    if not is_heavy(operation):
+        return engine.calculate(operation, operand1, operand2)
+    return pool.run(engine.calculate, (operation, operand1, operand2), _budget(operation))
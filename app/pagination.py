@@ -0,0 +1,61 @@
+"""
+Keyset (cursor) pagination for calculation history.
+
+Pages are ordered by (sort key, id) and continue from the key of the last
+(or first) row of the previous page, so every page is the same bounded range
+scan of a (user_id, sort key, id) index however deep it is, and rows written
+or deleted between requests neither repeat nor go missing.
+
+Cursors are opaque to clients: URL-safe base64 of the direction, the sort
+they were issued for and the key of the row to continue from.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import NamedTuple, Optional, Union
+
+NEXT = "n"
+PREV = "p"
+
+SORT_KEYS = ("created_at", "result")
+ORDERS = ("asc", "desc")
+
+
+class Cursor(NamedTuple):
+    """Continue after (NEXT) or before (PREV) the row with key (value, id) in the given sort."""
+    direction: str
+    sort: str
+    order: str
+    value: Union[datetime, float]
+    id: int
+
+
+def encode_cursor(direction: str, sort: str, order: str, value: Union[datetime, float], row_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([direction, sort, order, value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Cursor:
+    """Parse a cursor; raises ValueError for anything this module did not produce."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        direction, sort, order, value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if direction not in (NEXT, PREV) or sort not in SORT_KEYS or order not in ORDERS:
+            raise ValueError("Invalid cursor")
+        value = datetime.fromisoformat(value) if sort == "created_at" else float(value)
+        return Cursor(direction, sort, order, value, int(row_id))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def link_header(url, next_cursor: Optional[str], prev_cursor: Optional[str]) -> Optional[str]:
+    """RFC 8288 Link header pointing at the neighbouring pages of url (a starlette URL)."""
+    links = [
+        f'<{url.include_query_params(cursor=cursor)}>; rel="{rel}"'
+        for rel, cursor in (("next", next_cursor), ("prev", prev_cursor))
+        if cursor is not None
+    ]
+    return ", ".join(links) or None
@@ -0,0 +1,157 @@
+"""
+Rate limiting for the credential endpoints.
+
+Every login attempt costs a bcrypt verify, so credential-stuffing traffic is
+turned away with 429 before any hashing or database work. Attempts are
+counted in token buckets keyed both by username and by client address:
+``capacity`` attempts are allowed in a burst and refill evenly over
+``RATE_LIMIT_WINDOW_SECONDS``.
+
+Bucket state lives in a backend selected by dotted path in
+RATE_LIMIT_BACKEND. MemoryBackend is per worker; RedisBackend (requires the
+``redis`` package) shares state between workers and hosts.
+"""
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from app.config import settings
+
+
+class RateLimitExceeded(Exception):
+    """Too many attempts; retry_after is the wait in seconds (maps to 429)."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Too many attempts, please retry later")
+        self.retry_after = retry_after
+
+
+class MemoryBackend:
+    """In-process token buckets, bounded to ``max_keys`` least recently used keys."""
+
+    def __init__(self, max_keys: int = None):
+        self.max_keys = max_keys or settings.RATE_LIMIT_MAX_KEYS
+        # key -> (tokens, updated_at)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def acquire(self, key: str, capacity: int, period: float) -> float:
+        """Take one token; returns 0 on success or the seconds until one is available."""
+        rate = capacity / period
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def reset(self) -> None:
+        """Forget every bucket."""
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+_REDIS_TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """Token buckets shared through Redis; each attempt is one atomic script call."""
+
+    def __init__(self, url: str = None):
+        import redis.asyncio  # optional dependency, only needed for this backend
+
+        self._client = redis.asyncio.from_url(url or settings.RATE_LIMIT_REDIS_URL)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def acquire(self, key: str, capacity: int, period: float) -> float:
+        """Take one token; returns 0 on success or the seconds until one is available."""
+        wait = await self._script(keys=[f"ratelimit:{key}"], args=[capacity, capacity / period])
+        return float(wait)
+
+    def reset(self) -> None:
+        """Buckets expire on their own in Redis."""
+
+
+def load_backend(path: str):
+    """Instantiate a backend from a dotted path such as ``app.ratelimit.MemoryBackend``."""
+    module_name, _, class_name = path.rpartition(".")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class RateLimiter:
+    """Checks attempts against per-username and per-client buckets."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    async def check(self, scope: str, limits: Dict[str, Tuple[str, int]]) -> None:
+        """
+        Count one attempt in every bucket, raising RateLimitExceeded if any is empty.
+
+        ``limits`` maps a bucket kind (e.g. "user") to (identifier, capacity).
+        """
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        wait = 0.0
+        for kind, (identifier, capacity) in limits.items():
+            key = f"{scope}:{kind}:{identifier}"
+            wait = max(wait, await self.backend.acquire(key, capacity, settings.RATE_LIMIT_WINDOW_SECONDS))
+        with self._lock:
+            if wait > 0:
+                self.rejected += 1
+            else:
+                self.allowed += 1
+        if wait > 0:
+            raise RateLimitExceeded(wait)
+
+    def reset(self) -> None:
+        """Forget every bucket and reset the counters."""
+        self.backend.reset()
+        with self._lock:
+            self.allowed = self.rejected = 0
+
+    def stats(self) -> dict:
+        """Snapshot of the limiter metrics."""
+        with self._lock:
+            return {
+                "backend": type(self.backend).__name__,
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+            }
+
+
+limiter = RateLimiter(load_backend(settings.RATE_LIMIT_BACKEND))
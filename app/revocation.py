@@ -0,0 +1,95 @@
+"""
+Access-token revocation without a per-request query.
+
+Every user has a ``token_version`` that is stamped into the JWTs issued to
+them (``ver`` claim) and bumped when their tokens must die, e.g. on a
+password change. Each worker keeps a small map of user id -> minimum valid
+version for users revoked within the access-token lifetime. The map is
+refreshed incrementally, at most every TOKEN_REVOCATION_REFRESH_SECONDS,
+by an indexed query for rows whose ``tokens_revoked_at`` moved past the last
+watermark, so checking a token is one dict lookup.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import User
+
+
+class TokenRevocations:
+    """Per-worker map of the minimum token version accepted for recently revoked users."""
+
+    def __init__(self, refresh_interval: float, lookback: float):
+        self.refresh_interval = refresh_interval
+        # Re-read a margin before the watermark to cover clock skew and late commits
+        self.lookback = timedelta(seconds=lookback)
+        self._versions: Dict[int, int] = {}
+        self._revoked_at: Dict[int, datetime] = {}
+        self._watermark = None
+        self._next_refresh = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self.refreshes = 0
+
+    def minimum_version(self, user_id: int) -> int:
+        """Lowest token version still accepted for a user (0 if never revoked)."""
+        return self._versions.get(user_id, 0)
+
+    def revoke(self, user_id: int, version: int, revoked_at: datetime = None) -> None:
+        """Reject tokens of user_id older than version in this worker."""
+        with self._lock:
+            if version > self._versions.get(user_id, 0):
+                self._versions[user_id] = version
+                self._revoked_at[user_id] = revoked_at or datetime.utcnow()
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Pull revocations made by other workers, if the refresh interval elapsed."""
+        with self._lock:
+            if self._refreshing or time.monotonic() < self._next_refresh:
+                return
+            self._refreshing = True
+        try:
+            now = datetime.utcnow()
+            # Older revocations only affect tokens that have expired anyway
+            horizon = now - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+            since = horizon if self._watermark is None else max(horizon, self._watermark - self.lookback)
+            rows = await db.execute(
+                select(User.id, User.token_version, User.tokens_revoked_at).where(User.tokens_revoked_at > since)
+            )
+            for user_id, version, revoked_at in rows:
+                self.revoke(user_id, version, revoked_at)
+            with self._lock:
+                for user_id in [uid for uid, at in self._revoked_at.items() if at <= horizon]:
+                    del self._versions[user_id]
+                    del self._revoked_at[user_id]
+                self._watermark = now
+                self._next_refresh = time.monotonic() + self.refresh_interval
+                self.refreshes += 1
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def clear(self) -> None:
+        """Forget every revocation and force a full refresh on next use."""
+        with self._lock:
+            self._versions.clear()
+            self._revoked_at.clear()
+            self._watermark = None
+            self._next_refresh = 0.0
+            self.refreshes = 0
+
+    def stats(self) -> dict:
+        """Snapshot of the map size and refresh count."""
+        with self._lock:
+            return {"revoked_users": len(self._versions), "refreshes": self.refreshes}
+
+
+revocations = TokenRevocations(
+    refresh_interval=settings.TOKEN_REVOCATION_REFRESH_SECONDS,
+    lookback=settings.TOKEN_REVOCATION_LOOKBACK_SECONDS
+)
@@ -0,0 +1,149 @@
+"""
+Per-user statistics rollup.
+
+``calculation_rollups`` holds one row per (user_id, operation) with the
+count and operand sums of that user's calculations. Every write path applies
+its delta in the same transaction as the calculation change, so the stats
+endpoint reads O(number of operations) rows regardless of history size.
+
+Rebuild from scratch (e.g. after a manual data fix) with::
+
+    python -m app.rollup rebuild [--user-id ID]
+"""
+import argparse
+import asyncio
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import versions
+from app.models import Calculation, CalculationRollup
+
+# operation -> (count, sum of operand1, sum of operand2)
+Deltas = Dict[str, Tuple[int, float, float]]
+
+
+def collect_deltas(rows: Iterable[Tuple[str, float, float]], sign: int = 1) -> Deltas:
+    """Sum (operation, operand1, operand2) rows into per-operation deltas."""
+    deltas: Deltas = {}
+    for operation, operand1, operand2 in rows:
+        count, sum1, sum2 = deltas.get(operation, (0, 0.0, 0.0))
+        deltas[operation] = (count + sign, sum1 + sign * operand1, sum2 + sign * operand2)
+    return deltas
+
+
+def merge_deltas(*parts: Deltas) -> Deltas:
+    """Combine several deltas, e.g. the removal and re-insertion of an edited row."""
+    merged: Deltas = {}
+    for part in parts:
+        for operation, (count, sum1, sum2) in part.items():
+            total = merged.get(operation, (0, 0.0, 0.0))
+            merged[operation] = (total[0] + count, total[1] + sum1, total[2] + sum2)
+    return merged
+
+
+def _accumulate(column, excluded_column, count_after):
+    # Reset the sum when the count drops to zero so float drift does not linger
+    return case((count_after == 0, 0.0), else_=column + excluded_column)
+
+
+async def apply_deltas(db: AsyncSession, user_id: int, deltas: Deltas) -> None:
+    """Add deltas to the user's rollup rows (caller commits), as one upsert where supported."""
+    deltas = {operation: delta for operation, delta in deltas.items() if delta != (0, 0.0, 0.0)}
+    if not deltas:
+        return
+    now = datetime.utcnow()
+    rows = [
+        {
+            "user_id": user_id,
+            "operation": operation,
+            "count": count,
+            "sum_operand1": sum1,
+            "sum_operand2": sum2,
+            "updated_at": now,
+        }
+        for operation, (count, sum1, sum2) in deltas.items()
+    ]
+    table = CalculationRollup.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        statement = dialect_insert(table).values(rows)
+        excluded = statement.excluded
+        count_after = table.c.count + excluded.count
+        await db.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.operation],
+            set_={
+                "count": count_after,
+                "sum_operand1": _accumulate(table.c.sum_operand1, excluded.sum_operand1, count_after),
+                "sum_operand2": _accumulate(table.c.sum_operand2, excluded.sum_operand2, count_after),
+                "updated_at": excluded.updated_at,
+            }
+        ))
+        return
+
+    # Portable fallback: update existing rows, insert the missing ones
+    for row in rows:
+        count_after = table.c.count + row["count"]
+        result = await db.execute(
+            update(table)
+            .where(table.c.user_id == user_id, table.c.operation == row["operation"])
+            .values(
+                count=count_after,
+                sum_operand1=_accumulate(table.c.sum_operand1, row["sum_operand1"], count_after),
+                sum_operand2=_accumulate(table.c.sum_operand2, row["sum_operand2"], count_after),
+                updated_at=now,
+            )
+        )
+        if result.rowcount == 0:
+            await db.execute(insert(table).values(row))
+
+
+async def rebuild(db: AsyncSession, user_id: Optional[int] = None) -> None:
+    """Recompute rollup rows from the calculations table (all users or one); caller commits."""
+    clear = delete(CalculationRollup)
+    totals = select(
+        Calculation.user_id,
+        Calculation.operation,
+        func.count(Calculation.id),
+        func.coalesce(func.sum(Calculation.operand1), 0.0),
+        func.coalesce(func.sum(Calculation.operand2), 0.0),
+        func.max(Calculation.created_at),
+    ).group_by(Calculation.user_id, Calculation.operation)
+    if user_id is not None:
+        clear = clear.where(CalculationRollup.user_id == user_id)
+        totals = totals.where(Calculation.user_id == user_id)
+    await db.execute(clear)
+    await db.execute(insert(CalculationRollup).from_select(
+        ["user_id", "operation", "count", "sum_operand1", "sum_operand2", "updated_at"],
+        totals
+    ))
+    # Stats served from the old rows must not be revalidated
+    await versions.bump(db, user_id)
+
+
+async def _rebuild_command(user_id: Optional[int]) -> None:
+    from app.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        await rebuild(db, user_id)
+        await db.commit()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.rollup", description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = commands.add_parser("rebuild", help="recompute the rollup from the calculations table")
+    rebuild_parser.add_argument("--user-id", type=int, help="only rebuild this user's rows")
+    args = parser.parse_args(argv)
+
+    asyncio.run(_rebuild_command(args.user_id))
+    scope = f"user {args.user_id}" if args.user_id is not None else "all users"
+    print(f"Rebuilt calculation rollup for {scope}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,96 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.database import get_db
-from app.models import Calculation, User
-from app.schemas import CalculationCreate, CalculationRead, CalculationUpdate, CalculationStats, OperationBreakdown
-from app.auth import get_current_user
-import math
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, select, tuple_
+from app.config import settings
+from app.database import get_async_db
+from app.models import Calculation, CalculationRollup, VectorCalculation
+from app.schemas import (
+    CalculationCreate, CalculationRead, CalculationUpdate, CalculationStats, OperationBreakdown,
+    BatchItemResult, CalculationBatchResult, VectorCalculationCreate, VectorCalculationRead,
+    CalculationTimeseries, TimeseriesPoint, CalculationDistribution, DistributionBucket
+)
+from app.arrays import pack_array, unpack_array
+from app.auth import Principal, get_current_principal
+from app.engine import CalculationError, calculate_cached, evaluate_batch, evaluate_vector
+from app import database, offload, pagination, rollup, sketches, timeseries, versions
 
 router = APIRouter(prefix="/calculations", tags=["calculations"])
 
 
 def perform_calculation(operation: str, operand1: float, operand2: float) -> float:
     """Perform the calculation based on the operation."""
-    if operation == "add":
-        return operand1 + operand2
-    elif operation == "subtract":
-        return operand1 - operand2
-    elif operation == "multiply":
-        return operand1 * operand2
-    elif operation == "divide":
-        if operand2 == 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Division by zero is not allowed"
-            )
-        return operand1 / operand2
-    elif operation == "power":
-        try:
-            return operand1 ** operand2
-        except (OverflowError, ValueError) as e:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Power calculation error: {str(e)}"
-            )
-    elif operation == "modulus":
-        if operand2 == 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Modulus by zero is not allowed"
-            )
-        return operand1 % operand2
-    elif operation == "sqrt":
-        # For sqrt, we use operand1 as the value and ignore operand2
-        if operand1 < 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Square root of negative number is not allowed"
-            )
-        return math.sqrt(operand1)
-    else:
+    try:
+        return calculate_cached(operation, operand1, operand2, compute=offload.calculate)
+    except CalculationError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid operation"
+            detail=str(e)
         )
+    except offload.OffloadUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+
+
+async def evaluate_calculation(operation: str, operand1: float, operand2: float) -> float:
+    """
+    perform_calculation for async routes.
+
+    Heavy operations block on the process pool, so they wait in a worker
+    thread instead of on the event loop.
+    """
+    if offload.is_heavy(operation):
+        return await run_in_threadpool(perform_calculation, operation, operand1, operand2)
+    return perform_calculation(operation, operand1, operand2)
+
+
+async def _apply_aggregates(db: AsyncSession, user_id: int, added=(), removed=()) -> None:
+    """Keep the rollup, distribution sketches and change version in step with (operation, operand1, operand2, result) rows."""
+    added, removed = list(added), list(removed)
+    await versions.bump(db, user_id)
+    await rollup.apply_deltas(db, user_id, rollup.merge_deltas(
+        rollup.collect_deltas((op, a, b) for op, a, b, _ in added),
+        rollup.collect_deltas(((op, a, b) for op, a, b, _ in removed), sign=-1)
+    ))
+    await sketches.apply_deltas(db, user_id, sketches.merge_deltas(
+        sketches.collect_deltas(added),
+        sketches.collect_deltas(removed, sign=-1)
+    ))
+
+
+async def _conditional_get(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
+) -> None:
+    """Tag the response with the user's change version; answer a matching If-None-Match with 304."""
+    etag = await versions.etag_for(db, current_user.id, request)
+    headers = {"ETag": etag, **versions.CACHE_HEADERS}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and versions.matches(if_none_match, etag):
+        # Raised before the endpoint runs, so none of its queries are executed
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
 
 
 @router.post("/", response_model=CalculationRead, status_code=status.HTTP_201_CREATED)
-def add_calculation(
+async def add_calculation(
     calculation: CalculationCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Add a new calculation (CREATE)."""
     # Perform the calculation
-    result = perform_calculation(
+    result = await evaluate_calculation(
         calculation.operation,
         calculation.operand1,
         calculation.operand2
@@ -79,32 +105,438 @@ def add_calculation(
         user_id=current_user.id
     )
     db.add(db_calculation)
-    db.commit()
-    db.refresh(db_calculation)
+    await _apply_aggregates(db, current_user.id, added=[
+        (calculation.operation, calculation.operand1, calculation.operand2, result)
+    ])
+    await db.commit()
+    await db.refresh(db_calculation)
     
     return db_calculation
 
 
-@router.get("/", response_model=List[CalculationRead])
-def browse_calculations(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+@router.post("/batch", response_model=CalculationBatchResult, status_code=status.HTTP_201_CREATED)
+async def add_calculations_batch(
+    calculations: List[CalculationCreate],
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    """Browse all calculations for the current user (BROWSE)."""
-    calculations = db.query(Calculation).filter(
-        Calculation.user_id == current_user.id
-    ).offset(skip).limit(limit).all()
+    """
+    Add many calculations in a single request (BATCH CREATE).
+
+    Every item is evaluated independently; items that fail (e.g. division by
+    zero) are reported with their error and are not stored. All successful
+    items are persisted with one multi-row INSERT in a single transaction.
+    """
+    if len(calculations) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch size exceeds the maximum of {settings.BATCH_MAX_ITEMS} items"
+        )
+
+    evaluation = evaluate_batch(
+        [calculation.operation for calculation in calculations],
+        [calculation.operand1 for calculation in calculations],
+        [calculation.operand2 for calculation in calculations]
+    )
+
+    created_at = datetime.utcnow()
+    results = []
+    rows = []
+    for index, (calculation, ok) in enumerate(zip(calculations, evaluation.ok)):
+        if not ok:
+            results.append(BatchItemResult(
+                index=index, success=False, error=evaluation.error_message(index)
+            ))
+            continue
+        results.append(BatchItemResult(index=index, success=True))
+        rows.append({
+            "operation": calculation.operation,
+            "operand1": calculation.operand1,
+            "operand2": calculation.operand2,
+            "result": float(evaluation.results[index]),
+            "user_id": current_user.id,
+            "created_at": created_at,
+        })
+
+    if rows:
+        # Single executemany INSERT ... RETURNING; ids come back in parameter order
+        inserted_ids = (await db.scalars(
+            insert(Calculation).returning(Calculation.id, sort_by_parameter_order=True),
+            rows
+        )).all()
+        await _apply_aggregates(db, current_user.id, added=(
+            (row["operation"], row["operand1"], row["operand2"], row["result"]) for row in rows
+        ))
+        await db.commit()
+
+        successful = (item for item in results if item.success)
+        for item, row, calculation_id in zip(successful, rows, inserted_ids):
+            item.calculation = CalculationRead(id=calculation_id, **row)
+
+    succeeded = len(rows)
+    return CalculationBatchResult(
+        total=len(calculations),
+        succeeded=succeeded,
+        failed=len(calculations) - succeeded,
+        results=results
+    )
+
+
+class _IngestResponse(StreamingResponse):
+    """
+    StreamingResponse that does not listen for client disconnects.
+
+    The stock implementation consumes ``receive`` concurrently with the body
+    iterator, which would steal request body chunks from an ingestion that is
+    still reading its upload. A disconnect surfaces from ``request.stream()``
+    instead.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+class _IngestAborted(Exception):
+    """Raised when an upload cannot be read any further (e.g. an oversized line)."""
+
+
+async def _store_chunk(db: AsyncSession, user_id: int, chunk: List[CalculationCreate]) -> List[tuple]:
+    """Evaluate and insert one ingestion chunk; returns (position, error) for failed rows."""
+    evaluation = evaluate_batch(
+        [calculation.operation for calculation in chunk],
+        [calculation.operand1 for calculation in chunk],
+        [calculation.operand2 for calculation in chunk]
+    )
+    created_at = datetime.utcnow()
+    rows = [
+        {
+            "operation": calculation.operation,
+            "operand1": calculation.operand1,
+            "operand2": calculation.operand2,
+            "result": float(evaluation.results[position]),
+            "user_id": user_id,
+            "created_at": created_at,
+        }
+        for position, (calculation, ok) in enumerate(zip(chunk, evaluation.ok))
+        if ok
+    ]
+    if rows:
+        await db.execute(insert(Calculation), rows)
+        await _apply_aggregates(db, user_id, added=(
+            (row["operation"], row["operand1"], row["operand2"], row["result"]) for row in rows
+        ))
+        await db.commit()
+    return [
+        (position, evaluation.error_message(position))
+        for position in range(len(chunk))
+        if not evaluation.ok[position]
+    ]
+
+
+async def _ingest_lines(request: Request) -> AsyncIterator[tuple]:
+    """Yield (line_number, raw_line) from the request body without buffering it."""
+    buffer = b""
+    line_number = 0
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        # Complete lines can arrive whole in one chunk, so check them as well as the remainder
+        for line in lines:
+            line_number += 1
+            if len(line) > settings.INGEST_MAX_LINE_BYTES:
+                raise _IngestAborted(f"Line {line_number} exceeds {settings.INGEST_MAX_LINE_BYTES} bytes")
+            yield line_number, line
+        if len(buffer) > settings.INGEST_MAX_LINE_BYTES:
+            raise _IngestAborted(f"Line {line_number + 1} exceeds {settings.INGEST_MAX_LINE_BYTES} bytes")
+    if buffer:
+        yield line_number + 1, buffer
+
+
+@router.post("/import", status_code=status.HTTP_200_OK)
+async def import_calculations(
+    request: Request,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Stream-ingest calculations from an ``application/x-ndjson`` body.
+
+    Each line is one calculation object. Lines are validated and evaluated in
+    chunks of INGEST_CHUNK_SIZE and every chunk is committed on its own, so
+    memory use does not grow with the size of the upload. The response is an
+    NDJSON stream of ``error`` events (per rejected line), ``progress`` events
+    (per committed chunk) and a final ``summary``. A line longer than
+    INGEST_MAX_LINE_BYTES ends the stream with an ``aborted`` event instead;
+    the lines before it are still committed.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type != "application/x-ndjson":
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Content-Type must be application/x-ndjson"
+        )
+
+    user_id = current_user.id
+
+    async def events() -> AsyncIterator[str]:
+        counts = {"lines": 0, "inserted": 0, "failed": 0}
+        reported_errors = 0
+        chunk: List[CalculationCreate] = []
+        chunk_lines: List[int] = []
+
+        def error_event(line_number: int, error: str) -> str:
+            nonlocal reported_errors
+            counts["failed"] += 1
+            if reported_errors >= settings.INGEST_MAX_REPORTED_ERRORS:
+                return ""
+            reported_errors += 1
+            return json.dumps({"event": "error", "line": line_number, "error": error}) + "\n"
+
+        async def flush() -> str:
+            # The stream outlives the request's dependencies, so each chunk
+            # opens its own session (and holds no connection between chunks)
+            async with database.AsyncSessionLocal() as db:
+                failures = await _store_chunk(db, user_id, chunk)
+            output = "".join(error_event(chunk_lines[position], error) for position, error in failures)
+            counts["inserted"] += len(chunk) - len(failures)
+            chunk.clear()
+            chunk_lines.clear()
+            return output + json.dumps({"event": "progress", **counts}) + "\n"
+
+        try:
+            async for line_number, line in _ingest_lines(request):
+                counts["lines"] = line_number
+                if not line.strip():
+                    continue
+                try:
+                    chunk.append(CalculationCreate.model_validate_json(line))
+                    chunk_lines.append(line_number)
+                except ValidationError as e:
+                    event = error_event(line_number, e.errors()[0]["msg"])
+                    if event:
+                        yield event
+                    continue
+                if len(chunk) >= settings.INGEST_CHUNK_SIZE:
+                    yield await flush()
+            if chunk:
+                yield await flush()
+        except _IngestAborted as e:
+            # Lines validated before the oversized one are still stored
+            if chunk:
+                yield await flush()
+            yield json.dumps({"event": "aborted", "error": str(e), **counts}) + "\n"
+            return
+
+        yield json.dumps({"event": "summary", **counts}) + "\n"
+
+    return _IngestResponse(events(), media_type="application/x-ndjson")
+
+
+def _vector_read(vector: VectorCalculation) -> VectorCalculationRead:
+    return VectorCalculationRead(
+        id=vector.id,
+        operation=vector.operation,
+        length=vector.length,
+        operand1=unpack_array(vector.operand1).tolist(),
+        operand2=unpack_array(vector.operand2).tolist(),
+        result=unpack_array(vector.result).tolist(),
+        user_id=vector.user_id,
+        created_at=vector.created_at
+    )
+
+
+@router.post("/vector", response_model=VectorCalculationRead, status_code=status.HTTP_201_CREATED)
+async def add_vector_calculation(
+    calculation: VectorCalculationCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Add an element-wise calculation over two arrays (VECTOR CREATE).
+
+    The whole job is evaluated with NumPy and stored as a single row with the
+    operands and result packed into binary columns. If any element fails
+    (e.g. division by zero) nothing is stored.
+    """
+    if len(calculation.operand1) > settings.VECTOR_MAX_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Arrays exceed the maximum length of {settings.VECTOR_MAX_LENGTH}"
+        )
+
+    operand2 = calculation.operand2
+    if operand2 is None:
+        operand2 = [0.0] * len(calculation.operand1)
+
+    evaluation = evaluate_vector(calculation.operation, calculation.operand1, operand2)
+    failed = (~evaluation.ok).nonzero()[0]
+    if len(failed):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{evaluation.error_message(failed[0])} (element {failed[0]}, {len(failed)} element(s) failed)"
+        )
+
+    db_vector = VectorCalculation(
+        operation=calculation.operation,
+        length=len(calculation.operand1),
+        operand1=pack_array(calculation.operand1),
+        operand2=pack_array(operand2),
+        result=pack_array(evaluation.results),
+        user_id=current_user.id
+    )
+    db.add(db_vector)
+    await db.commit()
+    await db.refresh(db_vector)
+
+    return _vector_read(db_vector)
+
+
+@router.get("/vector/{vector_id}", response_model=VectorCalculationRead)
+async def read_vector_calculation(
+    vector_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Read a specific vector calculation by ID."""
+    vector = await db.scalar(select(VectorCalculation).where(
+        VectorCalculation.id == vector_id,
+        VectorCalculation.user_id == current_user.id
+    ))
+
+    if not vector:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vector calculation not found"
+        )
+
+    return _vector_read(vector)
+
+
+def _naive_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """Convert an aware datetime to naive UTC, as timestamps are stored."""
+    if moment is not None and moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+@router.get("/", response_model=List[CalculationRead], dependencies=[Depends(_conditional_get)])
+async def browse_calculations(
+    request: Request,
+    response: Response,
+    operation: Optional[str] = Query(None, pattern="^(add|subtract|multiply|divide|power|modulus|sqrt)$"),
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    min_result: Optional[float] = None,
+    max_result: Optional[float] = None,
+    min_operand1: Optional[float] = None,
+    max_operand1: Optional[float] = None,
+    min_operand2: Optional[float] = None,
+    max_operand2: Optional[float] = None,
+    sort: str = Query("created_at", pattern="^(created_at|result)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    skip: int = Query(0, ge=0, deprecated=True),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Browse all calculations for the current user (BROWSE).
+    
+    Query params:
+    - operation: only this operation
+    - created_after, created_before: ISO datetimes; created_after <= created_at < created_before
+    - min_result/max_result, min_operand1/max_operand1, min_operand2/max_operand2: inclusive ranges
+    - sort: "created_at" (default) or "result", ties broken by id; order: "asc" (default) or "desc"
+    - cursor, limit: keyset pagination (see below)
+    
+    Filters compile to SQL predicates on the (user_id, created_at, id),
+    (user_id, operation, ...) and (user_id, result, id) indexes; operand
+    ranges are checked on the rows those indexes yield. Pass the
+    `X-Next-Cursor` or `X-Prev-Cursor` value of a response (also linked from
+    its `Link` header) as `cursor` to get the neighbouring page with the same
+    filters; each page is one index range scan, however deep. `skip` is an
+    OFFSET kept for old clients.
+    """
+    try:
+        position = pagination.decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    if position is not None and (position.sort, position.order) != (sort, order):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor was issued for a different sort"
+        )
+    
+    query = select(Calculation).where(Calculation.user_id == current_user.id)
+    if operation is not None:
+        query = query.where(Calculation.operation == operation)
+    if created_after is not None:
+        query = query.where(Calculation.created_at >= _naive_utc(created_after))
+    if created_before is not None:
+        query = query.where(Calculation.created_at < _naive_utc(created_before))
+    ranges = [
+        (Calculation.result, min_result, max_result),
+        (Calculation.operand1, min_operand1, max_operand1),
+        (Calculation.operand2, min_operand2, max_operand2),
+    ]
+    for column, low, high in ranges:
+        if low is not None:
+            query = query.where(column >= low)
+        if high is not None:
+            query = query.where(column <= high)
+    
+    sort_column = getattr(Calculation, sort)
+    key = tuple_(sort_column, Calculation.id)
+    backwards = position is not None and position.direction == pagination.PREV
+    # Walking a descending sort forwards, or an ascending one backwards, reads the index in reverse
+    ascending = (order == "asc") != backwards
+    if position is not None:
+        bound = tuple_(position.value, position.id)
+        query = query.where(key > bound if ascending else key < bound)
+    if ascending:
+        query = query.order_by(sort_column, Calculation.id)
+    else:
+        query = query.order_by(sort_column.desc(), Calculation.id.desc())
+    # One extra row tells whether another page follows in this direction
+    calculations = list((await db.scalars(query.offset(skip).limit(limit + 1))).all())
+    has_more = len(calculations) > limit
+    calculations = calculations[:limit]
+    if backwards:
+        calculations.reverse()
+    
+    # A backwards page was reached from the page after it; a forward page from one before it, if any
+    more_after = backwards or has_more
+    more_before = has_more if backwards else (position is not None or skip > 0)
+    next_cursor = prev_cursor = None
+    if calculations:
+        first, last = calculations[0], calculations[-1]
+        if more_after:
+            next_cursor = pagination.encode_cursor(pagination.NEXT, sort, order, getattr(last, sort), last.id)
+        if more_before:
+            prev_cursor = pagination.encode_cursor(pagination.PREV, sort, order, getattr(first, sort), first.id)
+    
+    url = request.url.remove_query_params("skip")
+    link = pagination.link_header(url, next_cursor, prev_cursor)
+    if link:
+        response.headers["Link"] = link
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if prev_cursor:
+        response.headers["X-Prev-Cursor"] = prev_cursor
     
     return calculations
 
 
-@router.get("/stats", response_model=CalculationStats)
-def get_calculation_statistics(
-    limit: int = 10,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+@router.get("/stats", response_model=CalculationStats, dependencies=[Depends(_conditional_get)])
+async def get_calculation_statistics(
+    limit: int = Query(10, ge=0, le=100),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get statistics and metrics for the current user's calculations.
@@ -116,13 +548,22 @@ def get_calculation_statistics(
     - average_operand2: Average value of second operand
     - most_used_operation: The most frequently used operation
     - recent_calculations: Most recent calculations (limited by limit parameter)
+    
+    Everything but the recent rows is read from the per-operation rollup
+    (see app.rollup), so the cost does not grow with history size.
     """
-    # Get all calculations for current user
-    all_calculations = db.query(Calculation).filter(
-        Calculation.user_id == current_user.id
-    ).all()
+    # Per-operation count and operand sums, maintained on every write
+    operation_totals = (await db.execute(select(
+        CalculationRollup.operation,
+        CalculationRollup.count,
+        CalculationRollup.sum_operand1,
+        CalculationRollup.sum_operand2
+    ).where(
+        CalculationRollup.user_id == current_user.id,
+        CalculationRollup.count > 0
+    ).order_by(CalculationRollup.operation))).all()
     
-    total_calculations = len(all_calculations)
+    total_calculations = sum(row.count for row in operation_totals)
     
     # If no calculations, return empty stats
     if total_calculations == 0:
@@ -135,64 +576,129 @@ def get_calculation_statistics(
             recent_calculations=[]
         )
     
-    # Calculate operations breakdown
-    operation_counts = db.query(
-        Calculation.operation,
-        func.count(Calculation.id).label('count')
-    ).filter(
-        Calculation.user_id == current_user.id
-    ).group_by(Calculation.operation).all()
-    
     operations_breakdown = [
         OperationBreakdown(
-            operation=op,
-            count=count,
-            percentage=round((count / total_calculations) * 100, 2)
+            operation=row.operation,
+            count=row.count,
+            percentage=round((row.count / total_calculations) * 100, 2)
         )
-        for op, count in operation_counts
+        for row in operation_totals
     ]
     
     # Find most used operation
-    most_used = max(operation_counts, key=lambda x: x.count) if operation_counts else None
-    most_used_operation = most_used[0] if most_used else None
-    
-    # Calculate averages
-    avg_stats = db.query(
-        func.avg(Calculation.operand1).label('avg_operand1'),
-        func.avg(Calculation.operand2).label('avg_operand2')
-    ).filter(
-        Calculation.user_id == current_user.id
-    ).first()
+    most_used_operation = max(operation_totals, key=lambda row: row.count).operation
     
-    average_operand1 = round(float(avg_stats.avg_operand1), 2) if avg_stats.avg_operand1 else None
-    average_operand2 = round(float(avg_stats.avg_operand2), 2) if avg_stats.avg_operand2 else None
+    # Averages from the per-operation sums
+    average_operand1 = sum(row.sum_operand1 for row in operation_totals) / total_calculations
+    average_operand2 = sum(row.sum_operand2 for row in operation_totals) / total_calculations
     
     # Get recent calculations
-    recent_calculations = db.query(Calculation).filter(
+    recent_calculations = (await db.scalars(select(Calculation).where(
         Calculation.user_id == current_user.id
-    ).order_by(Calculation.created_at.desc()).limit(limit).all()
+    ).order_by(Calculation.created_at.desc(), Calculation.id.desc()).limit(limit))).all()
     
     return CalculationStats(
         total_calculations=total_calculations,
         operations_breakdown=operations_breakdown,
-        average_operand1=average_operand1,
-        average_operand2=average_operand2,
+        average_operand1=round(float(average_operand1), 2),
+        average_operand2=round(float(average_operand2), 2),
         most_used_operation=most_used_operation,
         recent_calculations=recent_calculations
     )
 
 
-@router.get("/{calculation_id}", response_model=CalculationRead)
-def read_calculation(
+@router.get("/stats/timeseries", response_model=CalculationTimeseries)
+async def get_calculation_timeseries(
+    bucket: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    operation: Optional[str] = Query(None, pattern="^(add|subtract|multiply|divide|power|modulus|sqrt)$"),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the number of calculations per hour or day (UTC).
+    
+    Query params:
+    - bucket: "hour" or "day" (default)
+    - start, end: ISO datetimes; defaults to the last 48 hours or 30 days up to now.
+      The range is widened to whole buckets
+    - operation: only count this operation
+    
+    Every bucket in the range is returned, including empty ones. Counts of
+    past buckets are cached, so usually only the current bucket is queried.
+    """
+    end = end or datetime.utcnow()
+    start = start or end - timeseries.BUCKET_SIZES[bucket] * (48 if bucket == "hour" else 30)
+    start, end = _naive_utc(start), _naive_utc(end)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end"
+        )
+    if (end - timeseries.floor_bucket(start, bucket)) / timeseries.BUCKET_SIZES[bucket] > settings.TIMESERIES_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range exceeds the maximum of {settings.TIMESERIES_MAX_BUCKETS} buckets"
+        )
+    
+    points = await timeseries.activity_series(db, current_user.id, bucket, start, end, operation)
+    
+    return CalculationTimeseries(
+        bucket=bucket,
+        start=start,
+        end=end,
+        operation=operation,
+        points=[TimeseriesPoint(bucket_start=bucket_start, count=count) for bucket_start, count in points]
+    )
+
+
+@router.get("/stats/distribution", response_model=CalculationDistribution)
+async def get_calculation_distribution(
+    field: str = Query("result", pattern="^(result|operand1|operand2)$"),
+    operation: Optional[str] = Query(None, pattern="^(add|subtract|multiply|divide|power|modulus|sqrt)$"),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the approximate distribution of results or operands.
+    
+    Query params:
+    - field: "result" (default), "operand1" or "operand2"
+    - operation: only include this operation
+    
+    Served from log-histogram sketches (see app.sketches), so the cost
+    depends on the number of distinct buckets, not on history size. Every
+    reported quantile is within SKETCH_RELATIVE_ACCURACY of a value from the
+    data; non-finite values are not counted.
+    """
+    buckets = await sketches.load_buckets(db, current_user.id, field, operation)
+    
+    return CalculationDistribution(
+        field=field,
+        operation=operation,
+        count=sum(count for _, _, count in buckets),
+        relative_accuracy=settings.SKETCH_RELATIVE_ACCURACY,
+        quantiles={f"p{round(q * 100)}": sketches.quantile(buckets, q) for q in sketches.QUANTILES},
+        buckets=[
+            DistributionBucket(lower=lower, upper=upper, count=count)
+            for sign, bucket, count in buckets
+            for lower, upper in [sketches.bucket_bounds(sign, bucket)]
+        ]
+    )
+
+
+@router.get("/{calculation_id}", response_model=CalculationRead, dependencies=[Depends(_conditional_get)])
+async def read_calculation(
     calculation_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Read a specific calculation by ID (READ)."""
-    calculation = db.query(Calculation).filter(
+    calculation = await db.scalar(select(Calculation).where(
         Calculation.id == calculation_id,
         Calculation.user_id == current_user.id
-    ).first()
+    ))
     
     if not calculation:
         raise HTTPException(
@@ -204,17 +710,17 @@ def read_calculation(
 
 
 @router.put("/{calculation_id}", response_model=CalculationRead)
-def edit_calculation(
+async def edit_calculation(
     calculation_id: int,
     calculation_update: CalculationUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Edit an existing calculation (EDIT)."""
-    calculation = db.query(Calculation).filter(
+    calculation = await db.scalar(select(Calculation).where(
         Calculation.id == calculation_id,
         Calculation.user_id == current_user.id
-    ).first()
+    ))
     
     if not calculation:
         raise HTTPException(
@@ -226,33 +732,38 @@ def edit_calculation(
     update_data = calculation_update.model_dump(exclude_unset=True)
     
     if update_data:
+        removed = (calculation.operation, calculation.operand1, calculation.operand2, calculation.result)
         for field, value in update_data.items():
             setattr(calculation, field, value)
         
         # Recalculate the result
-        calculation.result = perform_calculation(
+        calculation.result = await evaluate_calculation(
             calculation.operation,
             calculation.operand1,
             calculation.operand2
         )
         
-        db.commit()
-        db.refresh(calculation)
+        await _apply_aggregates(db, current_user.id, removed=[removed], added=[
+            (calculation.operation, calculation.operand1, calculation.operand2, calculation.result)
+        ])
+        await db.commit()
+        timeseries.invalidate(current_user.id)
+        await db.refresh(calculation)
     
     return calculation
 
 
 @router.delete("/{calculation_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_calculation(
+async def delete_calculation(
     calculation_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Delete a calculation (DELETE)."""
-    calculation = db.query(Calculation).filter(
+    calculation = await db.scalar(select(Calculation).where(
         Calculation.id == calculation_id,
         Calculation.user_id == current_user.id
-    ).first()
+    ))
     
     if not calculation:
         raise HTTPException(
@@ -260,7 +771,11 @@ def delete_calculation(
             detail="Calculation not found"
         )
     
-    db.delete(calculation)
-    db.commit()
+    await db.delete(calculation)
+    await _apply_aggregates(db, current_user.id, removed=[
+        (calculation.operation, calculation.operand1, calculation.operand2, calculation.result)
+    ])
+    await db.commit()
+    timeseries.invalidate(current_user.id)
     
     return None
@@ -0,0 +1,72 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.models import ExpressionEvaluation
+from app.schemas import ExpressionCreate, ExpressionRead
+from app.auth import Principal, get_current_principal
+from app import offload
+from app.engine import CalculationError
+from app.expressions import ExpressionError, compile_expression
+
+router = APIRouter(prefix="/expressions", tags=["expressions"])
+
+
+@router.post("/", response_model=ExpressionRead, status_code=status.HTTP_201_CREATED)
+async def evaluate_expression(
+    expression: ExpressionCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Evaluate an infix expression such as ``(a+b)^2 / sqrt(c)`` and store it.
+
+    Supports + - * / ^ % and sqrt(), parentheses, numeric literals and named
+    variables supplied in ``variables``. Compiled plans are cached by
+    normalized expression text. Plans using heavy operations wait for the
+    process pool in a worker thread, not on the event loop.
+    """
+    try:
+        plan = compile_expression(expression.expression)
+        if any(offload.is_heavy(operation) for operation in plan.operations):
+            result = await run_in_threadpool(plan.evaluate, expression.variables)
+        else:
+            result = plan.evaluate(expression.variables)
+    except (ExpressionError, CalculationError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except offload.OffloadUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+
+    db_expression = ExpressionEvaluation(
+        expression=plan.expression,
+        variables={name: expression.variables[name] for name in sorted(plan.variables)},
+        result=result,
+        user_id=current_user.id
+    )
+    db.add(db_expression)
+    await db.commit()
+    await db.refresh(db_expression)
+
+    return db_expression
+
+
+@router.get("/", response_model=List[ExpressionRead])
+async def browse_expressions(
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """Browse evaluated expressions for the current user."""
+    return (await db.scalars(select(ExpressionEvaluation).where(
+        ExpressionEvaluation.user_id == current_user.id
+    ).order_by(ExpressionEvaluation.id.desc()).offset(skip).limit(limit))).all()
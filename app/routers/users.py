@@ -1,20 +1,94 @@
-from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import User
-from app.schemas import UserCreate, UserRead, UserLogin, Token, UserProfileUpdate, UserPasswordChange
-from app.auth import get_password_hash, verify_password, create_access_token, get_current_user
+from datetime import datetime, timedelta
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from app import database
+from app.database import get_async_db
+from typing import List
+from app.models import ApiKey, RefreshToken, User
+from app.schemas import (
+    UserCreate, UserRead, UserLogin, Token, TokenRefresh, UserProfileUpdate, UserPasswordChange,
+    ApiKeyCreate, ApiKeyRead, ApiKeyCreated
+)
+from app.auth import (
+    Principal, api_key_cache, create_access_token, create_api_key, create_refresh_token, get_current_principal,
+    get_current_user, get_current_user_for_update, hash_refresh_token, invalidate_user, needs_rehash
+)
+from app.hashing import LOGIN, PASSWORD_CHANGE, REGISTRATION, REHASH, HasherBusy, password_hasher
+from app.ratelimit import limiter
+from app.revocation import revocations
 from app.config import settings
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
+def _client_address(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def _issue_tokens(db: AsyncSession, user_id: int, username: str, token_version: int) -> dict:
+    """Create an access token and stage a new refresh token row (caller commits)."""
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": username, "uid": user_id, "ver": token_version}, expires_delta=access_token_expires
+    )
+    refresh_token, token_hash = create_refresh_token()
+    db.add(RefreshToken(
+        token_hash=token_hash,
+        user_id=user_id,
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
+
+
+async def _bump_token_version(db: AsyncSession, user: User) -> None:
+    """Invalidate every access token issued to the user so far (caller commits)."""
+    # Incremented in SQL so concurrent bumps never hand out the same version twice
+    revoked_at = datetime.utcnow()
+    version = await db.scalar(
+        update(User)
+        .where(User.id == user.id)
+        .values(token_version=User.token_version + 1, tokens_revoked_at=revoked_at)
+        .returning(User.token_version)
+        .execution_options(synchronize_session=False)
+    )
+    set_committed_value(user, "token_version", version)
+    set_committed_value(user, "tokens_revoked_at", revoked_at)
+
+
+async def _rehash_password(user_id: int, username: str, password: str, previous_hash: str):
+    """
+    Background task: re-hash a just verified password with the current policy.
+
+    Runs after the response is sent, once the request's session is closed,
+    so it opens a session of its own.
+    """
+    try:
+        hashed_password = await password_hasher.hash(password, priority=REHASH)
+    except HasherBusy:
+        return  # retried on the next login
+    async with database.AsyncSessionLocal() as db:
+        # Skip if the password was changed in the meantime
+        await db.execute(
+            update(User)
+            .where(User.id == user_id, User.hashed_password == previous_hash)
+            .values(hashed_password=hashed_password)
+        )
+        await db.commit()
+    invalidate_user(username)
+
+
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, request: Request, db: AsyncSession = Depends(get_async_db)):
     """Register a new user."""
+    await limiter.check("register", {
+        "user": (user.username, settings.REGISTRATION_RATE_LIMIT_PER_USERNAME),
+        "client": (_client_address(request), settings.REGISTRATION_RATE_LIMIT_PER_CLIENT),
+    })
+    
     # Check if username already exists
-    db_user = db.query(User).filter(User.username == user.username).first()
+    db_user = await db.scalar(select(User).where(User.username == user.username))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -22,7 +96,7 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Check if email already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).where(User.email == user.email))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -30,68 +104,140 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_hasher.hash(user.password, priority=REGISTRATION)
     db_user = User(
         username=user.username,
         email=user.email,
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 
 @router.post("/login", response_model=Token)
-def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    """Login user and return access token."""
+async def login_user(
+    user_credentials: UserLogin,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Login user and return an access token and a refresh token.
+
+    If the stored hash does not match the current hashing policy, the password
+    is re-hashed after the response is sent.
+    """
+    await limiter.check("login", {
+        "user": (user_credentials.username, settings.LOGIN_RATE_LIMIT_PER_USERNAME),
+        "client": (_client_address(request), settings.LOGIN_RATE_LIMIT_PER_CLIENT),
+    })
+    
     # Find user by username
-    user = db.query(User).filter(User.username == user_credentials.username).first()
+    user = await db.scalar(select(User).where(User.username == user_credentials.username))
     
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    if not user or not await password_hasher.verify(
+        user_credentials.password, user.hashed_password, priority=LOGIN
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Create access token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+    tokens = _issue_tokens(db, user.id, user.username, user.token_version)
+    await db.commit()
+    
+    if needs_rehash(user.hashed_password):
+        background_tasks.add_task(
+            _rehash_password, user.id, user.username, user_credentials.password, user.hashed_password
+        )
+    
+    return tokens
+
+
+@router.post("/token/refresh", response_model=Token)
+async def refresh_access_token(body: TokenRefresh, db: AsyncSession = Depends(get_async_db)):
+    """
+    Exchange a refresh token for a new access token and refresh token.
+
+    Refresh tokens are single use: each one is rotated out when redeemed.
+    Presenting an already rotated token is treated as theft and revokes
+    every refresh token of that user.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
     )
+    now = datetime.utcnow()
+    row = (await db.execute(
+        select(RefreshToken.id, RefreshToken.user_id, RefreshToken.expires_at, RefreshToken.revoked,
+               User.username, User.token_version)
+        .join(User, User.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == hash_refresh_token(body.refresh_token))
+    )).first()
+    if row is None or row.expires_at <= now:
+        raise credentials_exception
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    # Compare-and-set, so two concurrent redemptions cannot both succeed
+    rotated = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == row.id, RefreshToken.revoked.is_(False))
+        .values(revoked=True)
+    )
+    if row.revoked or rotated.rowcount != 1:
+        await db.execute(
+            update(RefreshToken).where(RefreshToken.user_id == row.user_id).values(revoked=True)
+        )
+        await db.commit()
+        raise credentials_exception
+    
+    # Keep the table compact: drop this user's tokens that can no longer be used
+    await db.execute(
+        delete(RefreshToken).where(RefreshToken.user_id == row.user_id, RefreshToken.expires_at <= now)
+    )
+    tokens = _issue_tokens(db, row.user_id, row.username, row.token_version)
+    await db.commit()
+    
+    return tokens
 
 
 @router.get("/me", response_model=UserRead)
-def get_current_user_profile(current_user: User = Depends(get_current_user)):
+async def get_current_user_profile(current_user: User = Depends(get_current_user)):
     """Get current user's profile information."""
     return current_user
 
 
 @router.put("/me", response_model=UserRead)
-def update_user_profile(
+async def update_user_profile(
     profile_update: UserProfileUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_for_update),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Update current user's profile information (username and/or email)."""
+    """
+    Update current user's profile information (username and/or email).
+
+    A username change revokes the access tokens issued under the old name.
+    """
+    previous_username = current_user.username
     
     # Check if new username is already taken (if username is being updated)
     if profile_update.username and profile_update.username != current_user.username:
-        existing_user = db.query(User).filter(User.username == profile_update.username).first()
+        existing_user = await db.scalar(select(User).where(User.username == profile_update.username))
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already taken"
             )
         current_user.username = profile_update.username
+        await _bump_token_version(db, current_user)
     
     # Check if new email is already taken (if email is being updated)
     if profile_update.email and profile_update.email != current_user.email:
-        existing_user = db.query(User).filter(User.email == profile_update.email).first()
+        existing_user = await db.scalar(select(User).where(User.email == profile_update.email))
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -99,29 +245,109 @@ def update_user_profile(
             )
         current_user.email = profile_update.email
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    revocations.revoke(current_user.id, current_user.token_version, current_user.tokens_revoked_at)
+    invalidate_user(previous_username, current_user.username)
+    await db.refresh(current_user)
     
     return current_user
 
 
 @router.put("/me/password", status_code=status.HTTP_200_OK)
-def change_user_password(
+async def change_user_password(
     password_change: UserPasswordChange,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_for_update),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Change current user's password."""
+    """
+    Change current user's password.
+
+    Every access and refresh token issued so far is revoked; a fresh pair for
+    the caller is returned with the confirmation.
+    """
     
     # Verify current password
-    if not verify_password(password_change.current_password, current_user.hashed_password):
+    if not await password_hasher.verify(
+        password_change.current_password, current_user.hashed_password, priority=PASSWORD_CHANGE
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
     
     # Hash and update new password
-    current_user.hashed_password = get_password_hash(password_change.new_password)
-    db.commit()
+    current_user.hashed_password = await password_hasher.hash(
+        password_change.new_password, priority=PASSWORD_CHANGE
+    )
+    # A password change signs out every other session
+    await _bump_token_version(db, current_user)
+    await db.execute(
+        update(RefreshToken).where(RefreshToken.user_id == current_user.id).values(revoked=True)
+    )
+    tokens = _issue_tokens(db, current_user.id, current_user.username, current_user.token_version)
+    await db.commit()
+    revocations.revoke(current_user.id, current_user.token_version, current_user.tokens_revoked_at)
+    invalidate_user(current_user.username)
+    
+    return {"message": "Password updated successfully", **tokens}
+
+
+@router.post("/me/api-keys", response_model=ApiKeyCreated, status_code=status.HTTP_201_CREATED)
+async def create_user_api_key(
+    api_key: ApiKeyCreate,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create a long-lived API key for machine clients.
+
+    The key is sent as a bearer token in place of a JWT and is only shown in
+    this response; the server keeps its prefix and a SHA-256 digest.
+    """
+    key, prefix, key_hash = create_api_key()
+    db_api_key = ApiKey(name=api_key.name, prefix=prefix, key_hash=key_hash, user_id=current_user.id)
+    db.add(db_api_key)
+    await db.commit()
+    
+    return ApiKeyCreated(
+        id=db_api_key.id,
+        name=db_api_key.name,
+        prefix=db_api_key.prefix,
+        created_at=db_api_key.created_at,
+        key=key
+    )
+
+
+@router.get("/me/api-keys", response_model=List[ApiKeyRead])
+async def list_user_api_keys(
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List the current user's API keys (without the secret part)."""
+    result = await db.scalars(
+        select(ApiKey).where(ApiKey.user_id == current_user.id).order_by(ApiKey.id)
+    )
+    return result.all()
+
+
+@router.delete("/me/api-keys/{api_key_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_user_api_key(
+    api_key_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Revoke an API key. Other workers stop accepting it within API_KEY_CACHE_TTL_SECONDS."""
+    db_api_key = await db.scalar(
+        select(ApiKey).where(ApiKey.id == api_key_id, ApiKey.user_id == current_user.id)
+    )
+    if not db_api_key:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="API key not found"
+        )
+    
+    await db.delete(db_api_key)
+    await db.commit()
+    api_key_cache.pop(db_api_key.prefix)
     
-    return {"message": "Password updated successfully"}
+    return None
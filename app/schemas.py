@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, model_validator
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 
 # User Schemas
@@ -39,6 +39,29 @@ class UserPasswordChange(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
+
+class ApiKeyCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+
+
+class ApiKeyRead(BaseModel):
+    id: int
+    name: str
+    prefix: str
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class ApiKeyCreated(ApiKeyRead):
+    key: str  # only returned once, at creation
 
 
 class TokenData(BaseModel):
@@ -72,6 +95,69 @@ class CalculationRead(CalculationBase):
         from_attributes = True
 
 
+# Vector Calculation Schemas
+class VectorCalculationCreate(BaseModel):
+    """Element-wise calculation over equal-length arrays (operand2 is optional for sqrt)."""
+    operation: str = Field(..., pattern="^(add|subtract|multiply|divide|power|modulus|sqrt)$")
+    operand1: List[float] = Field(..., min_length=1)
+    operand2: Optional[List[float]] = None
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        if self.operand2 is None:
+            if self.operation != "sqrt":
+                raise ValueError("operand2 is required for this operation")
+        elif len(self.operand2) != len(self.operand1):
+            raise ValueError("operand1 and operand2 must have the same length")
+        return self
+
+
+class VectorCalculationRead(BaseModel):
+    id: int
+    operation: str
+    length: int
+    operand1: List[float]
+    operand2: List[float]
+    result: List[float]
+    user_id: int
+    created_at: datetime
+
+
+# Expression Schemas
+class ExpressionCreate(BaseModel):
+    expression: str = Field(..., min_length=1, max_length=256)
+    variables: Dict[str, float] = Field(default_factory=dict)
+
+
+class ExpressionRead(BaseModel):
+    id: int
+    expression: str
+    variables: Dict[str, float]
+    result: float
+    user_id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+# Batch Schemas
+class BatchItemResult(BaseModel):
+    """Outcome of a single item in a batch request."""
+    index: int
+    success: bool
+    calculation: Optional[CalculationRead] = None
+    error: Optional[str] = None
+
+
+class CalculationBatchResult(BaseModel):
+    """Summary and per-item results of a batch request."""
+    total: int
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
+
+
 # Statistics/Reports Schemas
 class OperationBreakdown(BaseModel):
     """Breakdown of calculations by operation type."""
@@ -88,3 +174,35 @@ class CalculationStats(BaseModel):
     average_operand2: Optional[float] = None
     most_used_operation: Optional[str] = None
     recent_calculations: List[CalculationRead]
+
+
+class TimeseriesPoint(BaseModel):
+    """Number of calculations in one time bucket."""
+    bucket_start: datetime
+    count: int
+
+
+class CalculationTimeseries(BaseModel):
+    """Calculation activity per time bucket (UTC)."""
+    bucket: str
+    start: datetime
+    end: datetime
+    operation: Optional[str] = None
+    points: List[TimeseriesPoint]
+
+
+class DistributionBucket(BaseModel):
+    """Number of values in one histogram bucket."""
+    lower: float
+    upper: float
+    count: int
+
+
+class CalculationDistribution(BaseModel):
+    """Approximate distribution of results or operands."""
+    field: str
+    operation: Optional[str] = None
+    count: int
+    relative_accuracy: float
+    quantiles: Dict[str, Optional[float]]
+    buckets: List[DistributionBucket]
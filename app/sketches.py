@@ -0,0 +1,213 @@
+"""
+Mergeable distribution sketches for results and operands.
+
+Each value is counted in a fixed logarithmic bucket (as in DDSketch): bucket
+``k`` of sign ``s`` holds values whose magnitude lies in
+``(gamma^(k-1), gamma^k]`` with ``gamma = (1 + a) / (1 - a)``, so reporting
+a bucket's midpoint is within relative accuracy ``a`` of any value in it.
+Sketches are plain bucket counts, so they merge by addition and support
+deletes by subtraction.
+
+Non-empty buckets are stored sparsely in ``calculation_sketch_buckets``, one
+row per (user_id, operation, field, sign, bucket). Writes apply count deltas
+in the calculation's transaction with one upsert, and a distribution is read
+in O(number of buckets). Changing SKETCH_RELATIVE_ACCURACY changes the bucket
+boundaries and requires a rebuild::
+
+    python -m app.sketches rebuild [--user-id ID]
+"""
+import argparse
+import asyncio
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import Calculation, CalculationSketchBucket
+
+FIELDS = {"result": 0, "operand1": 1, "operand2": 2}
+QUANTILES = (0.5, 0.75, 0.9, 0.95, 0.99)
+
+# Magnitudes below this are counted in the zero bucket
+MIN_MAGNITUDE = 1e-9
+
+UPSERT_CHUNK_ROWS = 500
+REBUILD_CHUNK_ROWS = 1000
+
+GAMMA = (1 + settings.SKETCH_RELATIVE_ACCURACY) / (1 - settings.SKETCH_RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+
+# (operation, field code, sign, bucket) -> count delta
+Deltas = Dict[Tuple[str, int, int, int], int]
+# (sign, bucket, count)
+Bucket = Tuple[int, int, int]
+
+
+def bucket_of(value: float) -> Optional[Tuple[int, int]]:
+    """(sign, bucket) for a value, or None for values that are not finite."""
+    if not math.isfinite(value):
+        return None
+    magnitude = abs(value)
+    if magnitude < MIN_MAGNITUDE:
+        return 0, 0
+    return (1 if value > 0 else -1), math.ceil(math.log(magnitude) / _LOG_GAMMA)
+
+
+def bucket_bounds(sign: int, bucket: int) -> Tuple[float, float]:
+    """(lower, upper) value bounds of a bucket."""
+    if sign == 0:
+        return 0.0, 0.0
+    low, high = GAMMA ** (bucket - 1), GAMMA ** bucket
+    return (low, high) if sign > 0 else (-high, -low)
+
+
+def bucket_value(sign: int, bucket: int) -> float:
+    """Representative value of a bucket, within the relative accuracy of all its members."""
+    return sign * 2 * GAMMA ** bucket / (GAMMA + 1)
+
+
+def collect_deltas(rows: Iterable[Tuple[str, float, float, float]], sign: int = 1) -> Deltas:
+    """Count (operation, operand1, operand2, result) rows into per-bucket deltas."""
+    deltas: Deltas = {}
+    for operation, operand1, operand2, result in rows:
+        for field, value in ((0, result), (1, operand1), (2, operand2)):
+            located = bucket_of(value)
+            if located is None:
+                continue
+            key = (operation, field) + located
+            deltas[key] = deltas.get(key, 0) + sign
+    return deltas
+
+
+def merge_deltas(*parts: Deltas) -> Deltas:
+    """Combine several deltas."""
+    merged: Deltas = {}
+    for part in parts:
+        for key, count in part.items():
+            merged[key] = merged.get(key, 0) + count
+    return merged
+
+
+async def apply_deltas(db: AsyncSession, user_id: int, deltas: Deltas) -> None:
+    """Add deltas to the user's bucket counts (caller commits), as one upsert where supported."""
+    rows = [
+        {"user_id": user_id, "operation": operation, "field": field, "sign": sign, "bucket": bucket, "count": count}
+        for (operation, field, sign, bucket), count in deltas.items()
+        if count
+    ]
+    if not rows:
+        return
+    table = CalculationSketchBucket.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        # Chunked to stay under the bind parameter limit on large batches and rebuilds
+        for offset in range(0, len(rows), UPSERT_CHUNK_ROWS):
+            statement = dialect_insert(table).values(rows[offset:offset + UPSERT_CHUNK_ROWS])
+            await db.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.user_id, table.c.operation, table.c.field, table.c.sign, table.c.bucket],
+                set_={"count": table.c.count + statement.excluded.count}
+            ))
+        return
+
+    # Portable fallback: update existing rows, insert the missing ones
+    for row in rows:
+        result = await db.execute(
+            update(table)
+            .where(
+                table.c.user_id == user_id,
+                table.c.operation == row["operation"],
+                table.c.field == row["field"],
+                table.c.sign == row["sign"],
+                table.c.bucket == row["bucket"]
+            )
+            .values(count=table.c.count + row["count"])
+        )
+        if result.rowcount == 0:
+            await db.execute(insert(table).values(row))
+
+
+async def load_buckets(db: AsyncSession, user_id: int, field: str, operation: Optional[str] = None) -> List[Bucket]:
+    """Non-empty buckets of one field, merged across operations unless one is given."""
+    total = func.sum(CalculationSketchBucket.count)
+    query = select(CalculationSketchBucket.sign, CalculationSketchBucket.bucket, total).where(
+        CalculationSketchBucket.user_id == user_id,
+        CalculationSketchBucket.field == FIELDS[field]
+    )
+    if operation is not None:
+        query = query.where(CalculationSketchBucket.operation == operation)
+    rows = await db.execute(
+        query.group_by(CalculationSketchBucket.sign, CalculationSketchBucket.bucket).having(total > 0)
+    )
+    return sorted(((sign, bucket, count) for sign, bucket, count in rows), key=_value_order)
+
+
+def _value_order(item: Bucket) -> Tuple[int, int]:
+    sign, bucket, _ = item
+    # Negative buckets with larger indexes hold smaller values
+    return sign, bucket * sign
+
+
+def quantile(buckets: Sequence[Bucket], q: float) -> Optional[float]:
+    """Estimate the q-quantile from buckets sorted by value."""
+    total = sum(count for _, _, count in buckets)
+    if total == 0:
+        return None
+    rank = q * (total - 1)
+    seen = 0
+    for sign, bucket, count in buckets:
+        seen += count
+        if seen > rank:
+            return bucket_value(sign, bucket)
+    sign, bucket, _ = buckets[-1]
+    return bucket_value(sign, bucket)
+
+
+async def rebuild(db: AsyncSession, user_id: Optional[int] = None) -> None:
+    """Recompute bucket counts from the calculations table (all users or one); caller commits."""
+    clear = delete(CalculationSketchBucket)
+    if user_id is not None:
+        clear = clear.where(CalculationSketchBucket.user_id == user_id)
+        owners = [user_id]
+    else:
+        owners = (await db.scalars(select(Calculation.user_id).distinct())).all()
+    await db.execute(clear)
+
+    # Bucketing needs log(), which SQLite does not always have, so count in Python.
+    # Rows are streamed one user at a time, so memory is bounded by the number
+    # of buckets rather than the number of calculations
+    for owner in owners:
+        rows = select(
+            Calculation.operation, Calculation.operand1, Calculation.operand2, Calculation.result
+        ).where(Calculation.user_id == owner).execution_options(yield_per=REBUILD_CHUNK_ROWS)
+        deltas: Deltas = {}
+        async for chunk in (await db.stream(rows)).partitions():
+            deltas = merge_deltas(deltas, collect_deltas(chunk))
+        await apply_deltas(db, owner, deltas)
+
+
+async def _rebuild_command(user_id: Optional[int]) -> None:
+    from app.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        await rebuild(db, user_id)
+        await db.commit()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.sketches", description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    rebuild_parser = commands.add_parser("rebuild", help="recompute the sketches from the calculations table")
+    rebuild_parser.add_argument("--user-id", type=int, help="only rebuild this user's sketches")
+    args = parser.parse_args(argv)
+
+    asyncio.run(_rebuild_command(args.user_id))
+    scope = f"user {args.user_id}" if args.user_id is not None else "all users"
+    print(f"Rebuilt distribution sketches for {scope}")
+
+
+if __name__ == "__main__":
+    main()
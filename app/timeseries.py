@@ -0,0 +1,123 @@
+"""
+Time-bucketed activity counts for the reports page.
+
+Buckets are counted in SQL with one GROUP BY over the (user_id, created_at)
+index. A bucket that ended more than CLOSE_GRACE ago can no longer receive
+new rows, so its count is cached per (user, bucket size, operation, start)
+and only still-open or uncached buckets are queried. Edits and deletions can
+change past buckets; they bump a per-user generation that is part of the
+cache key, and TIMESERIES_CACHE_TTL_SECONDS bounds how long other workers
+may serve counts from before such a change.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import LRUCache
+from app.config import settings
+from app.models import Calculation
+
+BUCKET_SIZES = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+# Rows get created_at when they are flushed, slightly before they commit
+CLOSE_GRACE = timedelta(minutes=1)
+
+bucket_cache = LRUCache(maxsize=settings.TIMESERIES_CACHE_SIZE, ttl=settings.TIMESERIES_CACHE_TTL_SECONDS)
+_generations: Dict[int, int] = {}
+
+
+def invalidate(user_id: int) -> None:
+    """Forget cached buckets of a user after a change to existing rows."""
+    _generations[user_id] = _generations.get(user_id, 0) + 1
+
+
+def floor_bucket(moment: datetime, bucket: str) -> datetime:
+    """Start of the bucket containing moment."""
+    if bucket == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def bucket_starts(start: datetime, end: datetime, bucket: str) -> List[datetime]:
+    """Starts of the whole buckets overlapping [start, end)."""
+    step = BUCKET_SIZES[bucket]
+    current = floor_bucket(start, bucket)
+    starts = []
+    while current < end:
+        starts.append(current)
+        current += step
+    return starts
+
+
+def _bucket_expression(dialect: str, bucket: str):
+    if dialect == "sqlite":
+        pattern = "%Y-%m-%d %H:00:00" if bucket == "hour" else "%Y-%m-%d 00:00:00"
+        return func.strftime(pattern, Calculation.created_at)
+    return func.date_trunc(bucket, Calculation.created_at)
+
+
+def _as_datetime(value) -> datetime:
+    return datetime.fromisoformat(value) if isinstance(value, str) else value.replace(tzinfo=None)
+
+
+async def count_buckets(
+    db: AsyncSession,
+    user_id: int,
+    bucket: str,
+    start: datetime,
+    end: datetime,
+    operation: Optional[str] = None,
+) -> Dict[datetime, int]:
+    """Count the user's calculations per bucket in [start, end) with one GROUP BY."""
+    bucket_start = _bucket_expression(db.get_bind().dialect.name, bucket).label("bucket_start")
+    query = select(bucket_start, func.count(Calculation.id)).where(
+        Calculation.user_id == user_id,
+        Calculation.created_at >= start,
+        Calculation.created_at < end
+    )
+    if operation is not None:
+        query = query.where(Calculation.operation == operation)
+    rows = await db.execute(query.group_by(bucket_start))
+    return {_as_datetime(value): count for value, count in rows}
+
+
+async def activity_series(
+    db: AsyncSession,
+    user_id: int,
+    bucket: str,
+    start: datetime,
+    end: datetime,
+    operation: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> List[Tuple[datetime, int]]:
+    """(bucket start, count) for every bucket overlapping [start, end), zeros included."""
+    now = now or datetime.utcnow()
+    step = BUCKET_SIZES[bucket]
+    generation = _generations.get(user_id, 0)
+
+    def cache_key(bucket_start: datetime) -> tuple:
+        return (user_id, generation, bucket, operation, bucket_start)
+
+    def is_closed(bucket_start: datetime) -> bool:
+        return bucket_start + step <= now - CLOSE_GRACE
+
+    starts = bucket_starts(start, end, bucket)
+    counts: Dict[datetime, int] = {}
+    missing = []
+    for bucket_start in starts:
+        count = bucket_cache.get(cache_key(bucket_start)) if is_closed(bucket_start) else None
+        if count is None:
+            missing.append(bucket_start)
+        else:
+            counts[bucket_start] = count
+
+    if missing:
+        fetched = await count_buckets(db, user_id, bucket, missing[0], missing[-1] + step, operation)
+        for bucket_start in missing:
+            counts[bucket_start] = fetched.get(bucket_start, 0)
+            if is_closed(bucket_start):
+                bucket_cache.set(cache_key(bucket_start), counts[bucket_start])
+
+    return [(bucket_start, counts[bucket_start]) for bucket_start in starts]
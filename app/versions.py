@@ -0,0 +1,65 @@
+"""
+Per-user change versions for conditional GETs.
+
+``calculation_versions`` holds one counter per user that is incremented in
+the same transaction as every write to that user's calculations (and by
+rollup rebuilds). Read endpoints derive a strong ETag from the user, that
+version and the request URL, so a client that already holds the current
+representation gets a 304 after one primary-key lookup instead of the list
+or stats queries.
+
+The version is read before the response is built: a write that commits in
+between can only make the body newer than its tag, which costs the client a
+full response next time but never serves it stale data.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CalculationVersion, User
+
+# Browsers may keep the body but must revalidate it on every use
+CACHE_HEADERS = {"Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+
+async def bump(db: AsyncSession, user_id: Optional[int]) -> None:
+    """Mark the user's calculations (or everyone's, for None) as changed; caller commits."""
+    table = CalculationVersion.__table__
+    if user_id is None:
+        await db.execute(update(table).values(version=table.c.version + 1))
+        await db.execute(insert(table).from_select(
+            ["user_id", "version"],
+            select(User.id, 1).where(~select(table.c.user_id).where(table.c.user_id == User.id).exists())
+        ))
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        await db.execute(dialect_insert(table).values(user_id=user_id, version=1).on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={"version": table.c.version + 1}
+        ))
+        return
+
+    # Portable fallback
+    result = await db.execute(update(table).where(table.c.user_id == user_id).values(version=table.c.version + 1))
+    if result.rowcount == 0:
+        await db.execute(insert(table).values(user_id=user_id, version=1))
+
+
+async def etag_for(db: AsyncSession, user_id: int, request: Request) -> str:
+    """Strong ETag of the representation at request.url for the user's current version."""
+    version = await db.scalar(select(CalculationVersion.version).where(CalculationVersion.user_id == user_id)) or 0
+    digest = hashlib.sha256(f"{user_id}:{version}:{request.url.path}?{request.url.query}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header value covers etag (weak comparison, as RFC 9110 requires)."""
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
@@ -0,0 +1,171 @@
+"""Tables and columns added since the baseline
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+Expressions, vectors, refresh tokens, API keys, token versions, the stats
+rollup, change versions and distribution sketches. Earlier deployments ran
+``create_all`` at startup with whatever models existed then, so each object
+is only created when it is missing. The rollup is backfilled in SQL whenever
+it is empty; the sketches need ``python -m app.sketches rebuild`` afterwards.
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _has_column(table: str, column: str) -> bool:
+    return any(info["name"] == column for info in sa.inspect(op.get_bind()).get_columns(table))
+
+
+def _is_empty(table: str) -> bool:
+    return op.get_bind().execute(sa.text(f"SELECT 1 FROM {table} LIMIT 1")).first() is None
+
+
+def upgrade() -> None:
+    if not _has_column("users", "token_version"):
+        op.add_column("users", sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"))
+    if not _has_column("users", "tokens_revoked_at"):
+        op.add_column("users", sa.Column("tokens_revoked_at", sa.DateTime(), nullable=True))
+        op.create_index("ix_users_tokens_revoked_at", "users", ["tokens_revoked_at"])
+
+    if not _has_table("expression_evaluations"):
+        op.create_table(
+            "expression_evaluations",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("expression", sa.String(), nullable=False),
+            sa.Column("variables", sa.JSON(), nullable=False),
+            sa.Column("result", sa.Float(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_expression_evaluations_id", "expression_evaluations", ["id"])
+        op.create_index("ix_expression_evaluations_user_id", "expression_evaluations", ["user_id"])
+
+    if not _has_table("vector_calculations"):
+        op.create_table(
+            "vector_calculations",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("operation", sa.String(), nullable=False),
+            sa.Column("length", sa.Integer(), nullable=False),
+            sa.Column("operand1", sa.LargeBinary(), nullable=False),
+            sa.Column("operand2", sa.LargeBinary(), nullable=False),
+            sa.Column("result", sa.LargeBinary(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_vector_calculations_id", "vector_calculations", ["id"])
+        op.create_index("ix_vector_calculations_user_id", "vector_calculations", ["user_id"])
+
+    if not _has_table("refresh_tokens"):
+        op.create_table(
+            "refresh_tokens",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("token_hash", sa.String(length=64), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.Column("revoked", sa.Boolean(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_refresh_tokens_token_hash", "refresh_tokens", ["token_hash"], unique=True)
+        op.create_index("ix_refresh_tokens_user_id", "refresh_tokens", ["user_id"])
+
+    if not _has_table("api_keys"):
+        op.create_table(
+            "api_keys",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=100), nullable=False),
+            sa.Column("prefix", sa.String(length=16), nullable=False),
+            sa.Column("key_hash", sa.String(length=64), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_api_keys_prefix", "api_keys", ["prefix"], unique=True)
+        op.create_index("ix_api_keys_user_id", "api_keys", ["user_id"])
+
+    if not _has_table("calculation_rollups"):
+        op.create_table(
+            "calculation_rollups",
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("operation", sa.String(), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.Column("sum_operand1", sa.Float(), nullable=False),
+            sa.Column("sum_operand2", sa.Float(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("user_id", "operation"),
+        )
+    # The application may have created the table empty at startup before this ran
+    if _is_empty("calculation_rollups"):
+        # Same aggregate as app.rollup.rebuild
+        op.execute(
+            "INSERT INTO calculation_rollups (user_id, operation, count, sum_operand1, sum_operand2, updated_at) "
+            "SELECT user_id, operation, count(id), coalesce(sum(operand1), 0.0), coalesce(sum(operand2), 0.0), "
+            "coalesce(max(created_at), CURRENT_TIMESTAMP) FROM calculations GROUP BY user_id, operation"
+        )
+
+    if not _has_table("calculation_versions"):
+        op.create_table(
+            "calculation_versions",
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("version", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("user_id"),
+        )
+
+    if not _has_table("calculation_sketch_buckets"):
+        op.create_table(
+            "calculation_sketch_buckets",
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("operation", sa.String(), nullable=False),
+            sa.Column("field", sa.SmallInteger(), nullable=False),
+            sa.Column("sign", sa.SmallInteger(), nullable=False),
+            sa.Column("bucket", sa.Integer(), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("user_id", "operation", "field", "sign", "bucket"),
+        )
+    if _is_empty("calculation_sketch_buckets") and not _is_empty("calculations"):
+        # Bucketing needs log(), which is not portable SQL
+        logger.warning("calculation_sketch_buckets is empty; run `python -m app.sketches rebuild`")
+
+
+def downgrade() -> None:
+    for table in (
+        "calculation_sketch_buckets",
+        "calculation_versions",
+        "calculation_rollups",
+        "api_keys",
+        "refresh_tokens",
+        "vector_calculations",
+        "expression_evaluations",
+    ):
+        op.drop_table(table)
+    op.drop_index("ix_users_tokens_revoked_at", table_name="users")
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("tokens_revoked_at")
+        batch.drop_column("token_version")
@@ -0,0 +1,70 @@
+"""Composite calculation indexes for the hot queries
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+Every calculation query filters on user_id, which the baseline did not
+index at all:
+
+- (user_id, created_at, id): history pages in both directions, recent rows
+  and time buckets. B-tree indexes are read backwards as cheaply as
+  forwards, so one ascending index serves ORDER BY created_at DESC, id DESC
+  too; a mixed (created_at DESC, id) index would not.
+- (user_id, operation, created_at, id): operation filters and per-operation
+  grouping, still in history order.
+- (user_id, operation, operand1, operand2, created_at): covers the
+  per-operation count/sum/max of the rollup rebuild.
+
+On PostgreSQL the indexes are built with CREATE INDEX CONCURRENTLY outside
+the migration transaction, so writes continue during the build. A build
+that fails leaves an INVALID index behind; drop it and re-run the upgrade.
+The interim (user_id, created_at) index that create_all used to make is
+dropped if present.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "ix_calculations_user_id_created_at_id": ["user_id", "created_at", "id"],
+    "ix_calculations_user_id_operation": ["user_id", "operation", "created_at", "id"],
+    "ix_calculations_user_id_operation_operands": ["user_id", "operation", "operand1", "operand2", "created_at"],
+}
+SUPERSEDED = "ix_calculations_user_id_created_at"
+
+
+def _concurrently() -> bool:
+    return op.get_context().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    if _concurrently():
+        # CONCURRENTLY cannot run inside a transaction block
+        with op.get_context().autocommit_block():
+            for name, columns in INDEXES.items():
+                op.create_index(name, "calculations", columns, postgresql_concurrently=True, if_not_exists=True)
+            op.drop_index(SUPERSEDED, table_name="calculations", postgresql_concurrently=True, if_exists=True)
+        return
+
+    for name, columns in INDEXES.items():
+        op.create_index(name, "calculations", columns, if_not_exists=True)
+    op.drop_index(SUPERSEDED, table_name="calculations", if_exists=True)
+
+
+def downgrade() -> None:
+    if _concurrently():
+        with op.get_context().autocommit_block():
+            for name in INDEXES:
+                op.drop_index(name, table_name="calculations", postgresql_concurrently=True, if_exists=True)
+        return
+
+    for name in INDEXES:
+        op.drop_index(name, table_name="calculations", if_exists=True)
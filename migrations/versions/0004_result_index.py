@@ -0,0 +1,39 @@
+"""Calculation index for result filters and sorting
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+(user_id, result, id) serves result ranges and history pages sorted by
+result in both directions. Built concurrently on PostgreSQL, as in 0003.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NAME = "ix_calculations_user_id_result_id"
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(NAME, "calculations", ["user_id", "result", "id"], postgresql_concurrently=True, if_not_exists=True)
+        return
+
+    op.create_index(NAME, "calculations", ["user_id", "result", "id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index(NAME, table_name="calculations", postgresql_concurrently=True, if_exists=True)
+        return
+
+    op.drop_index(NAME, table_name="calculations", if_exists=True)
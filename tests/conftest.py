@@ -1,11 +1,22 @@
+import os
+
+# Cheapest bcrypt cost; must be set before app.config is imported
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import asyncio
+from contextlib import contextmanager
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.main import app
-from app.database import Base, get_db
+from app import auth, database, ratelimit, timeseries
+from app.revocation import revocations
+from app.database import Base, get_db, get_async_db, get_async_database_url
+from app.models import CalculationRollup, CalculationSketchBucket, User
 from app.config import settings
-import os
 
 # Use SQLite for testing if PostgreSQL is not available
 if os.getenv("USE_SQLITE_FOR_TESTS", "true").lower() == "true":
@@ -20,6 +31,34 @@ else:
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Each TestClient runs its own event loop, so async connections must not be pooled across tests
+async_engine = create_async_engine(get_async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def query_plan(statement, parameters=()):
+    """SQLite's EXPLAIN QUERY PLAN details for a recorded statement, joined by " | "."""
+    with engine.connect() as connection:
+        return " | ".join(row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters))
+
+
+@pytest.fixture(autouse=True)
+def reset_auth_caches():
+    """Per-worker caches must not outlive the per-test database."""
+    auth.user_cache.clear()
+    auth.token_cache.clear()
+    auth.api_key_cache.clear()
+    ratelimit.limiter.reset()
+    revocations.clear()
+    timeseries.bucket_cache.clear()
+    yield
+    auth.user_cache.clear()
+    auth.token_cache.clear()
+    auth.api_key_cache.clear()
+    ratelimit.limiter.reset()
+    revocations.clear()
+    timeseries.bucket_cache.clear()
+
 
 @pytest.fixture(scope="function")
 def db_session():
@@ -34,7 +73,7 @@ def db_session():
 
 
 @pytest.fixture(scope="function")
-def client(db_session):
+def client(db_session, monkeypatch):
     """Create a test client with test database."""
     def override_get_db():
         try:
@@ -42,7 +81,14 @@ def client(db_session):
         finally:
             db_session.close()
     
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Background tasks and response streams open their own sessions
+    monkeypatch.setattr(database, "AsyncSessionLocal", TestingAsyncSessionLocal)
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -88,3 +134,71 @@ def authenticated_client(client, test_user):
     }
     
     return client
+
+
+@pytest.fixture
+def sql_statements():
+    """
+    Record the SQL the application runs.
+
+    ``with sql_statements() as executed:`` collects a (statement, parameters)
+    pair for every statement sent on the async engine inside the block.
+    """
+    @contextmanager
+    def record():
+        executed = []
+
+        def listener(conn, cursor, statement, parameters, *args):
+            executed.append((statement, parameters))
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+        try:
+            yield executed
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+    return record
+
+
+@pytest.fixture
+def user_id(db_session):
+    """Look up a user's id by username (testuser by default)."""
+    def lookup(username="testuser"):
+        return db_session.query(User).filter_by(username=username).one().id
+    return lookup
+
+
+@pytest.fixture
+def rollup_rows(db_session):
+    """Current rollup rows as {(user_id, operation): (count, sum_operand1, sum_operand2)}."""
+    def read():
+        db_session.expire_all()
+        return {
+            (row.user_id, row.operation): (row.count, row.sum_operand1, row.sum_operand2)
+            for row in db_session.query(CalculationRollup).all()
+        }
+    return read
+
+
+@pytest.fixture
+def rebuild():
+    """Run module.rebuild (app.rollup or app.sketches) in its own session and commit."""
+    def run(module, user_id=None):
+        async def main():
+            async with TestingAsyncSessionLocal() as db:
+                await module.rebuild(db, user_id)
+                await db.commit()
+        asyncio.run(main())
+    return run
+
+
+@pytest.fixture
+def sketch_rows(db_session):
+    """Current non-empty sketch buckets as {(user_id, operation, field, sign, bucket): count}."""
+    def read():
+        db_session.expire_all()
+        return {
+            (row.user_id, row.operation, row.field, row.sign, row.bucket): row.count
+            for row in db_session.query(CalculationSketchBucket).all()
+            if row.count
+        }
+    return read
@@ -0,0 +1,111 @@
+from fastapi import status
+from app.auth import api_key_cache, hash_api_key
+from app.models import ApiKey
+
+
+def create_key(client, name="batch job"):
+    response = client.post("/users/me/api-keys", json={"name": name})
+    assert response.status_code == status.HTTP_201_CREATED
+    return response.json()
+
+
+def key_headers(key):
+    return {"Authorization": f"Bearer {key}"}
+
+
+class TestApiKeyManagement:
+    """Tests for creating, listing and revoking API keys."""
+
+    def test_create_api_key(self, authenticated_client, db_session):
+        """The key is returned once; only its prefix and digest are stored."""
+        data = create_key(authenticated_client)
+
+        assert data["key"].startswith(f"fac_{data['prefix']}_")
+        stored = db_session.query(ApiKey).one()
+        assert stored.prefix == data["prefix"]
+        assert stored.key_hash == hash_api_key(data["key"])
+
+    def test_list_api_keys_hides_secret(self, authenticated_client):
+        """Listing never returns the key itself."""
+        created = create_key(authenticated_client)
+
+        response = authenticated_client.get("/users/me/api-keys")
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [item["prefix"] for item in data] == [created["prefix"]]
+        assert "key" not in data[0]
+
+    def test_delete_api_key(self, authenticated_client, client):
+        """A revoked key stops working immediately in this worker."""
+        created = create_key(authenticated_client)
+        assert client.get("/calculations/", headers=key_headers(created["key"])).status_code == status.HTTP_200_OK
+
+        response = authenticated_client.delete(f"/users/me/api-keys/{created['id']}")
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert client.get("/calculations/", headers=key_headers(created["key"])).status_code == \
+            status.HTTP_401_UNAUTHORIZED
+
+    def test_cannot_delete_other_users_key(self, authenticated_client, client, test_user2):
+        """Keys of another user are not found."""
+        created = create_key(authenticated_client)
+        client.post("/users/register", json=test_user2)
+        token = client.post("/users/login", json={
+            "username": test_user2["username"],
+            "password": test_user2["password"]
+        }).json()["access_token"]
+
+        response = client.delete(f"/users/me/api-keys/{created['id']}", headers=key_headers(token))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestApiKeyAuthentication:
+    """Tests for accepting API keys as bearer tokens."""
+
+    def test_api_key_authenticates(self, authenticated_client, client, test_user):
+        """An API key works wherever a JWT does."""
+        created = create_key(authenticated_client)
+
+        response = client.get("/users/me", headers=key_headers(created["key"]))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["username"] == test_user["username"]
+
+    def test_wrong_secret_rejected(self, authenticated_client, client):
+        """A known prefix with the wrong secret is rejected, cached or not."""
+        created = create_key(authenticated_client)
+        forged = f"fac_{created['prefix']}_forged"
+
+        assert client.get("/calculations/", headers=key_headers(forged)).status_code == status.HTTP_401_UNAUTHORIZED
+        client.get("/calculations/", headers=key_headers(created["key"]))
+        assert client.get("/calculations/", headers=key_headers(forged)).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_unknown_key_rejected(self, client, db_session):
+        """A key with an unknown prefix is rejected."""
+        response = client.get("/calculations/", headers=key_headers("fac_000000000000_secret"))
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_repeat_requests_skip_key_query(self, authenticated_client, client, sql_statements):
+        """After the first request the key is resolved without a query."""
+        created = create_key(authenticated_client)
+        client.get("/calculations/", headers=key_headers(created["key"]))
+        assert created["prefix"] in api_key_cache
+
+        with sql_statements() as executed:
+            response = client.get("/calculations/", headers=key_headers(created["key"]))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not any("FROM api_keys" in statement or "FROM users" in statement for statement, _ in executed)
+
+    def test_profile_update_refreshes_cached_key(self, authenticated_client, client):
+        """A renamed user is seen through the API key after the update."""
+        created = create_key(authenticated_client)
+        client.get("/users/me", headers=key_headers(created["key"]))
+
+        authenticated_client.put("/users/me", json={"username": "renamed"})
+
+        response = client.get("/users/me", headers=key_headers(created["key"]))
+        assert response.json()["username"] == "renamed"
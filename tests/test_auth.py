@@ -1,19 +1,28 @@
+import asyncio
 import pytest
 from fastapi import status
 from app.auth import get_current_user, create_access_token
 from datetime import timedelta
 from jose import jwt
 from app.config import settings
+from tests.conftest import TestingAsyncSessionLocal
+
+
+def resolve_current_user(token):
+    """Run the async get_current_user dependency against the test database."""
+    async def run():
+        async with TestingAsyncSessionLocal() as db:
+            return await get_current_user(token=token, db=db)
+    return asyncio.run(run())
 
 
 def test_get_current_user_invalid_token(client, db_session):
     """Test get_current_user with invalid token."""
     from fastapi import HTTPException
-    from app.database import get_db
     
     # Test with invalid token
     with pytest.raises(HTTPException) as exc_info:
-        get_current_user(token="invalid_token", db=db_session)
+        resolve_current_user("invalid_token")
     
     assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
 
@@ -26,7 +35,7 @@ def test_get_current_user_no_username_in_token(client, db_session):
     token = create_access_token(data={"user_id": 123})
     
     with pytest.raises(HTTPException) as exc_info:
-        get_current_user(token=token, db=db_session)
+        resolve_current_user(token)
     
     assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
 
@@ -39,7 +48,7 @@ def test_get_current_user_nonexistent_user(client, db_session):
     token = create_access_token(data={"sub": "nonexistent_user"})
     
     with pytest.raises(HTTPException) as exc_info:
-        get_current_user(token=token, db=db_session)
+        resolve_current_user(token)
     
     assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
 
@@ -67,3 +76,88 @@ def test_create_access_token_without_expiry():
     payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     assert payload.get("sub") == "testuser"
     assert "exp" in payload
+
+
+class TestUserCache:
+    """Tests for the authenticated-user cache in get_current_user"""
+
+    def test_repeat_requests_skip_user_query(self, authenticated_client, sql_statements):
+        """Test that the user lookup is served from the cache after the first request"""
+        from app.auth import user_cache
+        authenticated_client.get("/calculations/")
+        assert "testuser" in user_cache
+
+        with sql_statements() as executed:
+            authenticated_client.get("/calculations/")
+        assert not any("FROM users" in statement for statement, _ in executed)
+
+    def test_cached_user_is_attached_and_updatable(self, authenticated_client):
+        """Test profile updates work on a user resolved from the cache"""
+        authenticated_client.get("/users/me")
+        response = authenticated_client.put("/users/me", json={"email": "cached@example.com"})
+        assert response.status_code == status.HTTP_200_OK
+        assert authenticated_client.get("/users/me").json()["email"] == "cached@example.com"
+
+    def test_profile_update_invalidates_cache(self, authenticated_client):
+        """Test that renaming a user drops the cached principal"""
+        from app.auth import user_cache
+        authenticated_client.get("/users/me")
+        authenticated_client.put("/users/me", json={"username": "renamed"})
+        assert "testuser" not in user_cache
+        # The old token's subject no longer exists
+        assert authenticated_client.get("/users/me").status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_password_change_invalidates_cache(self, authenticated_client, test_user):
+        """Test that changing the password drops the cached principal"""
+        from app.auth import user_cache
+        authenticated_client.get("/users/me")
+        response = authenticated_client.put("/users/me/password", json={
+            "current_password": test_user["password"],
+            "new_password": "newpassword123"
+        })
+        assert response.status_code == status.HTTP_200_OK
+        assert "testuser" not in user_cache
+
+
+class TestTokenCache:
+    """Tests for the decoded-JWT cache"""
+
+    def test_second_decode_is_a_cache_hit(self, monkeypatch):
+        """Test that a verified token is not decoded again"""
+        from app import auth
+        token = create_access_token(data={"sub": "testuser"}, expires_delta=timedelta(minutes=5))
+        assert auth.decode_access_token(token)["sub"] == "testuser"
+
+        def fail(*args, **kwargs):
+            raise AssertionError("jwt.decode should not be called")
+        monkeypatch.setattr(auth.jwt, "decode", fail)
+
+        assert auth.decode_access_token(token)["sub"] == "testuser"
+        assert auth.token_cache.stats()["hits"] == 1
+
+    def test_cache_entry_expires_with_token(self, monkeypatch):
+        """Test that a cached token is not served after its exp"""
+        from app import auth, cache
+        token = create_access_token(data={"sub": "testuser"}, expires_delta=timedelta(seconds=30))
+        auth.decode_access_token(token)
+
+        real_monotonic = cache.time.monotonic
+        monkeypatch.setattr(cache.time, "monotonic", lambda: real_monotonic() + 31)
+        assert auth.token_cache.get(token) is None
+
+    def test_invalid_tokens_are_not_cached(self):
+        """Test that failed verifications do not populate the cache"""
+        from jose import JWTError
+        from app import auth
+        with pytest.raises(JWTError):
+            auth.decode_access_token("invalid_token")
+        assert len(auth.token_cache) == 0
+
+    def test_expired_token_rejected(self, client):
+        """Test that an already-expired token is rejected and not cached"""
+        from fastapi import HTTPException
+        from app import auth
+        token = create_access_token(data={"sub": "testuser"}, expires_delta=timedelta(seconds=-1))
+        with pytest.raises(HTTPException):
+            resolve_current_user(token)
+        assert len(auth.token_cache) == 0
@@ -0,0 +1,109 @@
+"""
+Unit and Integration tests for the batch calculation endpoint
+"""
+import pytest
+from fastapi import status
+from app.config import settings
+from app.models import Calculation
+
+
+class TestBatchCalculations:
+    """Tests for POST /calculations/batch"""
+
+    def test_batch_all_success(self, authenticated_client, db_session):
+        """Test a batch where every item succeeds"""
+        items = [
+            {"operation": "add", "operand1": 10, "operand2": 5},
+            {"operation": "multiply", "operand1": 3, "operand2": 7},
+            {"operation": "sqrt", "operand1": 144, "operand2": 0},
+        ]
+        response = authenticated_client.post("/calculations/batch", json=items)
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+
+        assert data["total"] == 3
+        assert data["succeeded"] == 3
+        assert data["failed"] == 0
+        assert [r["calculation"]["result"] for r in data["results"]] == [15, 21, 12]
+        assert [r["index"] for r in data["results"]] == [0, 1, 2]
+
+        ids = [r["calculation"]["id"] for r in data["results"]]
+        assert len(set(ids)) == 3
+        assert db_session.query(Calculation).count() == 3
+
+    def test_batch_partial_failure(self, authenticated_client, db_session):
+        """Test that failing items are reported and not stored"""
+        items = [
+            {"operation": "divide", "operand1": 10, "operand2": 0},
+            {"operation": "subtract", "operand1": 10, "operand2": 4},
+            {"operation": "sqrt", "operand1": -9, "operand2": 0},
+            {"operation": "modulus", "operand1": 17, "operand2": 5},
+        ]
+        response = authenticated_client.post("/calculations/batch", json=items)
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+
+        assert data["succeeded"] == 2
+        assert data["failed"] == 2
+        results = data["results"]
+        assert results[0]["success"] is False
+        assert "Division by zero" in results[0]["error"]
+        assert results[0]["calculation"] is None
+        assert results[1]["calculation"]["result"] == 6
+        assert "negative" in results[2]["error"]
+        assert results[3]["calculation"]["result"] == 2
+        assert db_session.query(Calculation).count() == 2
+
+    def test_batch_overflow_is_a_row_error(self, authenticated_client, db_session):
+        """Test that a result overflowing to inf is reported, not stored"""
+        items = [
+            {"operation": "multiply", "operand1": 1e308, "operand2": 10},
+            {"operation": "add", "operand1": 1, "operand2": 2},
+        ]
+        response = authenticated_client.post("/calculations/batch", json=items)
+        assert response.status_code == status.HTTP_201_CREATED
+        results = response.json()["results"]
+        assert results[0]["success"] is False
+        assert "out of range" in results[0]["error"]
+        assert results[1]["calculation"]["result"] == 3
+        assert db_session.query(Calculation).count() == 1
+
+    def test_batch_rows_are_readable(self, authenticated_client):
+        """Test that batch-created rows are visible through the normal endpoints"""
+        items = [{"operation": "add", "operand1": i, "operand2": 1} for i in range(50)]
+        response = authenticated_client.post("/calculations/batch", json=items)
+        first = response.json()["results"][0]["calculation"]
+
+        read = authenticated_client.get(f"/calculations/{first['id']}")
+        assert read.status_code == status.HTTP_200_OK
+        assert read.json()["result"] == 1
+
+        browse = authenticated_client.get("/calculations/")
+        assert len(browse.json()) == 50
+
+    def test_batch_empty(self, authenticated_client):
+        """Test an empty batch"""
+        response = authenticated_client.post("/calculations/batch", json=[])
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()["total"] == 0
+
+    def test_batch_invalid_item_rejected(self, authenticated_client):
+        """Test that schema validation applies to every item"""
+        items = [
+            {"operation": "add", "operand1": 1, "operand2": 2},
+            {"operation": "invalid", "operand1": 1, "operand2": 2},
+        ]
+        response = authenticated_client.post("/calculations/batch", json=items)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_batch_too_large(self, authenticated_client, monkeypatch):
+        """Test that oversized batches are rejected"""
+        monkeypatch.setattr(settings, "BATCH_MAX_ITEMS", 2)
+        items = [{"operation": "add", "operand1": 1, "operand2": 2}] * 3
+        response = authenticated_client.post("/calculations/batch", json=items)
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    def test_batch_unauthenticated(self, client):
+        """Test batch endpoint requires authentication"""
+        response = client.post("/calculations/batch", json=[])
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
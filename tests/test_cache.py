@@ -0,0 +1,89 @@
+"""
+Unit tests for the in-process LRU cache
+"""
+import pytest
+from app import cache as cache_module
+from app.cache import LRUCache
+
+
+class FakeClock:
+    """Controllable replacement for time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", fake)
+    return fake
+
+
+def test_get_and_set():
+    """Test basic hits and misses"""
+    cache = LRUCache(maxsize=2)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_evicts_least_recently_used():
+    """Test that the least recently used entry is evicted"""
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+
+
+def test_ttl_expiry(clock):
+    """Test that entries expire after the cache ttl"""
+    cache = LRUCache(maxsize=4, ttl=10)
+    cache.set("a", 1)
+    clock.now += 9
+    assert cache.get("a") == 1
+    clock.now += 2
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_per_entry_ttl(clock):
+    """Test that a per-entry ttl overrides the cache default"""
+    cache = LRUCache(maxsize=4)
+    cache.set("short", 1, ttl=5)
+    cache.set("forever", 2)
+    clock.now += 100
+    assert cache.get("short") is None
+    assert cache.get("forever") == 2
+
+
+def test_clear_resets_metrics():
+    """Test clear empties the cache and its counters"""
+    cache = LRUCache(maxsize=1)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("b")
+    cache.clear()
+    assert cache.stats() == {
+        "hits": 0, "misses": 0, "evictions": 0, "expirations": 0,
+        "size": 0, "maxsize": 1, "hit_rate": 0.0,
+    }
+
+
+def test_invalid_maxsize():
+    """Test that a cache must hold at least one entry"""
+    with pytest.raises(ValueError):
+        LRUCache(maxsize=0)
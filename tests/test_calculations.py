@@ -56,6 +56,18 @@ def test_create_calculation_divide_by_zero(authenticated_client):
     assert "Division by zero" in response.json()["detail"]
 
 
+def test_create_calculation_power_not_real(authenticated_client):
+    """Test that zero to a negative power and fractional powers of negatives are rejected."""
+    for operand1, operand2 in ((0, -1), (-8, 0.5)):
+        response = authenticated_client.post(
+            "/calculations/",
+            json={"operation": "power", "operand1": operand1, "operand2": operand2}
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Power calculation error" in response.json()["detail"]
+
+
 def test_create_calculation_invalid_operation(authenticated_client):
     """Test invalid operation."""
     calculation_data = {
@@ -22,3 +22,67 @@ def test_database_engine_and_base():
     assert engine is not None
     assert Base is not None
     assert hasattr(Base, 'metadata')
+
+
+def test_get_async_db_yields_session():
+    """Test get_async_db yields an AsyncSession and closes it."""
+    import asyncio
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from app.database import get_async_db
+
+    async def run():
+        db_gen = get_async_db()
+        db = await db_gen.__anext__()
+        assert isinstance(db, AsyncSession)
+        await db_gen.aclose()
+
+    asyncio.run(run())
+
+
+def test_get_async_database_url():
+    """Test sync URLs are mapped to their async drivers."""
+    from app.database import get_async_database_url
+
+    assert get_async_database_url("sqlite:///./calculator.db") == "sqlite+aiosqlite:///./calculator.db"
+    assert get_async_database_url("postgresql://u:p@db/calc") == "postgresql+asyncpg://u:p@db/calc"
+    assert get_async_database_url("postgresql+psycopg2://u:p@db/calc") == "postgresql+asyncpg://u:p@db/calc"
+
+
+def test_pool_options_from_settings(monkeypatch):
+    """Test pool settings are passed through to create_engine."""
+    from sqlalchemy.pool import QueuePool
+    from app.config import settings
+    from app.database import pool_options
+
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 17)
+    monkeypatch.setattr(settings, "DB_POOL_USE_LIFO", True)
+    options = pool_options("postgresql://u:p@db/calc", QueuePool)
+    assert options["pool_size"] == 17
+    assert options["pool_use_lifo"] is True
+    assert options["poolclass"] is QueuePool
+    assert pool_options("sqlite:///:memory:", QueuePool) == {}
+
+
+def test_timed_pool_records_checkout_waits():
+    """Test checkout wait times and pool usage are reported."""
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.pool import QueuePool
+    from app.database import pool_stats, timed_pool_class
+
+    pool_class = timed_pool_class(QueuePool)
+    test_engine = create_engine("sqlite:///./test_pool.db", poolclass=pool_class, pool_size=2, max_overflow=0)
+    try:
+        with test_engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            stats = pool_stats(test_engine)
+            assert stats["checked_out"] == 1
+            assert stats["size"] == 2
+        stats = pool_stats(test_engine)
+        assert stats["checked_out"] == 0
+        assert stats["checkout_wait_seconds"]["count"] == 1
+        assert stats["checkout_wait_seconds"]["buckets"]["+Inf"] == 1
+    finally:
+        test_engine.dispose()
+        import os
+        if os.path.exists("./test_pool.db"):
+            os.remove("./test_pool.db")
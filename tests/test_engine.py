@@ -0,0 +1,133 @@
+"""
+Unit tests for the calculation engine (scalar and vectorized evaluation)
+"""
+import numpy as np
+import pytest
+from app import engine
+from app.engine import CalculationError, calculate, evaluate_batch
+
+
+class TestScalarEngine:
+    """Unit tests for engine.calculate"""
+
+    def test_calculate_operations(self):
+        """Test every supported operation"""
+        assert calculate("add", 10, 5) == 15
+        assert calculate("subtract", 10, 5) == 5
+        assert calculate("multiply", 10, 5) == 50
+        assert calculate("divide", 10, 5) == 2
+        assert calculate("power", 2, 8) == 256
+        assert calculate("modulus", 17, 5) == 2
+        assert calculate("sqrt", 144, 0) == 12
+
+    @pytest.mark.parametrize("operation,operand1,operand2,message", [
+        ("divide", 1, 0, "Division by zero"),
+        ("modulus", 1, 0, "Modulus by zero"),
+        ("sqrt", -1, 0, "negative"),
+        ("power", 10.0, 1000.0, "Power calculation error"),
+        ("power", 0.0, -1.0, "not a finite real number"),
+        ("power", -8.0, 0.5, "not a finite real number"),
+        ("multiply", 1e308, 10.0, "out of range"),
+        ("add", 1.7e308, 1.7e308, "out of range"),
+        ("divide", 1e308, 1e-10, "out of range"),
+        ("unknown", 1, 1, "Invalid operation"),
+    ])
+    def test_calculate_errors(self, operation, operand1, operand2, message):
+        """Test that invalid inputs raise CalculationError"""
+        with pytest.raises(CalculationError) as exc_info:
+            calculate(operation, operand1, operand2)
+        assert message in str(exc_info.value)
+
+
+class TestVectorizedEngine:
+    """Unit tests for engine.evaluate_batch"""
+
+    def test_matches_scalar_path(self):
+        """Test vectorized results agree with the scalar evaluator"""
+        rng = np.random.default_rng(42)
+        a = rng.uniform(1, 100, 200)
+        b = rng.uniform(1, 5, 200)
+        ops = [engine.OPERATIONS[i % len(engine.OPERATIONS)] for i in range(200)]
+
+        evaluation = evaluate_batch(ops, a, b)
+
+        assert evaluation.ok.all()
+        expected = [calculate(op, x, y) for op, x, y in zip(ops, a, b)]
+        np.testing.assert_allclose(evaluation.results, expected)
+
+    def test_error_masks(self):
+        """Test that failing rows come back as error codes, not exceptions"""
+        evaluation = evaluate_batch(
+            ["divide", "modulus", "sqrt", "power", "add", "bogus"],
+            [1, 1, -4, 10, 1, 1],
+            [0, 0, 0, 1000, 2, 1],
+        )
+        assert evaluation.errors.tolist() == [
+            engine.DIVISION_BY_ZERO,
+            engine.MODULUS_BY_ZERO,
+            engine.NEGATIVE_SQRT,
+            engine.POWER_ERROR,
+            engine.OK,
+            engine.INVALID_OPERATION,
+        ]
+        assert evaluation.ok.tolist() == [False, False, False, False, True, False]
+        assert evaluation.results[4] == 3
+        assert np.isnan(evaluation.results[0])
+        assert "Division by zero" in evaluation.error_message(0)
+        assert evaluation.error_message(4) is None
+
+    def test_overflow_is_an_error(self):
+        """Test that results overflowing to inf are flagged for every operation"""
+        evaluation = evaluate_batch(
+            ["add", "subtract", "multiply", "divide", "multiply"],
+            [1.7e308, -1.7e308, 1e308, 1e308, 2],
+            [1.7e308, 1.7e308, 10, 1e-10, 3],
+        )
+        assert evaluation.errors.tolist() == [engine.OVERFLOW] * 4 + [engine.OK]
+        assert np.isnan(evaluation.results[:4]).all()
+        assert evaluation.results[4] == 6
+        assert "out of range" in evaluation.error_message(2)
+
+    def test_empty_input(self):
+        """Test evaluating zero rows"""
+        evaluation = evaluate_batch([], [], [])
+        assert evaluation.results.shape == (0,)
+
+    def test_mismatched_lengths(self):
+        """Test that columns of different lengths are rejected"""
+        with pytest.raises(ValueError):
+            evaluate_batch(["add"], [1, 2], [1])
+
+
+class TestResultCache:
+    """Unit tests for engine.calculate_cached"""
+
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self, monkeypatch):
+        monkeypatch.setattr(engine.settings, "CALCULATION_CACHE_OPERATIONS", ["power", "divide"])
+        engine.result_cache.clear()
+        yield
+        engine.result_cache.clear()
+
+    def test_repeated_inputs_hit_cache(self):
+        """Test that identical inputs are served from the cache"""
+        assert engine.calculate_cached("power", 2.0, 10.0) == 1024
+        assert engine.calculate_cached("power", 2.0, 10.0) == 1024
+        stats = engine.result_cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["size"] == 1
+
+    def test_errors_are_cached(self):
+        """Test that failing inputs are cached and re-raised"""
+        for _ in range(3):
+            with pytest.raises(CalculationError) as exc_info:
+                engine.calculate_cached("divide", 1.0, 0.0)
+            assert "Division by zero" in str(exc_info.value)
+        assert engine.result_cache.stats()["hits"] == 2
+
+    def test_disabled_operations_bypass_cache(self):
+        """Test that operations not enabled for caching are computed directly"""
+        assert engine.calculate_cached("add", 1.0, 2.0) == 3
+        assert engine.result_cache.stats()["misses"] == 0
+        assert len(engine.result_cache) == 0
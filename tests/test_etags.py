@@ -0,0 +1,114 @@
+from app import rollup
+from app.versions import matches
+
+
+def add(client, operand1=1, operand2=2):
+    return client.post("/calculations/", json={"operation": "add", "operand1": operand1, "operand2": operand2}).json()
+
+
+class TestMatching:
+    """Tests for If-None-Match parsing."""
+
+    def test_lists_weak_and_wildcard(self):
+        """Any listed tag, its weak form, or * matches."""
+        assert matches('"a", "b"', '"b"')
+        assert matches('W/"b"', '"b"')
+        assert matches("*", '"b"')
+        assert not matches('"a"', '"b"')
+
+
+class TestConditionalGet:
+    """Tests for ETags on calculation reads."""
+
+    def test_unchanged_list_is_not_modified(self, authenticated_client):
+        """A matching If-None-Match gets an empty 304 with the same tag."""
+        add(authenticated_client)
+        first = authenticated_client.get("/calculations/")
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "private, no-cache"
+
+        second = authenticated_client.get("/calculations/", headers={"If-None-Match": etag})
+
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == etag
+
+    def test_not_modified_skips_queries(self, authenticated_client, sql_statements):
+        """A 304 reads only the version, not the calculations or the rollup."""
+        add(authenticated_client)
+        for url in ("/calculations/", "/calculations/stats"):
+            etag = authenticated_client.get(url).headers["etag"]
+            with sql_statements() as executed:
+                response = authenticated_client.get(url, headers={"If-None-Match": etag})
+
+            assert response.status_code == 304
+            assert not any("FROM calculations" in statement for statement, _ in executed)
+            assert not any("calculation_rollups" in statement for statement, _ in executed)
+
+    def test_every_write_changes_the_tag(self, authenticated_client):
+        """Create, batch, import, edit and delete each invalidate the stats tag."""
+        created = add(authenticated_client)
+        writes = [
+            lambda: add(authenticated_client),
+            lambda: authenticated_client.post("/calculations/batch", json=[{"operation": "add", "operand1": 1, "operand2": 1}]),
+            lambda: authenticated_client.post(
+                "/calculations/import",
+                content=b'{"operation": "add", "operand1": 2, "operand2": 2}\n',
+                headers={"Content-Type": "application/x-ndjson"}
+            ),
+            lambda: authenticated_client.put(f"/calculations/{created['id']}", json={"operand1": 5}),
+            lambda: authenticated_client.delete(f"/calculations/{created['id']}"),
+        ]
+        for write in writes:
+            etag = authenticated_client.get("/calculations/stats").headers["etag"]
+            write()
+            response = authenticated_client.get("/calculations/stats", headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.headers["etag"] != etag
+
+    def test_failed_edit_keeps_the_tag(self, authenticated_client):
+        """A rejected write leaves the version alone."""
+        created = add(authenticated_client)
+        etag = authenticated_client.get(f"/calculations/{created['id']}").headers["etag"]
+
+        authenticated_client.put(f"/calculations/{created['id']}", json={"operation": "divide", "operand2": 0})
+
+        response = authenticated_client.get(f"/calculations/{created['id']}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    def test_tags_differ_per_url(self, authenticated_client):
+        """Query parameters are part of the tag."""
+        add(authenticated_client)
+        first = authenticated_client.get("/calculations/stats?limit=1").headers["etag"]
+        second = authenticated_client.get("/calculations/stats?limit=2").headers["etag"]
+        assert first != second
+        assert authenticated_client.get("/calculations/stats?limit=2", headers={"If-None-Match": first}).status_code == 200
+
+    def test_tags_differ_per_user(self, client, authenticated_client, test_user2):
+        """Another user's tag does not match, even at the same version."""
+        etag = authenticated_client.get("/calculations/").headers["etag"]
+        client.post("/users/register", json=test_user2)
+        token = client.post("/users/login", json={
+            "username": test_user2["username"], "password": test_user2["password"]
+        }).json()["access_token"]
+
+        response = client.get("/calculations/", headers={
+            "Authorization": f"Bearer {token}", "If-None-Match": etag
+        })
+
+        assert response.status_code == 200
+
+    def test_not_found_carries_no_tag(self, authenticated_client):
+        """Error responses are not tagged, so they cannot be revalidated."""
+        response = authenticated_client.get("/calculations/999")
+        assert response.status_code == 404
+        assert "etag" not in response.headers
+
+    def test_rollup_rebuild_changes_the_tag(self, authenticated_client, rebuild):
+        """Stats recomputed by a rebuild are not revalidated."""
+        add(authenticated_client)
+        etag = authenticated_client.get("/calculations/stats").headers["etag"]
+
+        rebuild(rollup)
+
+        assert authenticated_client.get("/calculations/stats", headers={"If-None-Match": etag}).status_code == 200
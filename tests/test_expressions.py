@@ -0,0 +1,135 @@
+"""
+Unit and Integration tests for expression evaluation
+"""
+import math
+import pytest
+from fastapi import status
+from app.engine import CalculationError
+from app.expressions import ExpressionError, compile_expression, plan_cache
+
+
+class TestExpressionCompiler:
+    """Unit tests for the expression compiler"""
+
+    @pytest.mark.parametrize("expression,variables,expected", [
+        ("1 + 2 * 3", {}, 7),
+        ("(1 + 2) * 3", {}, 9),
+        ("2 ^ 3 ^ 2", {}, 512),
+        ("-2 ^ 2", {}, -4),
+        ("17 % 5", {}, 2),
+        ("sqrt(16) + .5", {}, 4.5),
+        ("(a+b)^2 / sqrt(c)", {"a": 1, "b": 2, "c": 9}, 3),
+        ("x * -y", {"x": 3, "y": 4}, -12),
+        ("1e3 / 4", {}, 250),
+    ])
+    def test_evaluate(self, expression, variables, expected):
+        """Test operator precedence, associativity and functions"""
+        assert math.isclose(compile_expression(expression).evaluate(variables), expected)
+
+    @pytest.mark.parametrize("expression", ["", "1 +", "(1 + 2", "1 2", "sqrt 4", "2 $ 3", "* 3"])
+    def test_syntax_errors(self, expression):
+        """Test that malformed expressions are rejected"""
+        with pytest.raises(ExpressionError):
+            compile_expression(expression)
+
+    def test_missing_variable(self):
+        """Test evaluation without a required variable"""
+        with pytest.raises(ExpressionError) as exc_info:
+            compile_expression("a + b").evaluate({"a": 1})
+        assert "b" in str(exc_info.value)
+
+    def test_calculation_errors_propagate(self):
+        """Test that engine errors surface from evaluation"""
+        with pytest.raises(CalculationError):
+            compile_expression("1 / (a - a)").evaluate({"a": 3})
+
+    @pytest.mark.parametrize("expression", ["0^-1", "(0-8)^0.5"])
+    def test_non_real_powers(self, expression):
+        """Test that powers without a real result raise CalculationError"""
+        with pytest.raises(CalculationError):
+            compile_expression(expression).evaluate({})
+
+    def test_out_of_range_literal(self):
+        """Test that literals overflowing to inf are rejected at compile time"""
+        with pytest.raises(ExpressionError):
+            compile_expression("1e400 - 1")
+
+    def test_non_finite_results(self):
+        """Test that evaluation never returns inf or NaN"""
+        with pytest.raises(CalculationError):
+            compile_expression("a * 10").evaluate({"a": 1e308})
+        with pytest.raises(ExpressionError):
+            compile_expression("a").evaluate({"a": math.inf})
+
+    def test_plan_cache_reuses_normalized_text(self):
+        """Test that expressions differing only in whitespace reuse the cached plan"""
+        plan_cache.clear()
+        first = compile_expression("a  +   b")
+        second = compile_expression(" a + b ")
+        third = compile_expression("a+b")
+        assert first is second is third
+        assert first.expression == "a + b"
+        assert plan_cache.stats()["hits"] == 2
+        assert plan_cache.stats()["misses"] == 1
+
+    def test_plan_cache_is_bounded(self):
+        """Test that the plan cache evicts old entries"""
+        plan_cache.clear()
+        for i in range(plan_cache.maxsize + 5):
+            compile_expression(f"x + {i}")
+        assert len(plan_cache) == plan_cache.maxsize
+        assert plan_cache.stats()["evictions"] == 5
+
+
+class TestExpressionEndpoints:
+    """Integration tests for /expressions"""
+
+    def test_evaluate_and_store(self, authenticated_client):
+        """Test evaluating and persisting an expression"""
+        response = authenticated_client.post("/expressions/", json={
+            "expression": "(a+b)^2 / sqrt(c)",
+            "variables": {"a": 1, "b": 2, "c": 9, "unused": 5}
+        })
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        assert data["result"] == 3
+        assert data["variables"] == {"a": 1, "b": 2, "c": 9}
+
+        history = authenticated_client.get("/expressions/")
+        assert history.status_code == status.HTTP_200_OK
+        assert [item["id"] for item in history.json()] == [data["id"]]
+
+    def test_invalid_expression(self, authenticated_client):
+        """Test syntax errors return 400"""
+        response = authenticated_client.post("/expressions/", json={"expression": "1 +"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_division_by_zero(self, authenticated_client):
+        """Test engine errors return 400"""
+        response = authenticated_client.post("/expressions/", json={"expression": "1 / 0"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Division by zero" in response.json()["detail"]
+
+    @pytest.mark.parametrize("expression", ["0^-1", "(0-8)^0.5"])
+    def test_non_real_power(self, authenticated_client, expression):
+        """Test powers without a real result return 400 and are not stored"""
+        response = authenticated_client.post("/expressions/", json={"expression": expression})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Power calculation error" in response.json()["detail"]
+        assert authenticated_client.get("/expressions/").json() == []
+
+    @pytest.mark.parametrize("payload", [
+        {"expression": "1e400"},
+        {"expression": "a * 10", "variables": {"a": 1e308}},
+    ])
+    def test_out_of_range(self, authenticated_client, payload):
+        """Test non-finite literals and results return 400 and are not stored"""
+        response = authenticated_client.post("/expressions/", json=payload)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "out of range" in response.json()["detail"]
+        assert authenticated_client.get("/expressions/").json() == []
+
+    def test_unauthenticated(self, client):
+        """Test the endpoint requires authentication"""
+        response = client.post("/expressions/", json={"expression": "1 + 1"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
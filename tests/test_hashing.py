@@ -0,0 +1,85 @@
+"""
+Unit and Integration tests for the password hashing executor
+"""
+import asyncio
+import threading
+import pytest
+from fastapi import status
+from app import hashing
+from app.hashing import HasherBusy, PasswordHasher
+
+
+@pytest.fixture
+def hasher():
+    pool = PasswordHasher(workers=1, max_queue=10)
+    yield pool
+    pool.shutdown()
+
+
+def test_hash_and_verify(hasher):
+    """Test hashing and verification run on the pool"""
+    async def run():
+        hashed = await hasher.hash("secret-password")
+        return await hasher.verify("secret-password", hashed), await hasher.verify("wrong", hashed)
+
+    assert asyncio.run(run()) == (True, False)
+    stats = hasher.stats()
+    assert stats["completed"] == 3
+    assert stats["hash_latency_seconds"]["count"] == 3
+
+
+def test_login_served_before_registration(hasher):
+    """Test queued logins run before queued registrations"""
+    gate = threading.Event()
+    order = []
+
+    async def run():
+        blocker = asyncio.ensure_future(hasher.run(gate.wait))
+        await asyncio.sleep(0.05)  # the only worker is now blocked
+        tasks = [
+            asyncio.ensure_future(hasher.run(order.append, "register", priority=hashing.REGISTRATION)),
+            asyncio.ensure_future(hasher.run(order.append, "change", priority=hashing.PASSWORD_CHANGE)),
+            asyncio.ensure_future(hasher.run(order.append, "login", priority=hashing.LOGIN)),
+        ]
+        await asyncio.sleep(0.05)
+        gate.set()
+        await asyncio.gather(blocker, *tasks)
+
+    asyncio.run(run())
+    assert order == ["login", "change", "register"]
+
+
+def test_full_queue_fails_fast(hasher):
+    """Test that work beyond max_queue is rejected immediately"""
+    hasher.max_queue = 1
+    gate = threading.Event()
+
+    async def run():
+        blocker = asyncio.ensure_future(hasher.run(gate.wait))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(hasher.run(len, "x"))
+        await asyncio.sleep(0)
+        with pytest.raises(HasherBusy):
+            await hasher.run(len, "y")
+        gate.set()
+        await asyncio.gather(blocker, queued)
+
+    asyncio.run(run())
+    assert hasher.stats()["rejected"] == 1
+
+
+def test_errors_propagate(hasher):
+    """Test exceptions raised on a hashing thread reach the caller"""
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(hasher.run(fail))
+
+
+def test_busy_hasher_returns_503(client, test_user, monkeypatch):
+    """Test that a saturated hasher answers 503 before any hashing"""
+    monkeypatch.setattr(hashing.password_hasher, "max_queue", 0)
+    response = client.post("/users/register", json=test_user)
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+from app.models import Calculation, User
+from tests.conftest import query_plan
+
+ROWS = [
+    # (operation, operand1, operand2, result)
+    ("add", 1, 2, 3),
+    ("multiply", 4, 5, 20),
+    ("add", 10, -3, 7),
+    ("divide", 9, 3, 3),
+    ("power", 2, 10, 1024),
+    ("add", -5, 1, -4),
+]
+
+
+def add_rows(db_session):
+    """Insert ROWS for testuser, one hour apart from 2024-01-01 00:00."""
+    owner = db_session.query(User).filter_by(username="testuser").one().id
+    start = datetime(2024, 1, 1)
+    db_session.add_all(
+        Calculation(operation=op, operand1=a, operand2=b, result=r, user_id=owner,
+                    created_at=start + timedelta(hours=index))
+        for index, (op, a, b, r) in enumerate(ROWS)
+    )
+    db_session.commit()
+
+
+def results(client, **params):
+    response = client.get("/calculations/", params=params)
+    assert response.status_code == 200, response.text
+    return [row["result"] for row in response.json()]
+
+
+def browse_plan(client, sql_statements, **params):
+    with sql_statements() as executed:
+        client.get("/calculations/", params=params)
+    return query_plan(*next(item for item in executed if "FROM calculations" in item[0]))
+
+
+class TestFilters:
+    """Tests for filter parameters of /calculations/."""
+
+    def test_operation(self, authenticated_client, db_session):
+        """Only the requested operation is returned, in history order."""
+        add_rows(db_session)
+        assert results(authenticated_client, operation="add") == [3, 7, -4]
+
+    def test_created_range(self, authenticated_client, db_session):
+        """created_after is inclusive, created_before exclusive; offsets are converted to UTC."""
+        add_rows(db_session)
+        assert results(authenticated_client, created_after="2024-01-01T01:00:00", created_before="2024-01-01T03:00:00") == [20, 7]
+        assert results(authenticated_client, created_after="2024-01-01T06:00:00+05:00") == [20, 7, 3, 1024, -4]
+
+    def test_value_ranges(self, authenticated_client, db_session):
+        """Result and operand bounds are inclusive and combine with each other."""
+        add_rows(db_session)
+        assert results(authenticated_client, min_result=3, max_result=20) == [3, 20, 7, 3]
+        assert results(authenticated_client, min_operand1=2, max_operand2=3) == [7, 3]
+        assert results(authenticated_client, operation="add", min_result=0) == [3, 7]
+
+    def test_invalid_parameters(self, authenticated_client):
+        """Unknown operations, sort keys and orders are rejected."""
+        for params in ({"operation": "log"}, {"sort": "operand1"}, {"order": "up"}, {"min_result": "x"}):
+            assert authenticated_client.get("/calculations/", params=params).status_code == 422
+
+
+class TestSorting:
+    """Tests for sort keys and directions of /calculations/."""
+
+    def test_sort_by_result(self, authenticated_client, db_session):
+        """Results sort both ways, ties broken by id."""
+        add_rows(db_session)
+        assert results(authenticated_client, sort="result") == [-4, 3, 3, 7, 20, 1024]
+        assert results(authenticated_client, sort="result", order="desc") == [1024, 20, 7, 3, 3, -4]
+
+    def test_newest_first(self, authenticated_client, db_session):
+        """Descending created_at lists the newest rows first."""
+        add_rows(db_session)
+        assert results(authenticated_client, order="desc", limit=2) == [-4, 1024]
+
+    def test_cursor_pages_follow_sort_and_filters(self, authenticated_client, db_session):
+        """Cursors walk a filtered, descending result sort forwards and back."""
+        add_rows(db_session)
+        params = {"sort": "result", "order": "desc", "max_result": 100, "limit": 2}
+
+        first = authenticated_client.get("/calculations/", params=params)
+        second = authenticated_client.get("/calculations/", params={**params, "cursor": first.headers["x-next-cursor"]})
+        third = authenticated_client.get("/calculations/", params={**params, "cursor": second.headers["x-next-cursor"]})
+        back = authenticated_client.get("/calculations/", params={**params, "cursor": third.headers["x-prev-cursor"]})
+
+        assert [row["result"] for row in first.json()] == [20, 7]
+        assert [row["result"] for row in second.json()] == [3, 3]
+        assert [row["result"] for row in third.json()] == [-4]
+        assert "x-next-cursor" not in third.headers
+        assert [row["result"] for row in back.json()] == [3, 3]
+        assert "max_result=100" in second.headers["link"]
+
+    def test_cursor_from_another_sort_is_rejected(self, authenticated_client, db_session):
+        """A cursor only continues the sort it was issued for."""
+        add_rows(db_session)
+        cursor = authenticated_client.get("/calculations/?limit=2").headers["x-next-cursor"]
+
+        response = authenticated_client.get("/calculations/", params={"cursor": cursor, "sort": "result", "limit": 2})
+
+        assert response.status_code == 400
+
+
+class TestFilterPlans:
+    """Filters and sorts compile to index range scans, not table scans and sorts."""
+
+    def test_operation_filter_uses_operation_index(self, authenticated_client, db_session, sql_statements):
+        add_rows(db_session)
+        plan = browse_plan(authenticated_client, sql_statements, operation="add", order="desc", limit=2)
+        assert "ix_calculations_user_id_operation" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_result_sort_uses_result_index(self, authenticated_client, db_session, sql_statements):
+        add_rows(db_session)
+        plan = browse_plan(authenticated_client, sql_statements, sort="result", order="desc", min_result=0, limit=2)
+        assert "ix_calculations_user_id_result_id" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_created_range_uses_history_index(self, authenticated_client, db_session, sql_statements):
+        add_rows(db_session)
+        plan = browse_plan(authenticated_client, sql_statements, created_after="2024-01-01T01:00:00", min_operand1=0, limit=2)
+        assert "ix_calculations_user_id_created_at_id" in plan
+        assert "SCAN calculations" not in plan
@@ -0,0 +1,105 @@
+"""
+Integration tests for streaming NDJSON ingestion
+"""
+import json
+import pytest
+from fastapi import status
+from app.config import settings
+from app.models import Calculation
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+def ndjson(items):
+    return "\n".join(json.dumps(item) for item in items) + "\n"
+
+
+def events(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+class TestNDJSONIngestion:
+    """Tests for POST /calculations/import"""
+
+    def test_ingest_commits_in_chunks(self, authenticated_client, db_session, monkeypatch):
+        """Test that rows are committed per chunk with progress events"""
+        monkeypatch.setattr(settings, "INGEST_CHUNK_SIZE", 4)
+        body = ndjson({"operation": "add", "operand1": i, "operand2": 1} for i in range(10))
+
+        response = authenticated_client.post("/calculations/import", content=body, headers=NDJSON)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        result = events(response)
+        progress = [e for e in result if e["event"] == "progress"]
+        assert [p["inserted"] for p in progress] == [4, 8, 10]
+        assert result[-1] == {"event": "summary", "lines": 10, "inserted": 10, "failed": 0}
+        assert db_session.query(Calculation).count() == 10
+
+    def test_ingest_reports_line_errors(self, authenticated_client, db_session):
+        """Test invalid and failing lines are reported by line number"""
+        body = "\n".join([
+            json.dumps({"operation": "add", "operand1": 1, "operand2": 2}),
+            "not json",
+            "",
+            json.dumps({"operation": "divide", "operand1": 1, "operand2": 0}),
+            json.dumps({"operation": "bogus", "operand1": 1, "operand2": 2}),
+            json.dumps({"operation": "sqrt", "operand1": 81, "operand2": 0}),
+        ])
+
+        response = authenticated_client.post("/calculations/import", content=body, headers=NDJSON)
+
+        result = events(response)
+        errors = {e["line"]: e["error"] for e in result if e["event"] == "error"}
+        assert set(errors) == {2, 4, 5}
+        assert "Division by zero" in errors[4]
+        assert result[-1] == {"event": "summary", "lines": 6, "inserted": 2, "failed": 3}
+        results = sorted(c.result for c in db_session.query(Calculation).all())
+        assert results == [3, 9]
+
+    def test_ingest_error_reporting_is_capped(self, authenticated_client, monkeypatch):
+        """Test that only INGEST_MAX_REPORTED_ERRORS errors are listed"""
+        monkeypatch.setattr(settings, "INGEST_MAX_REPORTED_ERRORS", 2)
+        body = "\n".join(["{}"] * 5)
+
+        response = authenticated_client.post("/calculations/import", content=body, headers=NDJSON)
+
+        result = events(response)
+        assert len([e for e in result if e["event"] == "error"]) == 2
+        assert result[-1]["failed"] == 5
+
+    def test_ingest_aborts_on_oversized_line(self, authenticated_client, monkeypatch):
+        """Test that a line without a newline cannot grow the buffer unbounded"""
+        monkeypatch.setattr(settings, "INGEST_MAX_LINE_BYTES", 32)
+        body = json.dumps({"operation": "add", "operand1": 1, "operand2": 2}) + "\n" + "x" * 100
+
+        response = authenticated_client.post("/calculations/import", content=body, headers=NDJSON)
+
+        result = events(response)
+        assert result[-1]["event"] == "aborted"
+
+    def test_ingest_aborts_on_oversized_complete_line(self, authenticated_client, monkeypatch):
+        """Test that a terminated line over the limit is rejected too, after the lines before it"""
+        monkeypatch.setattr(settings, "INGEST_MAX_LINE_BYTES", 64)
+        line = json.dumps({"operation": "add", "operand1": 1, "operand2": 2})
+        oversized = json.dumps({"operation": "add", "operand1": 1, "operand2": 2, "note": "x" * 100})
+        body = "\n".join([line, oversized, line]) + "\n"
+
+        response = authenticated_client.post("/calculations/import", content=body, headers=NDJSON)
+
+        result = events(response)
+        assert result[-1]["event"] == "aborted"
+        assert "Line 2" in result[-1]["error"]
+        assert result[-1]["lines"] == 1
+        assert result[-1]["inserted"] == 1
+        assert len(authenticated_client.get("/calculations/").json()) == 1
+
+    def test_ingest_requires_ndjson(self, authenticated_client):
+        """Test that other content types are rejected"""
+        response = authenticated_client.post("/calculations/import", json=[])
+        assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+    def test_ingest_unauthenticated(self, client):
+        """Test ingestion requires authentication"""
+        response = client.post("/calculations/import", content="", headers=NDJSON)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -17,3 +17,15 @@ def test_health_check(client):
     
     assert response.status_code == status.HTTP_200_OK
     assert response.json()["status"] == "healthy"
+
+
+def test_metrics(client):
+    """Test metrics endpoint exposes cache statistics."""
+    response = client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    for key in ("hits", "misses", "evictions", "size"):
+        assert key in data["calculation_cache"]
+    assert "expression_plan_cache" in data
+    assert "checked_out" in data["database_pool"]["async"]
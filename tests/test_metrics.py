@@ -0,0 +1,24 @@
+"""
+Unit tests for metrics primitives
+"""
+from app.metrics import Histogram
+
+
+def test_histogram_cumulative_buckets():
+    """Test observations land in cumulative upper-bound buckets"""
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"0.1": 2, "1.0": 3, "+Inf": 4}
+    assert snapshot["count"] == 4
+    assert snapshot["sum"] == 3.65
+
+
+def test_histogram_reset():
+    """Test reset clears observations"""
+    histogram = Histogram(buckets=(1.0,))
+    histogram.observe(0.5)
+    histogram.reset()
+    assert histogram.snapshot() == {"buckets": {"1.0": 0, "+Inf": 0}, "count": 0, "sum": 0.0}
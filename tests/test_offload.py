@@ -0,0 +1,93 @@
+"""
+Unit and Integration tests for the process-pool offload tier
+"""
+import pytest
+from fastapi import status
+from app import offload
+
+
+def spin_forever():
+    """CPU-bound task that never finishes on its own."""
+    while True:
+        pass
+
+
+@pytest.fixture
+def pool():
+    test_pool = offload.OffloadPool(workers=1, max_pending=2)
+    yield test_pool
+    test_pool.shutdown()
+
+
+def test_budget_enforced_in_process():
+    """Test that the SIGPROF budget interrupts a runaway task"""
+    assert offload._run_with_budget(spin_forever, (), 0.05) == ("budget", None)
+
+
+def test_worker_reports_engine_errors():
+    """Test that engine errors are returned, not raised, by the worker"""
+    status_code, message = offload._run_with_budget(offload.engine.calculate, ("divide", 1.0, 0.0), 1.0)
+    assert status_code == "error"
+    assert "Division by zero" in message
+
+
+def test_pool_runs_calculation(pool):
+    """Test evaluating a calculation in a child process"""
+    assert pool.run(offload.engine.calculate, ("power", 2.0, 10.0), 1.0) == 1024
+    assert pool.stats()["submitted"] == 1
+    assert pool.stats()["pending"] == 0
+
+
+def test_pool_budget_exceeded(pool):
+    """Test that a runaway task is stopped and reported as a calculation error"""
+    with pytest.raises(offload.CPUBudgetExceeded):
+        pool.run(spin_forever, (), 0.2)
+    assert pool.stats()["budget_exceeded"] == 1
+
+
+def test_pool_rejects_when_saturated(pool):
+    """Test that work beyond max_pending is rejected immediately"""
+    pool.max_pending = 0
+    with pytest.raises(offload.OffloadUnavailable):
+        pool.run(offload.engine.calculate, ("power", 2.0, 2.0), 1.0)
+    assert pool.stats()["rejected"] == 1
+
+
+def test_light_operations_run_inline(monkeypatch):
+    """Test that non-heavy operations never touch the pool"""
+    def fail(*args):
+        raise AssertionError("pool should not be used")
+    monkeypatch.setattr(offload.pool, "run", fail)
+    assert offload.calculate("add", 1.0, 2.0) == 3
+    assert offload.calculate("power", 2.0, 10.0) == 1024
+
+
+def test_offload_is_opt_in(monkeypatch):
+    """Test that only operations given a CPU budget are offloaded"""
+    assert not offload.is_heavy("power")
+    monkeypatch.setattr(offload.settings, "OFFLOAD_CPU_BUDGETS", {"power": 1.0})
+    assert offload.is_heavy("power")
+
+
+def test_saturated_pool_returns_503(authenticated_client, monkeypatch):
+    """Test that the API answers 503 when the pool queue is full"""
+    monkeypatch.setattr(offload.engine.settings, "CALCULATION_CACHE_OPERATIONS", [])
+    monkeypatch.setattr(offload.settings, "OFFLOAD_CPU_BUDGETS", {"power": 1.0})
+    monkeypatch.setattr(offload.pool, "max_pending", 0)
+    response = authenticated_client.post(
+        "/calculations/",
+        json={"operation": "power", "operand1": 2, "operand2": 3}
+    )
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_saturated_pool_returns_503_for_expressions(authenticated_client, monkeypatch):
+    """Test that expressions using a heavy operation go through the pool too"""
+    monkeypatch.setattr(offload.engine.settings, "CALCULATION_CACHE_OPERATIONS", [])
+    monkeypatch.setattr(offload.settings, "OFFLOAD_CPU_BUDGETS", {"power": 1.0})
+    monkeypatch.setattr(offload.pool, "max_pending", 0)
+    response = authenticated_client.post("/expressions/", json={"expression": "(1 + 1) ^ 3"})
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "1"
+    assert authenticated_client.get("/expressions/").json() == []
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+from app.models import Calculation, User
+from app.pagination import NEXT, decode_cursor, encode_cursor
+from tests.conftest import query_plan
+
+
+def add_rows(db_session, count, created_at=None):
+    """Insert count rows for testuser, one second apart unless they share created_at."""
+    owner = db_session.query(User).filter_by(username="testuser").one().id
+    start = datetime(2024, 1, 1)
+    db_session.add_all(
+        Calculation(operation="add", operand1=index, operand2=0, result=index, user_id=owner,
+                    created_at=created_at or start + timedelta(seconds=index))
+        for index in range(count)
+    )
+    db_session.commit()
+
+
+def page(client, **params):
+    response = client.get("/calculations/", params=params)
+    assert response.status_code == 200
+    return response, [row["operand1"] for row in response.json()]
+
+
+class TestCursors:
+    """Tests for cursor encoding."""
+
+    def test_round_trip(self):
+        """A cursor decodes to the key it was built from."""
+        moment = datetime(2024, 1, 1, 12, 30, 15, 123456)
+        assert decode_cursor(encode_cursor(NEXT, "created_at", "asc", moment, 42)) == (NEXT, "created_at", "asc", moment, 42)
+        assert decode_cursor(encode_cursor(NEXT, "result", "desc", 2.5, 7)) == (NEXT, "result", "desc", 2.5, 7)
+
+    def test_garbage_is_rejected(self, authenticated_client):
+        """Malformed cursors are a client error."""
+        for cursor in ("not-a-cursor", encode_cursor("x", "created_at", "asc", datetime(2024, 1, 1), 1), "W10"):
+            assert authenticated_client.get("/calculations/", params={"cursor": cursor}).status_code == 400
+
+
+class TestKeysetPagination:
+    """Tests for cursor pagination of /calculations/."""
+
+    def test_walk_forward_and_back(self, authenticated_client, db_session):
+        """Next cursors visit every row once, prev cursors return to earlier pages."""
+        add_rows(db_session, 7)
+
+        first, rows = page(authenticated_client, limit=3)
+        assert rows == [0, 1, 2]
+        assert "x-prev-cursor" not in first.headers
+        second, rows = page(authenticated_client, limit=3, cursor=first.headers["x-next-cursor"])
+        assert rows == [3, 4, 5]
+        third, rows = page(authenticated_client, limit=3, cursor=second.headers["x-next-cursor"])
+        assert rows == [6]
+        assert "x-next-cursor" not in third.headers
+
+        back, rows = page(authenticated_client, limit=3, cursor=third.headers["x-prev-cursor"])
+        assert rows == [3, 4, 5]
+        back, rows = page(authenticated_client, limit=3, cursor=back.headers["x-prev-cursor"])
+        assert rows == [0, 1, 2]
+        assert "x-prev-cursor" not in back.headers
+        assert "x-next-cursor" in back.headers
+
+    def test_ties_are_broken_by_id(self, authenticated_client, db_session):
+        """Rows sharing created_at (e.g. from one batch) are neither repeated nor skipped."""
+        add_rows(db_session, 5, created_at=datetime(2024, 1, 1))
+
+        seen, cursor = [], None
+        while True:
+            response, rows = page(authenticated_client, limit=2, **({"cursor": cursor} if cursor else {}))
+            seen += rows
+            cursor = response.headers.get("x-next-cursor")
+            if not cursor:
+                break
+
+        assert seen == [0, 1, 2, 3, 4]
+
+    def test_inserts_between_pages_do_not_shift_rows(self, authenticated_client, db_session):
+        """A new row does not push an already-seen row onto the next page."""
+        add_rows(db_session, 4)
+        first, _ = page(authenticated_client, limit=2)
+
+        authenticated_client.post("/calculations/", json={"operation": "add", "operand1": 99, "operand2": 0})
+
+        _, rows = page(authenticated_client, limit=2, cursor=first.headers["x-next-cursor"])
+        assert rows == [2, 3]
+
+    def test_link_header(self, authenticated_client, db_session):
+        """The Link header points at the neighbouring pages with the same limit."""
+        add_rows(db_session, 5)
+        first, _ = page(authenticated_client, limit=2)
+        second, _ = page(authenticated_client, limit=2, cursor=first.headers["x-next-cursor"])
+
+        link = second.headers["link"]
+        assert 'rel="next"' in link and 'rel="prev"' in link
+        assert "limit=2" in link
+        assert f"cursor={second.headers['x-next-cursor']}" in link
+
+    def test_deep_page_is_an_index_range_scan(self, authenticated_client, db_session, sql_statements):
+        """A cursor page neither offsets nor sorts: it seeks the index."""
+        add_rows(db_session, 5)
+        first, _ = page(authenticated_client, limit=2)
+        with sql_statements() as executed:
+            page(authenticated_client, limit=2, cursor=first.headers["x-next-cursor"])
+
+        plan = query_plan(*next(item for item in executed if "FROM calculations" in item[0]))
+        assert "ix_calculations_user_id_created_at" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_limit_bounds(self, authenticated_client):
+        """Page sizes are bounded."""
+        assert authenticated_client.get("/calculations/?limit=0").status_code == 422
+        assert authenticated_client.get("/calculations/?limit=1001").status_code == 422
+
+    def test_legacy_skip(self, authenticated_client, db_session):
+        """skip still works, now in a stable order."""
+        add_rows(db_session, 4)
+        response, rows = page(authenticated_client, skip=1, limit=2)
+        assert rows == [1, 2]
+        assert "x-prev-cursor" in response.headers
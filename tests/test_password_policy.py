@@ -0,0 +1,148 @@
+import asyncio
+import pytest
+from fastapi import status
+from passlib.hash import argon2, bcrypt
+from app import auth
+from app.config import settings
+from app.models import User
+from app.routers.users import _rehash_password
+
+
+@pytest.fixture
+def restore_policy(monkeypatch):
+    """Re-apply the configured policy after a test changed settings."""
+    yield
+    monkeypatch.undo()
+    auth.configure_password_hashing()
+
+
+class TestCalibration:
+    """Tests for picking the bcrypt cost."""
+
+    def test_calibration_respects_bounds(self):
+        """Extreme targets are clamped to the configured bounds."""
+        assert auth.calibrate_bcrypt_rounds(1e-9, min_rounds=5, max_rounds=14) == 5
+        assert auth.calibrate_bcrypt_rounds(1e9, min_rounds=5, max_rounds=14) == 14
+
+    def test_calibration_extrapolates_from_probe(self, monkeypatch):
+        """One doubling of the target adds one round."""
+        ticks = iter([0.0, 0.01] * 6)
+        monkeypatch.setattr(auth.time, "perf_counter", lambda: next(ticks))
+
+        assert auth.calibrate_bcrypt_rounds(0.01) == 8
+        assert auth.calibrate_bcrypt_rounds(0.04) == 10
+
+    def test_configure_calibrates_without_pinned_rounds(self, monkeypatch, restore_policy):
+        """Without BCRYPT_ROUNDS the cost comes from calibration."""
+        monkeypatch.setattr(settings, "BCRYPT_ROUNDS", None)
+        monkeypatch.setattr(auth, "calibrate_bcrypt_rounds", lambda target, low, high: 6)
+
+        policy = auth.configure_password_hashing()
+
+        assert policy == {"scheme": "bcrypt", "rounds": 6}
+        assert bcrypt.from_string(auth.get_password_hash("secret")).rounds == 6
+
+
+class TestNeedsRehash:
+    """Tests for detecting hashes that do not match the policy."""
+
+    def test_weaker_and_stronger_hashes(self, monkeypatch, restore_policy):
+        """Both cheaper and costlier bcrypt hashes are flagged."""
+        monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+        auth.configure_password_hashing()
+
+        assert not auth.needs_rehash(bcrypt.using(rounds=5).hash("secret"))
+        assert auth.needs_rehash(bcrypt.using(rounds=4).hash("secret"))
+        assert auth.needs_rehash(bcrypt.using(rounds=6).hash("secret"))
+
+    def test_unknown_scheme(self, monkeypatch, restore_policy):
+        """A misconfigured scheme fails at startup."""
+        monkeypatch.setattr(settings, "PASSWORD_HASH_SCHEME", "md5")
+
+        with pytest.raises(ValueError):
+            auth.configure_password_hashing()
+
+    @pytest.mark.skipif(argon2.has_backend(), reason="argon2-cffi is installed")
+    def test_argon2_requires_backend(self, monkeypatch, restore_policy):
+        """Selecting argon2 without argon2-cffi fails at startup."""
+        monkeypatch.setattr(settings, "PASSWORD_HASH_SCHEME", "argon2")
+
+        with pytest.raises(RuntimeError):
+            auth.configure_password_hashing()
+
+    @pytest.mark.skipif(not argon2.has_backend(), reason="argon2-cffi is not installed")
+    def test_argon2_policy(self, monkeypatch, restore_policy):
+        """With argon2 selected, bcrypt hashes still verify but need a rehash."""
+        monkeypatch.setattr(settings, "PASSWORD_HASH_SCHEME", "argon2")
+        monkeypatch.setattr(settings, "ARGON2_MEMORY_COST", 1024)
+        monkeypatch.setattr(settings, "ARGON2_TIME_COST", 1)
+        monkeypatch.setattr(settings, "ARGON2_PARALLELISM", 1)
+        auth.configure_password_hashing()
+        legacy = bcrypt.using(rounds=4).hash("secret")
+
+        assert auth.verify_password("secret", legacy)
+        assert auth.needs_rehash(legacy)
+        assert not auth.needs_rehash(auth.get_password_hash("secret"))
+
+
+class TestRehashOnLogin:
+    """Tests for the background rehash after login."""
+
+    def test_login_rehashes_outdated_hash(self, client, test_user, db_session):
+        """A hash with another cost is replaced after a successful login."""
+        client.post("/users/register", json=test_user)
+        user = db_session.query(User).filter_by(username=test_user["username"]).one()
+        user.hashed_password = bcrypt.using(rounds=5).hash(test_user["password"])
+        db_session.commit()
+
+        response = client.post("/users/login", json={
+            "username": test_user["username"],
+            "password": test_user["password"]
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        db_session.expire_all()
+        stored = db_session.query(User).filter_by(username=test_user["username"]).one().hashed_password
+        assert bcrypt.from_string(stored).rounds == settings.BCRYPT_ROUNDS
+        assert auth.verify_password(test_user["password"], stored)
+
+    def test_rehash_uses_its_own_session(self, client, test_user, db_session):
+        """The task runs after the request's session is closed, so it must not need it."""
+        client.post("/users/register", json=test_user)
+        user = db_session.query(User).filter_by(username=test_user["username"]).one()
+        outdated = bcrypt.using(rounds=5).hash(test_user["password"])
+        user.hashed_password = outdated
+        db_session.commit()
+
+        asyncio.run(_rehash_password(user.id, user.username, test_user["password"], outdated))
+
+        db_session.expire_all()
+        stored = db_session.query(User).filter_by(username=test_user["username"]).one().hashed_password
+        assert bcrypt.from_string(stored).rounds == settings.BCRYPT_ROUNDS
+
+    def test_login_keeps_current_hash(self, client, test_user, db_session):
+        """A hash that matches the policy is left alone."""
+        client.post("/users/register", json=test_user)
+        before = db_session.query(User).filter_by(username=test_user["username"]).one().hashed_password
+
+        client.post("/users/login", json={
+            "username": test_user["username"],
+            "password": test_user["password"]
+        })
+
+        db_session.expire_all()
+        after = db_session.query(User).filter_by(username=test_user["username"]).one().hashed_password
+        assert after == before
+
+    def test_failed_login_does_not_rehash(self, client, test_user, db_session):
+        """Only a verified password is rehashed."""
+        client.post("/users/register", json=test_user)
+        user = db_session.query(User).filter_by(username=test_user["username"]).one()
+        outdated = bcrypt.using(rounds=5).hash(test_user["password"])
+        user.hashed_password = outdated
+        db_session.commit()
+
+        client.post("/users/login", json={"username": test_user["username"], "password": "wrongpassword"})
+
+        db_session.expire_all()
+        assert db_session.query(User).filter_by(username=test_user["username"]).one().hashed_password == outdated
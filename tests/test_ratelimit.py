@@ -0,0 +1,135 @@
+import asyncio
+import pytest
+from fastapi import status
+from app import ratelimit
+from app.config import settings
+from app.ratelimit import MemoryBackend, RateLimitExceeded, RateLimiter, load_backend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", fake)
+    return fake
+
+
+def acquire(backend, key, capacity=3, period=60):
+    return asyncio.run(backend.acquire(key, capacity, period))
+
+
+class TestMemoryBackend:
+    """Tests for the in-process token buckets."""
+
+    def test_burst_then_reject(self, clock):
+        """A full bucket allows `capacity` attempts, then reports the wait."""
+        backend = MemoryBackend(max_keys=10)
+
+        assert [acquire(backend, "k") for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert acquire(backend, "k") == pytest.approx(20.0)
+
+    def test_refill(self, clock):
+        """Tokens refill evenly over the period."""
+        backend = MemoryBackend(max_keys=10)
+        for _ in range(3):
+            acquire(backend, "k")
+
+        clock.now += 20
+        assert acquire(backend, "k") == 0.0
+        assert acquire(backend, "k") > 0
+
+    def test_keys_are_independent(self, clock):
+        """Exhausting one bucket does not affect another."""
+        backend = MemoryBackend(max_keys=10)
+        for _ in range(4):
+            acquire(backend, "a")
+
+        assert acquire(backend, "b") == 0.0
+
+    def test_bounded_number_of_keys(self, clock):
+        """Least recently used buckets are dropped past max_keys."""
+        backend = MemoryBackend(max_keys=2)
+        for key in ("a", "b", "c"):
+            acquire(backend, key)
+
+        assert len(backend) == 2
+
+
+class TestRateLimiter:
+    """Tests for combining buckets and the backend loader."""
+
+    def test_any_empty_bucket_rejects(self, clock):
+        """An attempt is rejected if any of its buckets is empty."""
+        limiter = RateLimiter(MemoryBackend(max_keys=10))
+        limits = {"user": ("alice", 1), "client": ("1.2.3.4", 5)}
+        asyncio.run(limiter.check("login", limits))
+
+        with pytest.raises(RateLimitExceeded) as exc_info:
+            asyncio.run(limiter.check("login", limits))
+
+        assert exc_info.value.retry_after > 0
+        assert limiter.stats() == {"backend": "MemoryBackend", "allowed": 1, "rejected": 1}
+
+    def test_disabled(self, clock, monkeypatch):
+        """RATE_LIMIT_ENABLED=false lets everything through."""
+        monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+        limiter = RateLimiter(MemoryBackend(max_keys=10))
+
+        for _ in range(5):
+            asyncio.run(limiter.check("login", {"user": ("alice", 1)}))
+
+    def test_load_backend(self):
+        """Backends are selected by dotted path."""
+        assert isinstance(load_backend("app.ratelimit.MemoryBackend"), MemoryBackend)
+
+
+class TestCredentialEndpoints:
+    """Tests for throttling /users/login and /users/register."""
+
+    def test_login_rejected_before_hashing(self, client, test_user, monkeypatch):
+        """Throttled logins get 429 without reaching the password hasher."""
+        monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_PER_USERNAME", 2)
+        client.post("/users/register", json=test_user)
+        credentials = {"username": test_user["username"], "password": "wrongpassword"}
+        for _ in range(2):
+            assert client.post("/users/login", json=credentials).status_code == status.HTTP_401_UNAUTHORIZED
+
+        def fail(*args, **kwargs):
+            raise AssertionError("password hashed for a throttled request")
+
+        monkeypatch.setattr("app.hashing.password_hasher.run", fail)
+        response = client.post("/users/login", json=credentials)
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response.headers["Retry-After"]) >= 1
+
+    def test_login_limited_per_client(self, client, monkeypatch):
+        """Rotating usernames does not evade the per-client bucket."""
+        monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_PER_CLIENT", 3)
+        codes = [
+            client.post("/users/login", json={"username": f"user{i}", "password": "password123"}).status_code
+            for i in range(4)
+        ]
+
+        assert codes == [status.HTTP_401_UNAUTHORIZED] * 3 + [status.HTTP_429_TOO_MANY_REQUESTS]
+
+    def test_registration_limited(self, client, monkeypatch):
+        """Registration has its own per-client bucket."""
+        monkeypatch.setattr(settings, "REGISTRATION_RATE_LIMIT_PER_CLIENT", 2)
+        codes = [
+            client.post("/users/register", json={
+                "username": f"user{i}",
+                "email": f"user{i}@example.com",
+                "password": "password123"
+            }).status_code
+            for i in range(3)
+        ]
+
+        assert codes == [status.HTTP_201_CREATED] * 2 + [status.HTTP_429_TOO_MANY_REQUESTS]
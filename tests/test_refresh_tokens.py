@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+from fastapi import status
+from app.auth import hash_refresh_token
+from app.models import RefreshToken
+
+
+def login(client, test_user):
+    client.post("/users/register", json=test_user)
+    response = client.post("/users/login", json={
+        "username": test_user["username"],
+        "password": test_user["password"]
+    })
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+class TestRefreshTokens:
+    """Tests for refresh token issue, rotation and revocation."""
+
+    def test_login_returns_refresh_token(self, client, test_user, db_session):
+        """Login issues a refresh token and stores only its digest."""
+        tokens = login(client, test_user)
+
+        assert tokens["refresh_token"]
+        stored = db_session.query(RefreshToken).one()
+        assert stored.token_hash == hash_refresh_token(tokens["refresh_token"])
+        assert stored.token_hash != tokens["refresh_token"]
+        assert not stored.revoked
+
+    def test_refresh_issues_working_tokens(self, client, test_user):
+        """A refresh token is exchanged for a new usable pair."""
+        tokens = login(client, test_user)
+
+        response = client.post("/users/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["token_type"] == "bearer"
+        assert data["refresh_token"] != tokens["refresh_token"]
+        me = client.get("/users/me", headers={"Authorization": f"Bearer {data['access_token']}"})
+        assert me.status_code == status.HTTP_200_OK
+        assert me.json()["username"] == test_user["username"]
+
+    def test_refresh_does_not_hash_passwords(self, client, test_user, monkeypatch):
+        """Renewal never touches bcrypt."""
+        tokens = login(client, test_user)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("password hashing used during refresh")
+
+        monkeypatch.setattr("app.hashing.password_hasher.run", fail)
+        response = client.post("/users/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_refresh_token_is_single_use(self, client, test_user):
+        """Reusing a rotated token is rejected and revokes the whole family."""
+        tokens = login(client, test_user)
+        first = client.post("/users/token/refresh", json={"refresh_token": tokens["refresh_token"]}).json()
+
+        reuse = client.post("/users/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+        assert reuse.status_code == status.HTTP_401_UNAUTHORIZED
+
+        # The legitimately rotated token was revoked by the reuse
+        response = client.post("/users/token/refresh", json={"refresh_token": first["refresh_token"]})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_unknown_refresh_token(self, client, db_session):
+        """An unknown token is rejected."""
+        response = client.post("/users/token/refresh", json={"refresh_token": "not-a-token"})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json()["detail"] == "Invalid refresh token"
+
+    def test_expired_refresh_token(self, client, test_user, db_session):
+        """An expired token is rejected."""
+        tokens = login(client, test_user)
+        stored = db_session.query(RefreshToken).one()
+        stored.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db_session.commit()
+
+        response = client.post("/users/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_rotation_prunes_expired_tokens(self, client, test_user, db_session):
+        """Expired rows of the user are deleted when a token is rotated."""
+        stale = login(client, test_user)
+        fresh = client.post("/users/login", json={
+            "username": test_user["username"],
+            "password": test_user["password"]
+        }).json()
+        stale_row = db_session.query(RefreshToken).filter_by(
+            token_hash=hash_refresh_token(stale["refresh_token"])
+        ).one()
+        stale_row.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db_session.commit()
+
+        client.post("/users/token/refresh", json={"refresh_token": fresh["refresh_token"]})
+
+        db_session.expire_all()
+        hashes = {row.token_hash for row in db_session.query(RefreshToken).all()}
+        assert hash_refresh_token(stale["refresh_token"]) not in hashes
+        assert len(hashes) == 2  # the rotated token and its replacement
+
+    def test_password_change_revokes_refresh_tokens(self, client, test_user):
+        """Changing the password signs out every refresh token."""
+        tokens = login(client, test_user)
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        client.put("/users/me/password", headers=headers, json={
+            "current_password": test_user["password"],
+            "new_password": "newpassword456"
+        })
+
+        response = client.post("/users/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
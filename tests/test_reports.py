@@ -387,3 +387,41 @@ class TestStatisticsIntegration:
         stats_after = authenticated_client.get("/calculations/stats")
         data_after = stats_after.json()
         assert data_after["most_used_operation"] == "multiply"
+
+
+class TestStatisticsQueries:
+    """Tests for the cost of the statistics endpoint"""
+
+    def test_stats_use_two_bounded_queries(self, authenticated_client, sql_statements):
+        """Test that stats read the rollup plus one limited recent query"""
+        for i in range(5):
+            authenticated_client.post(
+                "/calculations/",
+                json={"operand1": i, "operand2": 1, "operation": "add"}
+            )
+        authenticated_client.get("/calculations/stats")  # warm the auth caches
+        
+        with sql_statements() as executed:
+            response = authenticated_client.get("/calculations/stats?limit=2")
+        
+        assert response.status_code == 200
+        assert len([statement for statement, _ in executed if "FROM calculation_rollups" in statement]) == 1
+        queries = [statement for statement, _ in executed if "FROM calculations" in statement]
+        assert len(queries) == 1
+        assert "LIMIT" in queries[0]
+
+    def test_stats_zero_average(self, authenticated_client):
+        """Test that an average of zero is reported as 0, not missing"""
+        authenticated_client.post(
+            "/calculations/",
+            json={"operand1": 0, "operand2": 0, "operation": "add"}
+        )
+        
+        data = authenticated_client.get("/calculations/stats").json()
+        assert data["average_operand1"] == 0.0
+        assert data["average_operand2"] == 0.0
+
+    def test_stats_limit_is_bounded(self, authenticated_client):
+        """Test that the recent history size is capped"""
+        response = authenticated_client.get("/calculations/stats?limit=1000")
+        assert response.status_code == 422
@@ -0,0 +1,187 @@
+import asyncio
+from datetime import datetime, timedelta
+from fastapi import status
+from jose import jwt
+from app import revocation
+from app.auth import get_password_hash
+from app.config import settings
+from app.models import User
+from app.revocation import TokenRevocations, revocations
+from tests.conftest import TestingAsyncSessionLocal
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def login(client, test_user):
+    return client.post("/users/login", json={
+        "username": test_user["username"],
+        "password": test_user["password"]
+    }).json()
+
+
+def refresh(tracker):
+    async def run():
+        async with TestingAsyncSessionLocal() as db:
+            await tracker.refresh(db)
+    asyncio.run(run())
+
+
+class TestTokenVersionClaims:
+    """Tests for the uid/ver claims and their checks."""
+
+    def test_login_stamps_version(self, client, test_user):
+        """Issued tokens carry the user id and token version."""
+        client.post("/users/register", json=test_user)
+        claims = jwt.get_unverified_claims(login(client, test_user)["access_token"])
+
+        assert claims["sub"] == test_user["username"]
+        assert claims["ver"] == 0
+        assert isinstance(claims["uid"], int)
+
+    def test_password_change_revokes_access_tokens(self, client, test_user):
+        """Tokens issued before a password change stop working; the returned one works."""
+        client.post("/users/register", json=test_user)
+        old = login(client, test_user)["access_token"]
+        other_session = login(client, test_user)["access_token"]
+
+        response = client.put("/users/me/password", headers=bearer(old), json={
+            "current_password": test_user["password"],
+            "new_password": "newpassword456"
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        new = response.json()["access_token"]
+        assert client.get("/users/me", headers=bearer(old)).status_code == status.HTTP_401_UNAUTHORIZED
+        assert client.get("/users/me", headers=bearer(other_session)).status_code == status.HTTP_401_UNAUTHORIZED
+        assert client.get("/users/me", headers=bearer(new)).status_code == status.HTTP_200_OK
+
+    def test_email_change_keeps_tokens(self, client, test_user):
+        """Changing only the email does not sign the user out."""
+        client.post("/users/register", json=test_user)
+        token = login(client, test_user)["access_token"]
+
+        client.put("/users/me", headers=bearer(token), json={"email": "new@example.com"})
+
+        assert client.get("/users/me", headers=bearer(token)).status_code == status.HTTP_200_OK
+
+    def test_reused_username_does_not_accept_old_token(self, client, test_user, test_user2):
+        """A token of a renamed user is not valid for a new owner of the old name."""
+        client.post("/users/register", json=test_user)
+        token = login(client, test_user)["access_token"]
+        client.put("/users/me", headers=bearer(token), json={"username": "renamed"})
+        test_user2["username"] = test_user["username"]
+        client.post("/users/register", json=test_user2)
+
+        assert client.get("/users/me", headers=bearer(token)).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_revocation_by_another_worker(self, client, test_user, db_session, monkeypatch):
+        """A version bump committed elsewhere is picked up on the next refresh."""
+        client.post("/users/register", json=test_user)
+        token = login(client, test_user)["access_token"]
+        assert client.get("/users/me", headers=bearer(token)).status_code == status.HTTP_200_OK
+
+        # Another worker changes the password; this worker's user cache is still warm
+        user = db_session.query(User).filter_by(username=test_user["username"]).one()
+        user.token_version += 1
+        user.tokens_revoked_at = datetime.utcnow()
+        db_session.commit()
+        clock = revocation.time.monotonic() + settings.TOKEN_REVOCATION_REFRESH_SECONDS + 1
+        monkeypatch.setattr(revocation.time, "monotonic", lambda: clock)
+
+        assert client.get("/users/me", headers=bearer(token)).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_bump_continues_from_the_stored_version(self, client, test_user, db_session):
+        """A version bumped elsewhere is not handed out again from a stale cached user."""
+        client.post("/users/register", json=test_user)
+        token = login(client, test_user)["access_token"]
+        assert client.get("/users/me", headers=bearer(token)).status_code == status.HTTP_200_OK
+
+        # Another worker already issued version 5; this worker's caches still say 0
+        user = db_session.query(User).filter_by(username=test_user["username"]).one()
+        user.token_version = 5
+        db_session.commit()
+
+        response = client.put("/users/me/password", headers=bearer(token), json={
+            "current_password": test_user["password"],
+            "new_password": "newpassword456"
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert jwt.get_unverified_claims(response.json()["access_token"])["ver"] == 6
+        db_session.refresh(user)
+        assert user.token_version == 6
+
+    def test_password_check_uses_the_stored_hash(self, client, test_user, db_session):
+        """The current password is verified against the database, not the cached user."""
+        client.post("/users/register", json=test_user)
+        token = login(client, test_user)["access_token"]
+        assert client.get("/users/me", headers=bearer(token)).status_code == status.HTTP_200_OK
+
+        # Changed by another worker, without revoking this token yet
+        user = db_session.query(User).filter_by(username=test_user["username"]).one()
+        user.hashed_password = get_password_hash("changedelsewhere")
+        db_session.commit()
+
+        stale = client.put("/users/me/password", headers=bearer(token), json={
+            "current_password": test_user["password"],
+            "new_password": "newpassword456"
+        })
+        current = client.put("/users/me/password", headers=bearer(token), json={
+            "current_password": "changedelsewhere",
+            "new_password": "newpassword456"
+        })
+
+        assert stale.status_code == status.HTTP_400_BAD_REQUEST
+        assert current.status_code == status.HTTP_200_OK
+
+    def test_refresh_at_most_once_per_interval(self, authenticated_client):
+        """The revocation query does not run per request."""
+        for _ in range(5):
+            authenticated_client.get("/calculations/")
+
+        assert revocations.stats()["refreshes"] == 1
+
+
+class TestTokenRevocations:
+    """Tests for the incremental revocation map."""
+
+    def test_refresh_loads_recent_revocations(self, db_session):
+        """Only users revoked within the token lifetime are loaded."""
+        now = datetime.utcnow()
+        db_session.add_all([
+            User(username="recent", email="recent@example.com", hashed_password="x",
+                 token_version=2, tokens_revoked_at=now),
+            User(username="old", email="old@example.com", hashed_password="x", token_version=1,
+                 tokens_revoked_at=now - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES + 1)),
+            User(username="never", email="never@example.com", hashed_password="x"),
+        ])
+        db_session.commit()
+        ids = {user.username: user.id for user in db_session.query(User).all()}
+        tracker = TokenRevocations(refresh_interval=0, lookback=0)
+
+        refresh(tracker)
+
+        assert tracker.minimum_version(ids["recent"]) == 2
+        assert tracker.minimum_version(ids["old"]) == 0
+        assert tracker.minimum_version(ids["never"]) == 0
+        assert tracker.stats() == {"revoked_users": 1, "refreshes": 1}
+
+    def test_local_revoke_is_immediate_and_monotonic(self):
+        """revoke() applies without a refresh and never lowers a version."""
+        tracker = TokenRevocations(refresh_interval=60, lookback=0)
+
+        tracker.revoke(1, 3)
+        tracker.revoke(1, 2)
+
+        assert tracker.minimum_version(1) == 3
+
+    def test_expired_revocations_are_pruned(self, db_session):
+        """Entries older than the token lifetime are dropped on refresh."""
+        tracker = TokenRevocations(refresh_interval=0, lookback=0)
+        tracker.revoke(1, 3, datetime.utcnow() - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES + 1))
+
+        refresh(tracker)
+
+        assert tracker.minimum_version(1) == 0
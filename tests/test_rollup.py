@@ -0,0 +1,131 @@
+import pytest
+from app import database, rollup
+from app.models import Calculation
+from tests.conftest import TestingAsyncSessionLocal
+
+
+class TestDeltas:
+    """Tests for delta helpers."""
+
+    def test_collect_and_merge(self):
+        """Rows are summed per operation and signed deltas cancel out."""
+        added = rollup.collect_deltas([("add", 1.0, 2.0), ("add", 3.0, 4.0), ("sqrt", 9.0, 0.0)])
+        removed = rollup.collect_deltas([("add", 1.0, 2.0)], sign=-1)
+
+        assert added == {"add": (2, 4.0, 6.0), "sqrt": (1, 9.0, 0.0)}
+        assert rollup.merge_deltas(added, removed) == {"add": (1, 3.0, 4.0), "sqrt": (1, 9.0, 0.0)}
+
+
+class TestRollupMaintenance:
+    """Tests for keeping the rollup in step with every write path."""
+
+    def test_create_edit_delete(self, authenticated_client, user_id, rollup_rows):
+        """Each single-row write applies its delta."""
+        uid = user_id()
+        first = authenticated_client.post("/calculations/", json={"operation": "add", "operand1": 1, "operand2": 2}).json()
+        authenticated_client.post("/calculations/", json={"operation": "add", "operand1": 3, "operand2": 4})
+        assert rollup_rows() == {(uid, "add"): (2, 4.0, 6.0)}
+
+        authenticated_client.put(f"/calculations/{first['id']}", json={"operation": "multiply", "operand1": 5})
+        assert rollup_rows() == {(uid, "add"): (1, 3.0, 4.0), (uid, "multiply"): (1, 5.0, 2.0)}
+
+        authenticated_client.delete(f"/calculations/{first['id']}")
+        assert rollup_rows() == {(uid, "add"): (1, 3.0, 4.0), (uid, "multiply"): (0, 0.0, 0.0)}
+
+    def test_failed_edit_leaves_rollup(self, authenticated_client, user_id, rollup_rows):
+        """An edit rejected by the engine changes nothing."""
+        uid = user_id()
+        created = authenticated_client.post("/calculations/", json={"operation": "add", "operand1": 1, "operand2": 2}).json()
+
+        response = authenticated_client.put(f"/calculations/{created['id']}", json={"operation": "divide", "operand2": 0})
+
+        assert response.status_code == 400
+        assert rollup_rows() == {(uid, "add"): (1, 1.0, 2.0)}
+
+    def test_bulk_writes(self, authenticated_client, user_id, rollup_rows):
+        """Batch and NDJSON import update the rollup once per request or chunk."""
+        uid = user_id()
+        authenticated_client.post("/calculations/batch", json=[
+            {"operation": "add", "operand1": 1, "operand2": 1},
+            {"operation": "divide", "operand1": 1, "operand2": 0},
+            {"operation": "sqrt", "operand1": 16, "operand2": 0},
+        ])
+        authenticated_client.post(
+            "/calculations/import",
+            content=b'{"operation": "add", "operand1": 2, "operand2": 2}\n',
+            headers={"Content-Type": "application/x-ndjson"}
+        )
+
+        assert rollup_rows() == {(uid, "add"): (2, 3.0, 3.0), (uid, "sqrt"): (1, 16.0, 0.0)}
+
+    def test_rollup_matches_rebuild(self, authenticated_client, rollup_rows, rebuild):
+        """Incremental maintenance and a rebuild from scratch agree."""
+        created = [
+            authenticated_client.post("/calculations/", json={"operation": op, "operand1": a, "operand2": b}).json()
+            for op, a, b in [("add", 1.5, 2), ("subtract", 7, 3), ("add", 2, 2), ("power", 2, 3)]
+        ]
+        authenticated_client.put(f"/calculations/{created[1]['id']}", json={"operation": "add"})
+        authenticated_client.delete(f"/calculations/{created[3]['id']}")
+        incremental = {key: value for key, value in rollup_rows().items() if value[0] > 0}
+
+        rebuild(rollup)
+
+        assert rollup_rows() == incremental
+
+    def test_stats_hide_emptied_operations(self, authenticated_client):
+        """Operations whose rows were all deleted drop out of the stats."""
+        created = authenticated_client.post("/calculations/", json={"operation": "add", "operand1": 1, "operand2": 2}).json()
+        authenticated_client.delete(f"/calculations/{created['id']}")
+
+        data = authenticated_client.get("/calculations/stats").json()
+
+        assert data["total_calculations"] == 0
+        assert data["operations_breakdown"] == []
+
+
+class TestRebuild:
+    """Tests for recomputing the rollup from the calculations table."""
+
+    def add_rows(self, db_session, owner, rows):
+        db_session.add_all(
+            Calculation(operation=op, operand1=a, operand2=b, result=0.0, user_id=owner) for op, a, b in rows
+        )
+        db_session.commit()
+
+    def test_rebuild_all_users(self, authenticated_client, db_session, user_id, rollup_rows, rebuild):
+        """Rows inserted behind the rollup's back are counted after a rebuild."""
+        uid = user_id()
+        self.add_rows(db_session, uid, [("add", 1, 2), ("add", 3, 4), ("divide", 8, 2)])
+        assert authenticated_client.get("/calculations/stats").json()["total_calculations"] == 0
+
+        rebuild(rollup)
+
+        assert rollup_rows() == {(uid, "add"): (2, 4.0, 6.0), (uid, "divide"): (1, 8.0, 2.0)}
+        assert authenticated_client.get("/calculations/stats").json()["total_calculations"] == 3
+
+    def test_rebuild_one_user(self, authenticated_client, db_session, test_user2, user_id, rollup_rows, rebuild):
+        """A per-user rebuild leaves other users' rows alone."""
+        authenticated_client.post("/users/register", json=test_user2)
+        uid, other = user_id(), user_id(test_user2["username"])
+        self.add_rows(db_session, uid, [("add", 1, 2)])
+        self.add_rows(db_session, other, [("add", 5, 5)])
+
+        rebuild(rollup, uid)
+
+        assert rollup_rows() == {(uid, "add"): (1, 1.0, 2.0)}
+
+    def test_rebuild_command(self, authenticated_client, db_session, monkeypatch, capsys, user_id, rollup_rows):
+        """`python -m app.rollup rebuild` recomputes the table."""
+        monkeypatch.setattr(database, "AsyncSessionLocal", TestingAsyncSessionLocal)
+        uid = user_id()
+        self.add_rows(db_session, uid, [("multiply", 2, 3)])
+
+        rollup.main(["rebuild"])
+
+        assert rollup_rows() == {(uid, "multiply"): (1, 2.0, 3.0)}
+        assert "all users" in capsys.readouterr().out
+
+    def test_command_requires_subcommand(self):
+        """The command line rejects a missing subcommand."""
+        with pytest.raises(SystemExit):
+            rollup.main([])
@@ -0,0 +1,158 @@
+import math
+import pytest
+from app import database, sketches
+from app.models import Calculation
+from tests.conftest import TestingAsyncSessionLocal
+
+
+class TestBuckets:
+    """Tests for bucket arithmetic and quantile estimates."""
+
+    def test_values_fall_inside_their_bucket(self):
+        """Every value lies within its bucket's bounds and close to its representative."""
+        for value in (0.001, 0.5, 1.0, 1.5, 2.0, 3.14159, 1000.0, 123456.789, -7.25, -0.02):
+            sign, bucket = sketches.bucket_of(value)
+            lower, upper = sketches.bucket_bounds(sign, bucket)
+            assert lower <= value <= upper
+            estimate = sketches.bucket_value(sign, bucket)
+            assert abs(estimate - value) <= 0.01 * abs(value) + 1e-12
+
+    def test_zero_and_non_finite(self):
+        """Zero has its own bucket; infinities and NaN are not counted."""
+        assert sketches.bucket_of(0.0) == (0, 0)
+        assert sketches.bucket_value(0, 0) == 0.0
+        assert sketches.bucket_of(math.inf) is None
+        assert sketches.bucket_of(math.nan) is None
+
+    def test_deltas_cancel(self):
+        """Adding and removing the same row leaves no delta."""
+        row = ("add", 1.0, 2.0, 3.0)
+        merged = sketches.merge_deltas(sketches.collect_deltas([row]), sketches.collect_deltas([row], sign=-1))
+        assert not any(merged.values())
+
+    def test_quantiles_across_signs(self):
+        """Buckets are walked from the most negative to the most positive value."""
+        rows = [("add", 0.0, 0.0, value) for value in (-100.0, -1.0, 0.0, 1.0, 100.0)]
+        deltas = sketches.collect_deltas(rows)
+        buckets = sorted(
+            ((sign, bucket, count) for (_, field, sign, bucket), count in deltas.items() if field == 0),
+            key=lambda item: (item[0], item[1] * item[0])
+        )
+
+        assert sketches.quantile(buckets, 0.0) == pytest.approx(-100, rel=0.01)
+        assert sketches.quantile(buckets, 0.5) == 0.0
+        assert sketches.quantile(buckets, 1.0) == pytest.approx(100, rel=0.01)
+        assert sketches.quantile([], 0.5) is None
+
+
+class TestDistributionEndpoint:
+    """Tests for /calculations/stats/distribution."""
+
+    def test_quantiles_within_accuracy(self, authenticated_client):
+        """Quantiles of results are within the configured relative accuracy."""
+        authenticated_client.post("/calculations/batch", json=[
+            {"operation": "add", "operand1": value, "operand2": 0} for value in range(1, 101)
+        ])
+
+        data = authenticated_client.get("/calculations/stats/distribution").json()
+
+        assert data["count"] == 100
+        assert data["relative_accuracy"] == 0.01
+        assert data["quantiles"]["p50"] == pytest.approx(50, rel=0.02)
+        assert data["quantiles"]["p90"] == pytest.approx(90, rel=0.02)
+        assert data["quantiles"]["p99"] == pytest.approx(99, rel=0.02)
+        assert sum(bucket["count"] for bucket in data["buckets"]) == 100
+        assert all(bucket["lower"] <= bucket["upper"] for bucket in data["buckets"])
+
+    def test_field_and_operation_filters(self, authenticated_client):
+        """Operands can be inspected per operation."""
+        for operation, a, b in [("add", 10, 1), ("multiply", 1000, 2), ("multiply", 1000, 3)]:
+            authenticated_client.post("/calculations/", json={"operation": operation, "operand1": a, "operand2": b})
+
+        data = authenticated_client.get("/calculations/stats/distribution?field=operand1&operation=multiply").json()
+
+        assert data["count"] == 2
+        assert data["operation"] == "multiply"
+        assert data["quantiles"]["p50"] == pytest.approx(1000, rel=0.01)
+
+    def test_empty_distribution(self, authenticated_client):
+        """Without data the quantiles are null."""
+        data = authenticated_client.get("/calculations/stats/distribution").json()
+
+        assert data["count"] == 0
+        assert data["buckets"] == []
+        assert data["quantiles"]["p50"] is None
+
+    def test_invalid_field(self, authenticated_client):
+        """Unknown fields are rejected."""
+        assert authenticated_client.get("/calculations/stats/distribution?field=created_at").status_code == 422
+
+
+class TestSketchMaintenance:
+    """Tests for keeping the sketches in step with every write path."""
+
+    def test_edit_and_delete(self, authenticated_client):
+        """Edits move values between buckets and deletes remove them."""
+        created = authenticated_client.post("/calculations/", json={"operation": "add", "operand1": 1, "operand2": 2}).json()
+        url = "/calculations/stats/distribution"
+
+        authenticated_client.put(f"/calculations/{created['id']}", json={"operand1": 997})
+        data = authenticated_client.get(url).json()
+        assert data["count"] == 1
+        assert data["quantiles"]["p50"] == pytest.approx(999, rel=0.01)
+
+        authenticated_client.delete(f"/calculations/{created['id']}")
+        assert authenticated_client.get(url).json()["count"] == 0
+
+    def test_incremental_matches_rebuild(self, authenticated_client, sketch_rows, rebuild):
+        """Incremental maintenance and a rebuild from scratch agree."""
+        created = [
+            authenticated_client.post("/calculations/", json={"operation": op, "operand1": a, "operand2": b}).json()
+            for op, a, b in [("add", 1.5, 2), ("subtract", 7, 30), ("divide", 0, 4), ("power", 2, 3)]
+        ]
+        authenticated_client.put(f"/calculations/{created[1]['id']}", json={"operation": "add"})
+        authenticated_client.delete(f"/calculations/{created[3]['id']}")
+        authenticated_client.post(
+            "/calculations/import",
+            content=b'{"operation": "multiply", "operand1": -2.5, "operand2": 4}\n',
+            headers={"Content-Type": "application/x-ndjson"}
+        )
+        incremental = sketch_rows()
+
+        rebuild(sketches)
+
+        assert sketch_rows() == incremental
+
+    def test_rebuild_streams_every_user(self, authenticated_client, db_session, test_user2, monkeypatch,
+                                        user_id, sketch_rows, rebuild):
+        """A full rebuild walks each user's rows in chunks and restores every user's buckets."""
+        authenticated_client.post("/users/register", json=test_user2)
+        owners = (user_id(), user_id(test_user2["username"]))
+        db_session.add_all(
+            Calculation(operation="add", operand1=value, operand2=owner, result=value + owner, user_id=owner)
+            for owner in owners
+            for value in range(5)
+        )
+        db_session.commit()
+        monkeypatch.setattr(sketches, "REBUILD_CHUNK_ROWS", 2)
+
+        rebuild(sketches)
+
+        expected = {}
+        for owner in owners:
+            rows = [("add", value, owner, value + owner) for value in range(5)]
+            for key, count in sketches.collect_deltas(rows).items():
+                expected[(owner,) + key] = count
+        assert sketch_rows() == expected
+
+    def test_rebuild_command(self, authenticated_client, db_session, monkeypatch, capsys, user_id):
+        """`python -m app.sketches rebuild --user-id` recomputes one user's buckets."""
+        monkeypatch.setattr(database, "AsyncSessionLocal", TestingAsyncSessionLocal)
+        uid = user_id()
+        db_session.add(Calculation(operation="add", operand1=2, operand2=3, result=5, user_id=uid))
+        db_session.commit()
+
+        sketches.main(["rebuild", "--user-id", str(uid)])
+
+        assert authenticated_client.get("/calculations/stats/distribution").json()["count"] == 1
+        assert f"user {uid}" in capsys.readouterr().out
@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from app.models import Calculation, User
+from app.timeseries import bucket_starts, floor_bucket
+from tests.conftest import engine
+
+
+def add_rows(db_session, rows):
+    """Insert (operation, created_at) rows for testuser directly."""
+    owner = db_session.query(User).filter_by(username="testuser").one().id
+    calculations = [
+        Calculation(operation=operation, operand1=1, operand2=1, result=2, user_id=owner, created_at=created_at)
+        for operation, created_at in rows
+    ]
+    db_session.add_all(calculations)
+    db_session.commit()
+    return calculations
+
+
+class TestBuckets:
+    """Tests for bucket arithmetic."""
+
+    def test_floor_bucket(self):
+        """Moments are floored to the start of their hour or day."""
+        moment = datetime(2024, 3, 5, 14, 37, 12, 500)
+        assert floor_bucket(moment, "hour") == datetime(2024, 3, 5, 14)
+        assert floor_bucket(moment, "day") == datetime(2024, 3, 5)
+
+    def test_bucket_starts_cover_range(self):
+        """The range is widened to whole buckets; end is exclusive."""
+        starts = bucket_starts(datetime(2024, 3, 5, 14, 30), datetime(2024, 3, 5, 17), "hour")
+        assert starts == [datetime(2024, 3, 5, hour) for hour in (14, 15, 16)]
+
+
+class TestTimeseriesEndpoint:
+    """Tests for /calculations/stats/timeseries."""
+
+    def test_daily_counts_include_empty_days(self, authenticated_client, db_session):
+        """Every day in range is returned, with zeros for quiet days."""
+        add_rows(db_session, [
+            ("add", datetime(2024, 1, 1, 9)),
+            ("add", datetime(2024, 1, 1, 23, 59)),
+            ("multiply", datetime(2024, 1, 3, 12)),
+            ("add", datetime(2024, 1, 4, 0)),  # outside the range
+        ])
+
+        response = authenticated_client.get(
+            "/calculations/stats/timeseries?bucket=day&start=2024-01-01T00:00:00&end=2024-01-04T00:00:00"
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["bucket"] == "day"
+        assert [(point["bucket_start"], point["count"]) for point in data["points"]] == [
+            ("2024-01-01T00:00:00", 2),
+            ("2024-01-02T00:00:00", 0),
+            ("2024-01-03T00:00:00", 1),
+        ]
+
+    def test_hourly_counts_with_operation_filter(self, authenticated_client, db_session):
+        """Hour buckets can be restricted to one operation."""
+        add_rows(db_session, [
+            ("add", datetime(2024, 1, 1, 9, 5)),
+            ("add", datetime(2024, 1, 1, 9, 55)),
+            ("divide", datetime(2024, 1, 1, 9, 30)),
+            ("add", datetime(2024, 1, 1, 11, 0)),
+        ])
+
+        data = authenticated_client.get(
+            "/calculations/stats/timeseries?bucket=hour&operation=add"
+            "&start=2024-01-01T09:00:00&end=2024-01-01T12:00:00"
+        ).json()
+
+        assert [point["count"] for point in data["points"]] == [2, 0, 1]
+        assert data["operation"] == "add"
+
+    def test_default_range_ends_now(self, authenticated_client):
+        """Without a range the last 30 days are returned, including today."""
+        authenticated_client.post("/calculations/", json={"operation": "add", "operand1": 1, "operand2": 2})
+
+        points = authenticated_client.get("/calculations/stats/timeseries").json()["points"]
+
+        assert len(points) == 31
+        assert points[-1]["count"] == 1
+
+    def test_closed_buckets_are_cached(self, authenticated_client, db_session, sql_statements):
+        """A repeated query over past buckets runs no SQL."""
+        add_rows(db_session, [("add", datetime(2024, 1, 1, 9))])
+        url = "/calculations/stats/timeseries?start=2024-01-01T00:00:00&end=2024-01-03T00:00:00"
+        authenticated_client.get(url)
+
+        with sql_statements() as executed:
+            data = authenticated_client.get(url).json()
+
+        assert [point["count"] for point in data["points"]] == [1, 0]
+        assert not any("FROM calculations" in statement for statement, _ in executed)
+
+    def test_open_bucket_is_recomputed(self, authenticated_client):
+        """New rows in the current bucket show up immediately."""
+        url = "/calculations/stats/timeseries?bucket=hour"
+        authenticated_client.get(url)
+
+        authenticated_client.post("/calculations/", json={"operation": "add", "operand1": 1, "operand2": 2})
+
+        assert authenticated_client.get(url).json()["points"][-1]["count"] == 1
+
+    def test_delete_invalidates_cached_buckets(self, authenticated_client, db_session):
+        """Deleting an old row is reflected in the cached past bucket."""
+        row = add_rows(db_session, [("add", datetime(2024, 1, 1, 9))])[0]
+        url = "/calculations/stats/timeseries?start=2024-01-01T00:00:00&end=2024-01-02T00:00:00"
+        assert authenticated_client.get(url).json()["points"][0]["count"] == 1
+
+        authenticated_client.delete(f"/calculations/{row.id}")
+
+        assert authenticated_client.get(url).json()["points"][0]["count"] == 0
+
+    def test_invalid_ranges(self, authenticated_client):
+        """Empty, oversized and malformed requests are rejected."""
+        base = "/calculations/stats/timeseries"
+        assert authenticated_client.get(
+            f"{base}?start=2024-01-02T00:00:00&end=2024-01-01T00:00:00"
+        ).status_code == 400
+        assert authenticated_client.get(
+            f"{base}?bucket=hour&start=2000-01-01T00:00:00&end=2024-01-01T00:00:00"
+        ).status_code == 400
+        assert authenticated_client.get(f"{base}?bucket=minute").status_code == 422
+
+    def test_user_isolation(self, authenticated_client, db_session):
+        """Only the caller's calculations are counted."""
+        other = User(username="other", email="other@example.com", hashed_password="x")
+        db_session.add(other)
+        db_session.commit()
+        db_session.add(Calculation(operation="add", operand1=1, operand2=1, result=2, user_id=other.id,
+                                   created_at=datetime(2024, 1, 1, 9)))
+        db_session.commit()
+
+        data = authenticated_client.get(
+            "/calculations/stats/timeseries?start=2024-01-01T00:00:00&end=2024-01-02T00:00:00"
+        ).json()
+
+        assert data["points"][0]["count"] == 0
+
+    def test_bucket_query_uses_index(self, db_session):
+        """The bucketing query is served by the (user_id, created_at) index."""
+        start = datetime.utcnow() - timedelta(days=1)
+        with engine.connect() as connection:
+            plan = connection.execute(text(
+                "EXPLAIN QUERY PLAN SELECT strftime('%Y-%m-%d 00:00:00', created_at), count(id) "
+                "FROM calculations WHERE user_id = 1 AND created_at >= :start AND created_at < :end "
+                "GROUP BY 1"
+            ), {"start": start, "end": datetime.utcnow()}).all()
+
+        assert any("ix_calculations_user_id_created_at" in row[-1] for row in plan)
@@ -0,0 +1,107 @@
+"""
+Unit and Integration tests for element-wise vector calculations
+"""
+import numpy as np
+import pytest
+from fastapi import status
+from app.arrays import pack_array, unpack_array
+from app.engine import evaluate_vector
+from app.models import VectorCalculation
+
+
+class TestArrayPacking:
+    """Unit tests for the binary array encoding"""
+
+    def test_round_trip(self):
+        """Test that pack/unpack preserves values and shape"""
+        values = np.linspace(-1, 1, 12).reshape(3, 4)
+        restored = unpack_array(pack_array(values))
+        assert restored.shape == (3, 4)
+        np.testing.assert_array_equal(restored, values)
+
+    def test_compact_size(self):
+        """Test that storage is 8 bytes per element plus a small header"""
+        blob = pack_array(range(1000))
+        assert len(blob) == 8000 + 9 + 8
+
+    def test_rejects_foreign_bytes(self):
+        """Test that arbitrary bytes are not decoded"""
+        with pytest.raises(ValueError):
+            unpack_array(b"JUNKJUNKJUNK")
+
+    def test_evaluate_vector(self):
+        """Test element-wise evaluation with an error mask"""
+        evaluation = evaluate_vector("divide", [1, 2, 3], [1, 0, 3])
+        assert evaluation.ok.tolist() == [True, False, True]
+        assert evaluation.results[2] == 1
+
+
+class TestVectorEndpoints:
+    """Integration tests for /calculations/vector"""
+
+    def test_create_vector_calculation(self, authenticated_client, db_session):
+        """Test element-wise power stored as a single row"""
+        response = authenticated_client.post("/calculations/vector", json={
+            "operation": "power",
+            "operand1": [1, 2, 3, 4],
+            "operand2": [2, 2, 2, 0.5]
+        })
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        assert data["length"] == 4
+        assert data["result"] == [1, 4, 9, 2]
+        assert db_session.query(VectorCalculation).count() == 1
+
+        read = authenticated_client.get(f"/calculations/vector/{data['id']}")
+        assert read.status_code == status.HTTP_200_OK
+        assert read.json()["result"] == [1, 4, 9, 2]
+
+    def test_large_vector(self, authenticated_client):
+        """Test a large job is one request and one row"""
+        values = list(range(1, 20001))
+        response = authenticated_client.post("/calculations/vector", json={
+            "operation": "multiply", "operand1": values, "operand2": [2] * len(values)
+        })
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()["result"][-1] == 40000
+
+    def test_sqrt_without_operand2(self, authenticated_client):
+        """Test sqrt accepts a single array"""
+        response = authenticated_client.post("/calculations/vector", json={
+            "operation": "sqrt", "operand1": [4, 9, 16]
+        })
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()["result"] == [2, 3, 4]
+
+    def test_element_error(self, authenticated_client, db_session):
+        """Test that a failing element rejects the whole job"""
+        response = authenticated_client.post("/calculations/vector", json={
+            "operation": "modulus", "operand1": [5, 6, 7], "operand2": [2, 0, 0]
+        })
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "element 1" in response.json()["detail"]
+        assert db_session.query(VectorCalculation).count() == 0
+
+    def test_element_overflow(self, authenticated_client, db_session):
+        """Test that an element overflowing to inf rejects the job"""
+        response = authenticated_client.post("/calculations/vector", json={
+            "operation": "multiply", "operand1": [1, 1e308], "operand2": [10, 10]
+        })
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "element 1" in response.json()["detail"]
+        assert db_session.query(VectorCalculation).count() == 0
+
+    @pytest.mark.parametrize("payload", [
+        {"operation": "add", "operand1": [1, 2], "operand2": [1]},
+        {"operation": "add", "operand1": [1, 2]},
+        {"operation": "add", "operand1": [], "operand2": []},
+    ])
+    def test_invalid_shapes(self, authenticated_client, payload):
+        """Test that mismatched or missing arrays are rejected"""
+        response = authenticated_client.post("/calculations/vector", json=payload)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    def test_vector_not_found(self, authenticated_client):
+        """Test reading a missing vector calculation"""
+        response = authenticated_client.get("/calculations/vector/999")
+        assert response.status_code == status.HTTP_404_NOT_FOUND